@@ -0,0 +1,20 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Host independent helpers shared by the scripts for Autodesk 3D Studio Max, Autodesk Maya and Blender.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# The scripts add the directory of additional files ("common") to sys.path before running the first step,
+# so modules of this package can be imported inside of every application:
+# from scenekit import meshpack
+#
+# Modules of this package must not import any application specific module (maya, bpy, MaxPlus).
+# They have to run in Python 2.7 (Maya, 3Ds Max) and in Python 3 (Blender).
+#
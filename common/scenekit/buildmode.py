@@ -0,0 +1,104 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Build mode: settings of the application that slow down creation of the scene are suspended during a step.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every script gives its own settings (redraw of the viewport, undo queue, autosave) as pairs of functions: suspend()
+# turns the setting off and returns its previous state, restore(state) sets it back, e.g.:
+#
+#   with buildmode.suspended([(pause_viewport, resume_viewport), (disable_undo, enable_undo)]) as build:
+#       create_and_animate_trees(path)
+#
+# Redraws forced by the scripts go through skip_redraw(): in build mode they are skipped and counted. The time saved by
+# the skipped redraws can be estimated from the time of one redraw, measured before the settings are suspended. The
+# measurement forces a redraw, so it is optional (redraw argument) and its time (BuildMode.redraw_time) should not be
+# counted in the time of the step.
+#
+
+import contextlib
+import time
+
+_active = []  # BuildMode of the running suspended() call, nested calls use it
+
+
+class BuildMode(object):
+    """
+    Statistics of a build mode context.
+    """
+
+    def __init__(self):
+        self.redraws_skipped = 0
+        self.redraw_measured = False
+        self.redraw_time = 0.0  # Measured time of one redraw, in seconds
+        self.overhead = 0.0  # Time of suspending and restoring the settings, in seconds
+
+    @property
+    def time_saved(self):
+        """
+        Estimated time saved by the skipped redraws minus the overhead of the build mode, in seconds.
+        """
+
+        return self.redraws_skipped * self.redraw_time - self.overhead
+
+
+@contextlib.contextmanager
+def suspended(settings, redraw=None):
+    """
+    Context in which settings of the application are suspended. Settings are restored in the reverse order, also when
+    an error was raised. Nested calls do not change the settings again, they share the BuildMode of the first call.
+
+    :param settings: Python list - (suspend, restore) pairs of functions: suspend() turns the setting off and returns
+    its previous state, restore(state) sets it back
+    :param redraw: function - Redraws the viewport once, used to measure the time of a redraw (None - not measured)
+    :return: BuildMode - Statistics of the context
+    """
+
+    if _active:
+        yield _active[0]
+        return
+
+    build = BuildMode()
+    if redraw is not None:
+        start = time.time()
+        redraw()
+        build.redraw_time = time.time() - start
+        build.redraw_measured = True
+
+    start = time.time()
+    states = []
+    try:
+        for suspend, restore in settings:
+            states.append((restore, suspend()))
+        build.overhead = time.time() - start
+        _active.append(build)
+        try:
+            yield build
+        finally:
+            _active.pop()
+    finally:
+        start = time.time()
+        for restore, state in reversed(states):
+            restore(state)
+        build.overhead += time.time() - start
+
+
+def skip_redraw():
+    """
+    Function tells if a redraw requested by the script should be skipped: it is skipped (and counted) in build mode.
+
+    :rtype : bool
+    """
+
+    if _active:
+        _active[0].redraws_skipped += 1
+        return True
+    return False
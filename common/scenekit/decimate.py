@@ -0,0 +1,298 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Mesh decimation with quadric error metrics (Garland, Heckbert 1997) and levels of detail (LOD).
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every vertex gets a quadric: the sum of squared distances to the planes of its faces. Edges are collapsed one by one,
+# always the edge that moves the surface the least, until the mesh has the requested number of triangles.
+# Edges on the border of the mesh get additional planes, so the outline of the mesh is kept.
+# Collapses that would flip a face or join two parts of the mesh in one vertex are skipped.
+#
+# The module is written in pure Python (no NumPy), so it works in every application. Meshes are triangulated first.
+# Texture coordinates are not kept, levels of detail are meant for the viewport.
+#
+# Decimation of a big mesh takes seconds, so build_lods() can save the levels in a cache directory (e.g. the directory
+# of the OBJ file, like scenekit.objcache) as *.pmesh files named by the hash of the full mesh and the ratios:
+#   lod_<sha1>_<level>.pmesh
+# Next runs map these files into memory instead of decimating the same mesh again. Files of changed meshes are not
+# removed, they are only not used any more.
+#
+
+import hashlib
+import heapq
+import math
+import os
+import struct
+
+from scenekit import meshpack
+from scenekit import meshregistry
+
+LOD_RATIOS = (0.5, 0.25, 0.1)  # Number of faces of the levels of detail, relative to the full mesh
+BORDER_WEIGHT = 1000.0
+CACHE_VERSION = 1  # Part of the key of cached levels, changed when decimate() gives different meshes
+
+
+def _plane_quadric(normal, point, weight=1.0):
+    """
+    Function returns the quadric of the plane: 10 coefficients of the symmetric 4x4 matrix.
+
+    :param normal: tuple of 3 floats - Normal of the plane, normalized
+    :param point: tuple of 3 floats - Any point of the plane
+    :param weight: float - Multiplier of the quadric
+    :rtype : Python list
+    """
+
+    a, b, c = normal
+    d = -(a * point[0] + b * point[1] + c * point[2])
+    return [weight * value for value in (a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d)]
+
+
+def _error(quadric, point):
+    """
+    Function returns the error of the point: sum of squared distances to the planes of the quadric.
+    """
+
+    a2, ab, ac, ad, b2, bc, bd, c2, cd, d2 = quadric
+    x, y, z = point
+    return (a2 * x * x + 2 * ab * x * y + 2 * ac * x * z + 2 * ad * x + b2 * y * y + 2 * bc * y * z + 2 * bd * y +
+            c2 * z * z + 2 * cd * z + d2)
+
+
+def _det3(rows):
+    """
+    Function returns the determinant of the 3x3 matrix given by rows.
+    """
+
+    (a, b, c), (d, e, f), (g, h, i) = rows
+    return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+
+def _optimal_point(quadric, point_a, point_b):
+    """
+    Function finds the position with the smallest error. If the quadric can not be solved (e.g. flat surface),
+    the best of the ends and the middle of the edge is used.
+
+    :return: tuple - float error, tuple of 3 floats position
+    """
+
+    a2, ab, ac, ad, b2, bc, bd, c2, cd, d2 = quadric
+    rows = ((a2, ab, ac), (ab, b2, bc), (ac, bc, c2))
+    det = _det3(rows)
+    if abs(det) > 1e-12:  # Cramer's rule: columns of the matrix are replaced by the right side one by one
+        right = (-ad, -bd, -cd)
+        point = tuple(_det3([row[:i] + (value,) + row[i + 1:] for row, value in zip(rows, right)]) / det
+                      for i in range(3))
+        return _error(quadric, point), point
+
+    middle = tuple((a + b) / 2.0 for a, b in zip(point_a, point_b))
+    return min((_error(quadric, point), point) for point in (point_a, point_b, middle))
+
+
+def _normal(point_a, point_b, point_c):
+    """
+    Function returns the normal of the triangle (not normalized, its length is twice the area).
+    """
+
+    ux, uy, uz = point_b[0] - point_a[0], point_b[1] - point_a[1], point_b[2] - point_a[2]
+    vx, vy, vz = point_c[0] - point_a[0], point_c[1] - point_a[1], point_c[2] - point_a[2]
+    return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+
+def _normalized(vector):
+    """
+    Function returns the vector with length 1 (or a zero vector).
+    """
+
+    length = math.sqrt(vector[0] * vector[0] + vector[1] * vector[1] + vector[2] * vector[2])
+    return (0.0, 0.0, 0.0) if length == 0 else (vector[0] / length, vector[1] / length, vector[2] / length)
+
+
+def decimate(mesh, target_faces):
+    """
+    Function reduces the number of triangles of the mesh.
+
+    :param mesh: scenekit.meshpack.PackedMesh - The mesh. Faces with more than 3 vertices are triangulated.
+    :param target_faces: int - Number of triangles of the result
+    :rtype : scenekit.meshpack.PackedMesh
+    """
+
+    points = [tuple(float(value) for value in vert) for vert in mesh.iter_vertices()]
+    faces = []
+    for face in mesh.iter_faces():
+        for i in range(1, len(face) - 1):  # Triangle fan
+            faces.append([face[0], face[i], face[i + 1]])
+
+    vert_faces = [set() for _ in points]
+    for face_num, face in enumerate(faces):
+        for vert in face:
+            vert_faces[vert].add(face_num)
+
+    # Quadrics of vertices: planes of faces weighted by their area, planes perpendicular to border edges
+    quadrics = [[0.0] * 10 for _ in points]
+    edge_faces = {}
+    for face_num, face in enumerate(faces):
+        normal = _normal(points[face[0]], points[face[1]], points[face[2]])
+        area = math.sqrt(normal[0] * normal[0] + normal[1] * normal[1] + normal[2] * normal[2]) / 2.0
+        plane = _plane_quadric(_normalized(normal), points[face[0]], area)
+        for vert in face:
+            quadrics[vert] = [q + p for q, p in zip(quadrics[vert], plane)]
+        for i in range(3):
+            edge = (min(face[i], face[i - 1]), max(face[i], face[i - 1]))
+            edge_faces.setdefault(edge, []).append(face_num)
+
+    for (vert_a, vert_b), edge_face_nums in edge_faces.items():
+        if len(edge_face_nums) != 1:
+            continue
+        face = faces[edge_face_nums[0]]
+        face_normal = _normalized(_normal(points[face[0]], points[face[1]], points[face[2]]))
+        direction = tuple(b - a for a, b in zip(points[vert_a], points[vert_b]))
+        border_normal = _normalized((direction[1] * face_normal[2] - direction[2] * face_normal[1],
+                                     direction[2] * face_normal[0] - direction[0] * face_normal[2],
+                                     direction[0] * face_normal[1] - direction[1] * face_normal[0]))
+        plane = _plane_quadric(border_normal, points[vert_a], BORDER_WEIGHT)
+        for vert in (vert_a, vert_b):
+            quadrics[vert] = [q + p for q, p in zip(quadrics[vert], plane)]
+
+    versions = [0] * len(points)  # Changed with every collapse, older entries of the heap are skipped
+    heap = []
+
+    def push(vert_a, vert_b):
+        quadric = [qa + qb for qa, qb in zip(quadrics[vert_a], quadrics[vert_b])]
+        cost, point = _optimal_point(quadric, points[vert_a], points[vert_b])
+        heapq.heappush(heap, (cost, vert_a, vert_b, versions[vert_a], versions[vert_b], point))
+
+    for vert_a, vert_b in edge_faces:
+        push(vert_a, vert_b)
+
+    def neighbours(vert):
+        return set(other for face_num in vert_faces[vert] for other in faces[face_num]) - {vert}
+
+    faces_num = len(faces)
+    while faces_num > target_faces and heap:
+        cost, vert_a, vert_b, version_a, version_b, point = heapq.heappop(heap)
+        if version_a != versions[vert_a] or version_b != versions[vert_b]:
+            continue
+        shared = vert_faces[vert_a] & vert_faces[vert_b]
+        if not shared:
+            continue
+        if len(neighbours(vert_a) & neighbours(vert_b)) != len(shared):  # Would join two parts of the mesh
+            continue
+
+        flipped = False
+        for face_num in (vert_faces[vert_a] | vert_faces[vert_b]) - shared:
+            face = faces[face_num]
+            old_normal = _normal(*[points[vert] for vert in face])
+            new_normal = _normal(*[point if vert in (vert_a, vert_b) else points[vert] for vert in face])
+            if sum(o * n for o, n in zip(old_normal, new_normal)) <= 0:
+                flipped = True
+                break
+        if flipped:
+            continue
+
+        # Collapse: vert_b is removed, faces of both vertices use vert_a
+        points[vert_a] = point
+        quadrics[vert_a] = [qa + qb for qa, qb in zip(quadrics[vert_a], quadrics[vert_b])]
+        for face_num in shared:
+            for vert in faces[face_num]:
+                vert_faces[vert].discard(face_num)
+            faces[face_num] = None
+            faces_num -= 1
+        for face_num in vert_faces[vert_b]:
+            faces[face_num] = [vert_a if vert == vert_b else vert for vert in faces[face_num]]
+            vert_faces[vert_a].add(face_num)
+        vert_faces[vert_b] = set()
+        versions[vert_a] += 1
+        versions[vert_b] += 1
+        for other in neighbours(vert_a):
+            push(min(vert_a, other), max(vert_a, other))
+
+    # Only the vertices used by the remaining faces are saved
+    new_numbers = {}
+    positions, face_indices = [], []
+    for face in faces:
+        if face is None:
+            continue
+        for vert in face:
+            if vert not in new_numbers:
+                new_numbers[vert] = len(new_numbers)
+                positions.extend(points[vert])
+            face_indices.append(new_numbers[vert])
+    return meshpack.PackedMesh(*meshpack.pack_lists([positions[i:i + 3] for i in range(0, len(positions), 3)],
+                                                    [face_indices[i:i + 3] for i in range(0, len(face_indices), 3)]))
+
+
+def lod_cache_paths(mesh, ratios, cache_dir):
+    """
+    Function returns the paths of the cache files of the levels of detail of the mesh.
+
+    :param mesh: scenekit.meshpack.PackedMesh - The full mesh
+    :param ratios: sequence of floats - Number of faces of every level (see build_lods())
+    :param cache_dir: str - Directory of the cache files
+    :return: Python list - Path of the *.pmesh file of every level
+    """
+
+    key = hashlib.sha1(('%d %r %s' % (CACHE_VERSION, [float(ratio) for ratio in ratios],
+                                      meshregistry.mesh_key(mesh.positions, mesh.face_counts, mesh.face_indices))
+                        ).encode('utf-8')).hexdigest()
+    return [os.path.join(cache_dir, 'lod_%s_%d.pmesh' % (key, level)) for level in range(1, len(ratios) + 1)]
+
+
+def build_lods(mesh, ratios=LOD_RATIOS, cache_dir=None):
+    """
+    Function creates the levels of detail of the mesh. Every level is decimated from the previous one.
+    With a cache directory, levels saved by an earlier call for the same mesh are loaded instead. If the cache
+    can not be saved (e.g. the directory is read only), the levels are returned anyway.
+
+    :param mesh: scenekit.meshpack.PackedMesh - The full mesh
+    :param ratios: sequence of floats - Number of faces of every level relative to the number of triangles
+    of the full mesh, e.g. (0.5, 0.25, 0.1)
+    :param cache_dir: str - Directory of the cache files, None - no cache
+    :return: Python list - scenekit.meshpack.PackedMesh for every level
+    """
+
+    if cache_dir is None:
+        return _decimate_levels(mesh, ratios)
+
+    paths = lod_cache_paths(mesh, ratios, cache_dir)
+    if all(os.path.isfile(path) for path in paths):
+        try:
+            return [meshpack.load_mesh(path) for path in paths]
+        except (ValueError, struct.error, EnvironmentError):  # Damaged or old cache files, they will be replaced
+            pass
+
+    lods = _decimate_levels(mesh, ratios)
+    try:
+        for path, lod in zip(paths, lods):
+            meshpack.write_mesh(path + '.tmp', lod.positions, lod.face_counts, lod.face_indices)
+            if hasattr(os, 'replace'):
+                os.replace(path + '.tmp', path)
+            else:  # Python 2
+                if os.path.exists(path):
+                    os.remove(path)
+                os.rename(path + '.tmp', path)
+    except EnvironmentError:
+        pass
+    return lods
+
+
+def _decimate_levels(mesh, ratios):
+    """
+    Function decimates every level of detail of the mesh from the previous one (see build_lods()).
+    """
+
+    triangles = sum(count - 2 for count in mesh.face_counts)
+    lods = []
+    source = mesh
+    for ratio in ratios:
+        source = decimate(source, max(1, int(triangles * ratio)))
+        lods.append(source)
+    return lods
@@ -0,0 +1,124 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Reduction of keyframes collected in a scenekit.keytable.KeyTable before they are written to the application.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every curve (keys of one channel of one object) is simplified with the Ramer-Douglas-Peucker algorithm on
+# time / value: the first and the last key are kept, then the key that is the most distant from the line between
+# kept keys is kept too, until no key is more distant than the tolerance. The distance is measured along the value
+# axis (at the time of the key), so the tolerance is given in units of the values (scene units, degrees, scale).
+#
+# Curves of one property of an object (its x, y and z) keep the same frames: a frame kept by any axis is kept by all
+# of them, because 3Ds Max stores x, y and z in one key and the other applications key the axes together too.
+#
+# Tangents are fitted to the result: keys on both sides of a segment from which keys were removed get linear
+# tangents there (the out tangent of the first key, the in tangent of the second one), so the application draws
+# the same line that was used to measure the error. Segments without removed keys keep their tangents.
+#
+
+import collections
+
+from scenekit import keytable
+
+ReductionReport = collections.namedtuple('ReductionReport', ['keys_before', 'keys_removed', 'max_error'])
+
+
+def simplify_curve(times, values, tolerance):
+    """
+    Function finds the keys of the curve that have to be kept, so no removed key is more distant from the line
+    between the kept keys around it than the tolerance.
+
+    :param times: sequence of floats - Times of keys, sorted
+    :param values: sequence of floats - Values of keys
+    :param tolerance: float - Maximum distance of a removed key from the simplified curve, in units of values
+    :return: tuple - (Python list - numbers of kept keys, float - the biggest distance of a removed key)
+    """
+
+    count = len(times)
+    if count < 3:
+        return list(range(count)), 0.0
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    max_error = 0.0
+    segments = [(0, count - 1)]  # Segments are checked with a stack, deep recursion is not needed for long curves
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        slope = (values[last] - values[first]) / float(times[last] - times[first])
+        error, index = max((abs(values[first] + slope * (times[i] - times[first]) - values[i]), i)
+                           for i in range(first + 1, last))
+        if error > tolerance:
+            keep[index] = True
+            segments.append((first, index))
+            segments.append((index, last))
+        else:
+            max_error = max(max_error, error)
+    return [i for i in range(count) if keep[i]], max_error
+
+
+def curve_error(times, values, kept):
+    """
+    Function returns the biggest distance of a removed key from the line between the kept keys around it.
+
+    :param times: sequence of floats - Times of keys, sorted
+    :param values: sequence of floats - Values of keys
+    :param kept: sequence of ints - Numbers of kept keys, sorted, with the first and the last key
+    :rtype : float
+    """
+
+    error = 0.0
+    for first, last in zip(kept[:-1], kept[1:]):
+        if last - first < 2:
+            continue
+        slope = (values[last] - values[first]) / float(times[last] - times[first])
+        error = max([error] + [abs(values[first] + slope * (times[i] - times[first]) - values[i])
+                               for i in range(first + 1, last)])
+    return error
+
+
+def reduce_table(table, tolerance):
+    """
+    Function removes keys from the table (see simplify_curve()) and fits the tangents of kept keys.
+    Keys with the same time are merged first, like in KeyTable.curves(). Axes of a property keep the same frames.
+
+    :param table: scenekit.keytable.KeyTable - Keys that will be reduced, the table is changed
+    :param tolerance: float - Maximum distance of a removed key from the simplified curve, in units of values
+    :rtype : ReductionReport
+    """
+
+    keys_before = len(table)
+    curves = table.curves()
+    table.clear()
+
+    kept_times = {}  # {(target, property): frames kept by any of the axes}
+    for curve in curves:
+        kept = simplify_curve(curve.times, curve.values, tolerance)[0]
+        kept_times.setdefault((curve.target, curve.property_name), set()).update(curve.times[i] for i in kept)
+
+    max_error = 0.0
+    for curve in curves:
+        frames = kept_times[(curve.target, curve.property_name)]
+        kept = [i for i, time in enumerate(curve.times) if time in frames]
+        max_error = max(max_error, curve_error(curve.times, curve.values, kept))
+        in_tangents = [curve.in_tangents[i] for i in kept]
+        out_tangents = [curve.out_tangents[i] for i in kept]
+        for number in range(len(kept) - 1):
+            if kept[number + 1] - kept[number] > 1:  # Keys were removed between those two keys
+                out_tangents[number] = keytable.LINEAR
+                in_tangents[number + 1] = keytable.LINEAR
+        for number, i in enumerate(kept):
+            table.add(curve.target, curve.property_name, curve.axis, curve.times[i], curve.values[i],
+                      in_tangents[number], out_tangents[number])
+
+    return ReductionReport(keys_before, keys_before - len(table), max_error)
@@ -0,0 +1,289 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Table of keyframes collected by a step of the scripts before they are written to the application.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Functions of the scripts that animate objects (set_scale_keys(), set_position_keys() etc.) do not create keys in the
+# application, they add them to the table of the running step. At the end of the step the table is written to
+# the scene once, by the fastest way of every application (flush_keys() of every script), e.g.:
+#
+#   with keytable.collect(flush_keys):
+#       create_and_animate_trees(path)
+#
+# Before the keys touch the scene they are checked (times and values have to be finite numbers) and duplicated keys
+# (the same object, channel and time) are removed: the key added last is kept.
+#
+# Every key is one row of the table: target id, channel, time, value, in tangent, out tangent. Columns are stored in
+# array.array objects, so the table is compact also without NumPy. Times are frames (floats), values are in units
+# of the scene (degrees for rotation). Targets are stored the way the script gives them (a name, a node handle,
+# an object), the table only numbers them.
+#
+
+import array
+import collections
+import contextlib
+import math
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+# Tangent types of keys, in the order of numbers used by MaxPlus.Animation.SetDefaultTangentType()
+SMOOTH, LINEAR, STEP, FAST, SLOW, CUSTOM, FLAT, PLATEAU = range(8)
+TANGENT_NAMES = ['smooth', 'linear', 'step', 'fast', 'slow', 'custom', 'flat', 'plateau']
+
+PROPERTIES = ['position', 'rotation', 'scale']  # Animated properties, channels of every one are its x, y and z
+AXES = 3
+
+# Layout of a row of the table, the same as the one returned by KeyTable.records()
+KEY_DTYPE = [('target', '<i4'), ('channel', '<i2'), ('time', '<f8'), ('value', '<f8'),
+             ('in_tangent', 'i1'), ('out_tangent', 'i1')]
+
+KeyCurve = collections.namedtuple('KeyCurve', ['target', 'property_name', 'axis', 'times', 'values',
+                                               'in_tangents', 'out_tangents'])
+
+_collecting = []  # (table, flush, tolerance) of the running collect() call, the table receives the keys of all of
+# the nested calls
+
+
+def channel_number(property_name, axis):
+    """
+    Function returns the number of the channel stored in the table.
+
+    :param property_name: str - One of PROPERTIES
+    :param axis: int - 0, 1 or 2 for x, y and z
+    :rtype : int
+    """
+
+    if property_name not in PROPERTIES or not 0 <= axis < AXES:
+        raise ValueError('Unknown channel: %s[%r]' % (property_name, axis))
+    return PROPERTIES.index(property_name) * AXES + axis
+
+
+class KeyTable(object):
+    """
+    Keyframes of many objects and channels, one row per key.
+    """
+
+    def __init__(self):
+        self.reduction = None  # scenekit.keyreduce.ReductionReport, when the keys were reduced by collect()
+        self.clear()
+
+    def __len__(self):
+        return len(self._time)
+
+    def clear(self):
+        """
+        Function removes all of the keys and targets from the table.
+        """
+
+        self.targets = []  # Targets in the order of their first key, the row stores the number of the target
+        self._target_ids = {}
+        self._target = array.array('i')
+        self._channel = array.array('h')
+        self._time = array.array('d')
+        self._value = array.array('d')
+        self._in_tangent = array.array('b')
+        self._out_tangent = array.array('b')
+
+    def target_id(self, target):
+        """
+        Function returns the number of the target in the table, the target is added if it is not there yet.
+
+        :param target: Hashable object that identifies the animated object in the application (name, handle, object)
+        :rtype : int
+        """
+
+        target_id = self._target_ids.get(target)
+        if target_id is None:
+            target_id = self._target_ids[target] = len(self.targets)
+            self.targets.append(target)
+        return target_id
+
+    def add(self, target, property_name, axis, time, value, in_tangent=FAST, out_tangent=FAST):
+        """
+        Function adds a single key to the table.
+
+        :param target: Animated object (see target_id())
+        :param property_name: str - One of PROPERTIES
+        :param axis: int - 0, 1 or 2 for x, y and z
+        :param time: float - Frame of the key
+        :param value: float - Value of the key
+        :param in_tangent: int - Type of the in tangent: SMOOTH, LINEAR, FAST...
+        :param out_tangent: int - Type of the out tangent
+        """
+
+        channel = channel_number(property_name, axis)
+        time, value = float(time), float(value)
+        if math.isinf(time) or math.isnan(time) or math.isinf(value) or math.isnan(value):
+            raise ValueError('Key of %r %s[%d] is not a finite number: %r at %r' % (target, property_name, axis,
+                                                                                     value, time))
+        for tangent in (in_tangent, out_tangent):
+            if not 0 <= tangent < len(TANGENT_NAMES):
+                raise ValueError('Unknown tangent type: %r' % tangent)
+
+        self._target.append(self.target_id(target))
+        self._channel.append(channel)
+        self._time.append(time)
+        self._value.append(value)
+        self._in_tangent.append(in_tangent)
+        self._out_tangent.append(out_tangent)
+
+    def add_keys(self, target, property_name, times, values, in_tangents=None, out_tangents=None):
+        """
+        Function adds keys of many channels of one property of the object. All channels get keys at the same times.
+
+        :param target: Animated object (see target_id())
+        :param property_name: str - One of PROPERTIES
+        :param times: Python list - Frames of keys
+        :param values: Python list - List of values of keys for every axis, from x. Axes can be skipped with None.
+        :param in_tangents: Python list - Type of the in tangent of every key (FAST for all keys by default)
+        :param out_tangents: Python list - Type of the out tangent of every key (the same as in tangents by default)
+        """
+
+        in_tangents = in_tangents or [FAST] * len(times)
+        out_tangents = out_tangents or in_tangents
+        for axis, axis_values in enumerate(values):
+            if axis_values is None:
+                continue
+            for time, value, in_tangent, out_tangent in zip(times, axis_values, in_tangents, out_tangents):
+                self.add(target, property_name, axis, time, value, in_tangent, out_tangent)
+
+    def records(self):
+        """
+        Function returns the rows of the table as a NumPy structured array (see KEY_DTYPE).
+
+        :rtype : numpy.ndarray
+        """
+
+        records = numpy.empty(len(self), dtype=KEY_DTYPE)
+        for name, column in zip(records.dtype.names, [self._target, self._channel, self._time, self._value,
+                                                       self._in_tangent, self._out_tangent]):
+            records[name] = numpy.frombuffer(column, dtype=column.typecode) if len(column) else []
+        return records
+
+    def curves(self):
+        """
+        Function returns the keys grouped by objects and channels, ready to be written to the application.
+        Curves are ordered by the first key of the object, then by the channel. Keys of every curve are sorted
+        by time, of keys with the same time only the one added last is kept.
+
+        :return: Python list - KeyCurve tuples, times and values of every curve are Python lists
+        """
+
+        if numpy is not None and len(self):  # Masks of the NumPy version have one element more than the rows
+            return self._curves_numpy()
+        return self._curves_python()
+
+    def _curves_numpy(self):
+        """
+        NumPy version of curves(): rows are sorted and duplicates removed with array operations.
+        """
+
+        records = self.records()
+        rows = numpy.lexsort((numpy.arange(len(records)), records['time'], records['channel'], records['target']))
+        records = records[rows]
+        same_key = ((records['target'][1:] == records['target'][:-1]) &
+                    (records['channel'][1:] == records['channel'][:-1]) &
+                    (records['time'][1:] == records['time'][:-1]))
+        records = records[numpy.append(~same_key, True)]  # The last of the same keys was added last
+
+        curve_starts = numpy.nonzero(numpy.append(True, (records['target'][1:] != records['target'][:-1]) |
+                                                  (records['channel'][1:] != records['channel'][:-1])))[0]
+        curves = []
+        for start, end in zip(curve_starts, numpy.append(curve_starts[1:], len(records))):
+            curve = records[start:end]
+            channel = int(curve['channel'][0])
+            curves.append(KeyCurve(self.targets[int(curve['target'][0])], PROPERTIES[channel // AXES],
+                                   channel % AXES, curve['time'].tolist(), curve['value'].tolist(),
+                                   curve['in_tangent'].tolist(), curve['out_tangent'].tolist()))
+        return curves
+
+    def _curves_python(self):
+        """
+        Pure Python version of curves(), used when NumPy is not available.
+        """
+
+        rows = {}  # {(target, channel, time): row}, rows added later replace the earlier ones
+        for row in range(len(self)):
+            rows[(self._target[row], self._channel[row], self._time[row])] = row
+
+        curves = []
+        current = None
+        for key in sorted(rows):
+            row = rows[key]
+            if current is None or key[:2] != current:
+                current = key[:2]
+                curves.append(KeyCurve(self.targets[key[0]], PROPERTIES[key[1] // AXES], key[1] % AXES,
+                                       [], [], [], []))
+            curve = curves[-1]
+            curve.times.append(self._time[row])
+            curve.values.append(self._value[row])
+            curve.in_tangents.append(self._in_tangent[row])
+            curve.out_tangents.append(self._out_tangent[row])
+        return curves
+
+
+@contextlib.contextmanager
+def collect(flush, tolerance=None):
+    """
+    Context in which keys are added to one table and written to the application at its end.
+    Nested calls use the table of the first one, so keys are written once, when the outermost context ends.
+    Keys are not written when an error was raised.
+
+    :param flush: function - Called with the KeyTable at the end of the context, writes the keys to the application
+    :param tolerance: float - Keys that differ from the simplified curves less than this value are removed before
+    they are written (see scenekit.keyreduce). The report is saved in KeyTable.reduction. None or 0 - no reduction
+    :return: KeyTable - The table that receives the keys
+    """
+
+    if _collecting:
+        yield _collecting[0][0]
+        return
+
+    table = KeyTable()
+    _collecting.append((table, flush, tolerance))
+    try:
+        yield table
+    finally:
+        _collecting.pop()
+    _write(table, flush, tolerance)
+
+
+def flush_collected():
+    """
+    Function writes the keys collected so far by the running collect() call to the application and clears its table,
+    e.g. before animated nodes are copied. Keys are reduced like at the end of the context. Nothing is done when
+    no collect() call is running.
+    """
+
+    if _collecting:
+        _write(*_collecting[0])
+
+
+def _write(table, flush, tolerance):
+    """
+    Function reduces the keys of the table (the report is added to KeyTable.reduction), writes them with the flush
+    function and clears the table.
+    """
+
+    if tolerance:
+        from scenekit import keyreduce
+        report = keyreduce.reduce_table(table, tolerance)
+        if table.reduction is not None:  # Keys were already written by flush_collected()
+            report = keyreduce.ReductionReport(table.reduction.keys_before + report.keys_before,
+                                               table.reduction.keys_removed + report.keys_removed,
+                                               max(table.reduction.max_error, report.max_error))
+        table.reduction = report
+    flush(table)
+    table.clear()
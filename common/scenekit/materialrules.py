@@ -0,0 +1,114 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Rules that choose the material of every object by its name or by its tags.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The scripts describe the assignment of materials as a list of rules instead of tests of every object, e.g.:
+#
+#   rules = [materialrules.rule(water_mat, patterns=['water*']),
+#            materialrules.rule(gray_mat, patterns=['*lock*', '*metal*']),
+#            materialrules.rule(wood_mat, patterns=['*chest*', 'Palm*'], excludes=['*metal*'], tags=['segment'])]
+#   for material, numbers in materialrules.partition([obj.name for obj in objects], rules):
+#       assign(material, [objects[number] for number in numbers])  # One call of the application for every material
+#
+# Patterns are shell-style (* - any text, ? - any character) and have to match the whole name. The first rule that
+# matches an object chooses its material. Patterns of all rules are compiled into one regular expression, so every
+# name is matched once, no matter how many rules there are. Tags (e.g. roles of scenekit.nodeindex) select objects
+# without their names; excludes only limit the patterns of their rule.
+#
+
+import collections
+import re
+
+Rule = collections.namedtuple('Rule', ['material', 'patterns', 'excludes', 'tags'])
+
+
+def rule(material, patterns=(), excludes=(), tags=()):
+    """
+    Function creates a rule of the assignment of the material.
+
+    :param material: The material, application specific (e.g. a shading group in Maya)
+    :param patterns: sequence of str - Shell-style patterns of names of the objects
+    :param excludes: sequence of str - Shell-style patterns of names that are not matched by the patterns
+    :param tags: sequence of str - Tags of the objects
+    :rtype : Rule
+    """
+
+    return Rule(material, list(patterns), list(excludes), list(tags))
+
+
+def _pattern_to_regex(pattern):
+    """
+    Function converts a shell-style pattern to a regular expression (without anchors).
+    """
+
+    return ''.join('.*' if char == '*' else '.' if char == '?' else re.escape(char) for char in pattern)
+
+
+def compile_rules(rules, ignore_case=False):
+    """
+    Function compiles the rules into one matcher.
+
+    :param rules: Python list - Rule of every material, in the order of priority
+    :param ignore_case: bool - Patterns ignore the case of letters
+    :return: function(name, tags=()) - Returns the number of the first rule that matches the object or None
+    """
+
+    branches = []
+    for number, rule_ in enumerate(rules):
+        if rule_.patterns:
+            excludes = ''.join('(?!%s\\Z)' % _pattern_to_regex(pattern) for pattern in rule_.excludes)
+            branches.append('(?P<rule%d>%s(?:%s))' % (number, excludes, '|'.join(_pattern_to_regex(pattern)
+                                                                                   for pattern in rule_.patterns)))
+    regex = re.compile('(?:%s)\\Z' % '|'.join(branches), re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+    tag_rules = {}  # {tag: number of the first rule with the tag}
+    for number, rule_ in enumerate(rules):
+        for tag in rule_.tags:
+            tag_rules.setdefault(tag, number)
+
+    def match(name, tags=()):
+        matched = regex.match(name) if branches else None
+        numbers = [int(matched.lastgroup[4:])] if matched else []
+        numbers.extend(tag_rules[tag] for tag in tags if tag in tag_rules)
+        return min(numbers) if numbers else None
+
+    return match
+
+
+def partition(names, rules, tags=None, ignore_case=False):
+    """
+    Function splits the objects into groups with the same material, in one pass over the objects.
+
+    :param names: sequence of str - Names of the objects
+    :param rules: Python list - Rule of every material, in the order of priority
+    :param tags: sequence - Tags of every object (a sequence of str for every object), None - objects have no tags
+    :param ignore_case: bool - Patterns ignore the case of letters
+    :return: Python list - (material, numbers of the objects) for every material that matched any object, in the order
+    of the rules. Rules with the same material give one group.
+    """
+
+    match = compile_rules(rules, ignore_case)
+    materials = []  # Materials do not have to be hashable, so they are compared by identity
+    groups = []
+    for rule_ in rules:
+        group = [number for number, material in enumerate(materials) if material is rule_.material]
+        if not group:
+            materials.append(rule_.material)
+            group = [len(materials) - 1]
+        groups.append(group[0])
+
+    numbers = [[] for _ in materials]
+    for number, name in enumerate(names):
+        matched = match(name, tags[number] if tags is not None else ())
+        if matched is not None:
+            numbers[groups[matched]].append(number)
+    return [(material, group) for material, group in zip(materials, numbers) if group]
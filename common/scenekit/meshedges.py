@@ -0,0 +1,286 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Soft / hard and visible / hidden edges calculated from the angles between faces.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every application has its own way of marking edges: Maya has soft and hard edges (polySoftEdge), Blender has sharp
+# edges, 3Ds Max has visible edges and smoothing groups of faces. The edges are calculated here once, from the same
+# data, so the result is the same in every application. Applications only set the calculated flags.
+#
+# Edges are numbered in the order of their first appearance in the face data. An edge is soft when it has exactly two
+# faces and the angle between their normals is not greater than the smoothing angle. An edge is visible when the angle
+# is greater than the visibility angle (edges between faces lying on the same plane are hidden). Meshes read from
+# OBJ files come with smoothing groups of faces instead of an angle: an edge is soft when its faces share a group.
+#
+
+import math
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+SMOOTH_ANGLE = 30.0  # The same angle that was used with polySoftEdge in Maya
+VISIBLE_ANGLE = 0.5
+
+
+class MeshEdges(object):
+    """
+    Edges of the mesh and their flags.
+    """
+
+    def __init__(self, edges, corner_edges, angles, smooth, visible):
+        """
+        :param edges: sequence of ints - Vertex numbers of every edge (smaller first), two numbers per edge
+        :param corner_edges: sequence of ints - For every corner of every face: the edge from this corner to the next
+        :param angles: sequence of floats - Angle between normals of faces of the edge in degrees (180 if the edge
+        does not have exactly two faces)
+        :param smooth: sequence of bools - Is the edge soft
+        :param visible: sequence of bools - Is the edge visible
+        """
+
+        self.edges = edges
+        self.corner_edges = corner_edges
+        self.angles = angles
+        self.smooth = smooth
+        self.visible = visible
+
+    def edge_numbers(self, edges):
+        """
+        Function finds the numbers of edges given in the other order (e.g. the order of edges created by
+        the application) in this object.
+
+        :param edges: sequence of ints - Vertex numbers of every edge, two numbers per edge (in any order)
+        :return: Python list - Number of every given edge in this object
+        """
+
+        numbers = dict(((self.edges[2 * i], self.edges[2 * i + 1]), i) for i in range(len(self.edges) // 2))
+        return [numbers[(min(edges[i], edges[i + 1]), max(edges[i], edges[i + 1]))] for i in range(0, len(edges), 2)]
+
+
+def _compute_numpy(positions, face_counts, face_indices, smooth_angle, visible_angle):
+    """
+    NumPy version of compute_edges(): the whole mesh is processed with array operations.
+    """
+
+    points = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+    face_counts = numpy.asarray(face_counts, dtype=numpy.int64)
+    first = numpy.asarray(face_indices, dtype=numpy.int64)
+    starts = numpy.zeros(len(face_counts), dtype=numpy.int64)
+    numpy.cumsum(face_counts[:-1], out=starts[1:])
+
+    next_corner = numpy.arange(1, len(first) + 1)  # The last corner of the face is followed by the first one
+    next_corner[starts + face_counts - 1] = starts
+    second = first[next_corner]
+
+    # Normals of faces (Newell's method, works for faces with any number of vertices)
+    normals = numpy.add.reduceat(numpy.cross(points[first], points[second]), starts)
+    lengths = numpy.sqrt((normals * normals).sum(axis=1))
+    normals /= numpy.where(lengths > 0, lengths, 1)[:, None]
+
+    # Edges numbered in the order of the first appearance
+    low, high = numpy.minimum(first, second), numpy.maximum(first, second)
+    keys = low * len(points) + high
+    unique_keys, first_corner, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+    order = numpy.argsort(first_corner)
+    numbers = numpy.empty(len(order), dtype=numpy.int64)
+    numbers[order] = numpy.arange(len(order))
+    corner_edges = numbers[inverse.ravel()]
+    edges = numpy.column_stack((low[first_corner[order]], high[first_corner[order]]))
+
+    # Faces of every edge. Only edges with two faces get an angle.
+    face_of_corner = numpy.repeat(numpy.arange(len(face_counts)), face_counts)
+    faces_num = numpy.bincount(corner_edges, minlength=len(order))
+    sorted_corners = numpy.argsort(corner_edges, kind='mergesort')
+    edge_starts = numpy.zeros(len(order), dtype=numpy.int64)
+    numpy.cumsum(faces_num[:-1], out=edge_starts[1:])
+    angles = numpy.full(len(order), 180.0)
+    manifold = numpy.nonzero(faces_num == 2)[0]
+    face_a = face_of_corner[sorted_corners[edge_starts[manifold]]]
+    face_b = face_of_corner[sorted_corners[edge_starts[manifold] + 1]]
+    cosines = numpy.clip((normals[face_a] * normals[face_b]).sum(axis=1), -1.0, 1.0)
+    angles[manifold] = numpy.degrees(numpy.arccos(cosines))
+
+    return MeshEdges(edges.astype(numpy.int32).ravel(), corner_edges.astype(numpy.int32), angles,
+                     angles <= smooth_angle, angles > visible_angle)
+
+
+def _compute_python(positions, face_counts, face_indices, smooth_angle, visible_angle):
+    """
+    Pure Python version of compute_edges(), used when NumPy is not available.
+    """
+
+    positions = [float(value) for value in positions]  # Calculate with double precision, like the NumPy version
+    normals = []
+    edge_numbers = {}  # {(smaller vertex, bigger vertex): edge number}
+    edges, edge_faces, corner_edges = [], [], []
+    start = 0
+    for face_num, count in enumerate(face_counts):
+        face = [int(i) for i in face_indices[start:start + count]]
+        start += count
+        nx = ny = nz = 0.0
+        for corner, vert_a in enumerate(face):
+            vert_b = face[(corner + 1) % count]
+            ax, ay, az = positions[3 * vert_a], positions[3 * vert_a + 1], positions[3 * vert_a + 2]
+            bx, by, bz = positions[3 * vert_b], positions[3 * vert_b + 1], positions[3 * vert_b + 2]
+            nx += ay * bz - az * by  # Newell's method
+            ny += az * bx - ax * bz
+            nz += ax * by - ay * bx
+
+            key = (min(vert_a, vert_b), max(vert_a, vert_b))
+            number = edge_numbers.get(key)
+            if number is None:
+                number = edge_numbers[key] = len(edges)
+                edges.append(key)
+                edge_faces.append([])
+            edge_faces[number].append(face_num)
+            corner_edges.append(number)
+        length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
+        normals.append((nx / length, ny / length, nz / length))
+
+    angles = []
+    for faces in edge_faces:
+        if len(faces) != 2:
+            angles.append(180.0)
+            continue
+        normal_a, normal_b = normals[faces[0]], normals[faces[1]]
+        cosine = max(-1.0, min(1.0, sum(a * b for a, b in zip(normal_a, normal_b))))
+        angles.append(math.degrees(math.acos(cosine)))
+
+    return MeshEdges([vert for edge in edges for vert in edge], corner_edges, angles,
+                     [angle <= smooth_angle for angle in angles], [angle > visible_angle for angle in angles])
+
+
+def compute_edges(positions, face_counts, face_indices, smooth_angle=SMOOTH_ANGLE, visible_angle=VISIBLE_ANGLE,
+                  face_groups=None):
+    """
+    Function calculates the edges of the mesh, the angles between faces and the flags of edges.
+
+    :param positions: sequence of floats - x, y, z of every vertex
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param face_indices: sequence of ints - Vertex numbers of all faces
+    :param smooth_angle: float - Edges with smaller angle between faces are soft (degrees)
+    :param visible_angle: float - Edges with bigger angle between faces are visible (degrees)
+    :param face_groups: sequence of ints - Smoothing group of every face (e.g. "s" of OBJ files), 0 - no group.
+    When given, soft edges are taken from the groups (see group_smooth()) instead of smooth_angle.
+    :rtype : MeshEdges
+    """
+
+    if numpy is not None:
+        mesh_edges = _compute_numpy(positions, face_counts, face_indices, smooth_angle, visible_angle)
+    else:
+        mesh_edges = _compute_python(positions, face_counts, face_indices, smooth_angle, visible_angle)
+    if face_groups is not None:
+        mesh_edges.smooth = group_smooth(face_counts, mesh_edges, face_groups)
+    return mesh_edges
+
+
+def _edge_faces(face_counts, mesh_edges):
+    """
+    Function returns the faces of every edge.
+
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param mesh_edges: MeshEdges - Edges calculated by compute_edges()
+    :return: dict - {edge number: Python list of face numbers}
+    """
+
+    edge_faces = {}
+    face_num = 0
+    corner = 0
+    for count in face_counts:
+        for edge in mesh_edges.corner_edges[corner:corner + count]:
+            edge_faces.setdefault(int(edge), []).append(face_num)
+        corner += count
+        face_num += 1
+    return edge_faces
+
+
+def group_smooth(face_counts, mesh_edges, face_groups):
+    """
+    Function calculates soft edges from smoothing groups of faces, like the importers of OBJ files do: an edge is soft
+    when it has exactly two faces and both of them are in the same group. Edges on the borders of groups and edges
+    of faces without a group are hard.
+
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param mesh_edges: MeshEdges - Edges calculated by compute_edges()
+    :param face_groups: sequence of ints - Smoothing group of every face, 0 - no group
+    :return: Python list - Is every edge soft
+    """
+
+    smooth = [False] * (len(mesh_edges.edges) // 2)
+    for edge, faces in _edge_faces(face_counts, mesh_edges).items():
+        if len(faces) == 2 and faces[0] != faces[1]:
+            smooth[edge] = face_groups[faces[0]] != 0 and face_groups[faces[0]] == face_groups[faces[1]]
+    return smooth
+
+
+def smoothing_groups(face_counts, mesh_edges):
+    """
+    Function calculates smoothing groups of faces (used by 3Ds Max) from the soft edges. Faces are split into regions
+    by a flood fill over soft edges that never adds a face with a hard edge to a face of the region, so there are
+    no hard edges inside a region. Every region gets one bit: regions with a hard edge between them get different
+    bits, a region takes the bit of a region next to it by soft edges when it can, so these edges stay smooth.
+    Faces without soft edges get no group (0).
+
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param mesh_edges: MeshEdges - Edges calculated by compute_edges()
+    :return: Python list - Bits of smoothing groups of every face
+    """
+
+    edge_faces = _edge_faces(face_counts, mesh_edges)
+    soft = [[] for _ in face_counts]  # Faces next to every face by soft / hard edges
+    hard = [[] for _ in face_counts]
+    for edge, faces in edge_faces.items():
+        if len(faces) != 2 or faces[0] == faces[1]:
+            continue
+        neighbours = soft if mesh_edges.smooth[edge] else hard
+        neighbours[faces[0]].append(faces[1])
+        neighbours[faces[1]].append(faces[0])
+
+    regions = [-1] * len(soft)  # Region of every face
+    region_count = 0
+    for seed in range(len(soft)):
+        if regions[seed] >= 0:
+            continue
+        regions[seed] = region_count
+        blocked = set(hard[seed])  # Faces with a hard edge to a face of the region
+        stack = [seed]
+        while stack:
+            for face in soft[stack.pop()]:
+                if regions[face] < 0 and face not in blocked:
+                    regions[face] = region_count
+                    blocked.update(hard[face])
+                    stack.append(face)
+        region_count += 1
+
+    soft_regions = [set() for _ in range(region_count)]  # Regions next to every region by soft / hard edges
+    hard_regions = [set() for _ in range(region_count)]
+    for face in range(len(soft)):
+        soft_regions[regions[face]].update(regions[other] for other in soft[face])
+        hard_regions[regions[face]].update(regions[other] for other in hard[face])
+    for region in range(region_count):
+        soft_regions[region] -= hard_regions[region] | set([region])
+
+    bits = [0] * region_count
+    has_soft = [False] * region_count
+    for face in range(len(soft)):
+        has_soft[regions[face]] = has_soft[regions[face]] or bool(soft[face])
+    for region in range(region_count):  # Greedy coloring, in the order of the faces
+        if not has_soft[region]:  # Faces without soft edges, nothing to smooth with
+            continue
+        used = 0
+        for other in hard_regions[region]:
+            used |= bits[other]
+        shared = [bits[other] for other in sorted(soft_regions[region]) if bits[other] and not used & bits[other]]
+        free = [bit for bit in range(31) if not used & (1 << bit)]  # 31 bits fit in a signed MaxScript integer
+        bits[region] = shared[0] if shared else 1 << (free[0] if free else 0)
+    return [bits[region] for region in regions]
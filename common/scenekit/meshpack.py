@@ -0,0 +1,175 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Packed binary format of the meshes used by the scripts (shark fin, cloud, palm leaf).
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Layout of a *.pmesh file (little endian):
+#
+#   header:        4s magic 'PMSH', uint32 version, uint32 vertex_count, uint32 face_count, uint32 index_count
+#   positions:     float32 * 3 * vertex_count  - x, y, z of every vertex, one after another
+#   face_counts:   int32 * face_count          - number of vertices of every face
+#   face_indices:  int32 * index_count         - vertex numbers of all faces, one after another
+#
+# This is the same layout as the one used by Maya's MFnMesh.create(), so arrays can be passed to applications
+# without regrouping. Positions are stored in the coordinate system of 3Ds Max (Z axis points up).
+#
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+MAGIC = b'PMSH'
+VERSION = 1
+HEADER = struct.Struct('<4sIIII')
+
+_loaded_meshes = {}  # Meshes that were already memory-mapped: {absolute path: PackedMesh}
+
+
+class PackedMesh(object):
+    """
+    Mesh data read from a *.pmesh file. Arrays are views of the memory-mapped file, they are not copied
+    (with the exception of Python 2 without NumPy, which has no way of casting a memory buffer).
+    """
+
+    def __init__(self, positions, face_counts, face_indices):
+        """
+        :param positions: flat buffer of floats - x, y, z of every vertex
+        :param face_counts: buffer of ints - number of vertices of every face
+        :param face_indices: buffer of ints - vertex numbers of all faces
+        """
+
+        self.positions = positions
+        self.face_counts = face_counts
+        self.face_indices = face_indices
+        self.vertex_count = len(positions) // 3
+        self.face_count = len(face_counts)
+
+    def iter_vertices(self):
+        """
+        Generator of vertex positions grouped by three: (x, y, z)
+        """
+
+        positions = self.positions
+        for i in range(0, len(positions), 3):
+            yield positions[i], positions[i + 1], positions[i + 2]
+
+    def iter_faces(self):
+        """
+        Generator of faces: lists of vertex numbers of every face.
+        """
+
+        face_indices = self.face_indices
+        start = 0
+        for count in self.face_counts:
+            yield [int(i) for i in face_indices[start:start + count]]
+            start += count
+
+
+def _view(buffer_, offset, type_code, count):
+    """
+    Function returns a part of the buffer as an array of numbers, without copying data if it is possible.
+
+    :param buffer_: mmap.mmap - Memory-mapped file
+    :param offset: int - Offset of the first byte in the buffer
+    :param type_code: str - 'f' for float32, 'i' for int32
+    :param count: int - Number of values
+    :return: numpy.ndarray, memoryview or array.array
+    """
+
+    size = 4 * count
+    if numpy is not None:
+        return numpy.frombuffer(buffer_, dtype='<f4' if type_code == 'f' else '<i4', count=count, offset=offset)
+    if sys.version_info[0] >= 3 and sys.byteorder == 'little':
+        return memoryview(buffer_)[offset:offset + size].cast(type_code)
+    values = array.array(type_code, buffer_[offset:offset + size])  # Python 2: the data has to be copied
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def load_mesh(path):
+    """
+    Function maps the *.pmesh file into memory and returns the mesh stored in it.
+    Every file is mapped only once, next calls return the same object.
+
+    :param path: str - Path to the *.pmesh file
+    :rtype : PackedMesh
+    """
+
+    path = os.path.abspath(path)
+    mesh = _loaded_meshes.get(path)
+    if mesh is not None:
+        return mesh
+
+    with open(path, 'rb') as file_:
+        buffer_ = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)  # The map stays valid after closing the file
+
+    magic, version, vertex_count, face_count, index_count = HEADER.unpack_from(buffer_, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a packed mesh file (or unsupported version): ' + path)
+
+    offset = HEADER.size
+    positions = _view(buffer_, offset, 'f', 3 * vertex_count)
+    offset += 4 * 3 * vertex_count
+    face_counts = _view(buffer_, offset, 'i', face_count)
+    offset += 4 * face_count
+    face_indices = _view(buffer_, offset, 'i', index_count)
+
+    mesh = PackedMesh(positions, face_counts, face_indices)
+    _loaded_meshes[path] = mesh
+    return mesh
+
+
+def pack_lists(verts_list, faces_list):
+    """
+    Function converts the vertex and face data saved as Python lists to the flat arrays used by the *.pmesh files.
+
+    :param verts_list: Python list - Positions of vertices: [[float x, float y, float z], ...]
+    :param faces_list: Python list - Vertices of faces: [[int, int, int, ...], ...]
+    :return: tuple of array.array - positions, face_counts, face_indices
+    """
+
+    positions = array.array('f', [value for vert in verts_list for value in vert])
+    face_counts = array.array('i', [len(face) for face in faces_list])
+    face_indices = array.array('i', [index for face in faces_list for index in face])
+    return positions, face_counts, face_indices
+
+
+def write_mesh(path, positions, face_counts, face_indices):
+    """
+    Function saves the mesh to the *.pmesh file.
+
+    :param path: str - Path to the file that will be created
+    :param positions: sequence of floats - x, y, z of every vertex
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param face_indices: sequence of ints - Vertex numbers of all faces
+    """
+
+    positions = array.array('f', positions)
+    face_counts = array.array('i', face_counts)
+    face_indices = array.array('i', face_indices)
+    if sys.byteorder != 'little':
+        for values in (positions, face_counts, face_indices):
+            values.byteswap()
+
+    with open(path, 'wb') as file_:
+        file_.write(HEADER.pack(MAGIC, VERSION, len(positions) // 3, len(face_counts), len(face_indices)))
+        positions.tofile(file_)
+        face_counts.tofile(file_)
+        face_indices.tofile(file_)
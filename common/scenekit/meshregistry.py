@@ -0,0 +1,97 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Registry of meshes created in the application, addressed by the content of the mesh (vertex and face data).
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The first request for a mesh creates it with a function given by the script, every next request with the same
+# vertex and face data returns the mesh that was already created. The scripts use it to create instances of a single
+# mesh instead of creating a new mesh for every palm tree. Stored values are application specific
+# (name of a node, name of a data block), the registry only keeps them.
+#
+
+import array
+import hashlib
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+_shared_meshes = {}  # Meshes that were already created: {key: value returned by the create function}
+
+
+def _to_bytes(values, type_code):
+    """
+    Function returns the values as little endian bytes of float32 ('f') or int32 ('i'),
+    so the same data gives the same bytes no matter which type of array it was stored in.
+
+    :param values: sequence of numbers - numpy.ndarray, memoryview, array.array or Python list
+    :param type_code: str - 'f' for float32, 'i' for int32
+    :rtype : bytes
+    """
+
+    if numpy is not None:
+        return numpy.ascontiguousarray(values, dtype='<f4' if type_code == 'f' else '<i4').tobytes()
+    values = array.array(type_code, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tostring() if sys.version_info[0] < 3 else values.tobytes()
+
+
+def mesh_key(positions, face_counts, face_indices):
+    """
+    Function calculates the key of the mesh: a hash of its vertex and face data.
+
+    :param positions: sequence of floats - x, y, z of every vertex
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param face_indices: sequence of ints - Vertex numbers of all faces
+    :rtype : str
+    """
+
+    hash_ = hashlib.sha1(struct.pack('<III', len(positions), len(face_counts), len(face_indices)))
+    hash_.update(_to_bytes(positions, 'f'))
+    hash_.update(_to_bytes(face_counts, 'i'))
+    hash_.update(_to_bytes(face_indices, 'i'))
+    return hash_.hexdigest()
+
+
+def get_shared_mesh(mesh, create, is_valid=None):
+    """
+    Function returns the mesh created in the application for the given data. The mesh is created only by the first
+    call, next calls with the same data return the stored value.
+
+    :param mesh: scenekit.meshpack.PackedMesh - Vertex and face data
+    :param create: function - Called without arguments when there is no mesh for the data. Returns the value to store.
+    :param is_valid: function - Called with the stored value. If it returns False (e.g. the mesh was deleted
+    from the scene), the mesh is created again.
+    :return: Value returned by the create function
+    """
+
+    key = mesh_key(mesh.positions, mesh.face_counts, mesh.face_indices)
+    if key in _shared_meshes:
+        value = _shared_meshes[key]
+        if is_valid is None or is_valid(value):
+            return value
+
+    value = create()
+    _shared_meshes[key] = value
+    return value
+
+
+def clear():
+    """
+    Function forgets all of the stored meshes (e.g. after a new scene was opened).
+    """
+
+    _shared_meshes.clear()
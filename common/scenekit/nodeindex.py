@@ -0,0 +1,68 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Index of nodes created by the scripts, grouped by their role in the scene.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every step records the nodes it creates, e.g. segments and leafs of the palms, lights and cameras. Later steps ask
+# the index for the nodes of a role instead of scanning the whole scene and matching the names, which is slow when
+# the scene has thousands of nodes (a scan for every palm makes creation of N palms O(N^2)), e.g.:
+#
+#   nodeindex.add('segment', cmds.ls(segments, uuid=True))
+#   ...
+#   cmds.sets(cmds.ls(nodeindex.get('segment')), e=True, forceElement=wood_sg)
+#
+# Stored values are application specific handles that do not change when a node is renamed or parented (Maya: UUID,
+# 3Ds Max: handle of the node, Blender: the object), the index only keeps them. Roles used by the scripts: 'segment',
+# 'leaf', 'light', 'camera' and roles of single objects that get their own material (e.g. 'water', 'chest').
+#
+
+_nodes = {}  # Recorded nodes: {role: [handles in the order of creation]}
+
+
+def add(role, handles):
+    """
+    Function records created nodes.
+
+    :param role: str - Role of the nodes in the scene
+    :param handles: sequence - Application specific handles of the nodes
+    """
+
+    _nodes.setdefault(role, []).extend(handles)
+
+
+def get(role):
+    """
+    Function returns the recorded nodes of the role.
+
+    :param role: str - Role of the nodes in the scene
+    :return: Python list - Handles of the nodes in the order of creation, empty if no node of the role was recorded
+    """
+
+    return list(_nodes.get(role, []))
+
+
+def roles():
+    """
+    Function returns the roles of the recorded nodes.
+
+    :return: Python list - Sorted names of the roles
+    """
+
+    return sorted(_nodes)
+
+
+def clear():
+    """
+    Function forgets all of the recorded nodes (e.g. before a new scene is created).
+    """
+
+    _nodes.clear()
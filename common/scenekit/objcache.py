@@ -0,0 +1,302 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Binary cache of OBJ files read by scenekit.objreader.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The parsed data is saved next to the OBJ file (water.obj -> water.obj.cache). Next runs map the cache file into
+# memory and skip the text parsing. The cache is valid when the path, size and modification time of the OBJ file
+# are the same as saved. If only the path or the time changed (the file was copied or touched), the SHA-1 of
+# the content is compared and the cache is still used when the content is the same.
+# Changes of *.mtl files alone are not detected.
+#
+# Layout of a cache file (little endian, every block starts at a multiple of 4 bytes):
+#
+#   header:    4s magic 'POBC', uint32 version, uint64 size, int64 mtime (ns), 20s sha1, uint32 to_z_up,
+#              uint32 path length, uint32 length of materials, uint32 number of groups,
+#              uint32 number of positions, uint32 number of uvs, uint32 number of normals (floats, not vertices)
+#   path:      utf-8 path of the OBJ file
+#   materials: utf-8 JSON of the materials read from MTL files
+#   arrays:    float32 positions, float32 uvs, float32 normals
+#   groups:    for every group: uint32 name length, uint32 material length (0xFFFFFFFF for no material),
+#              uint32 face count, uint32 index count, utf-8 name, utf-8 material,
+#              int32 face_counts, int32 smoothing_groups, int32 position_indices, int32 uv_indices,
+#              int32 normal_indices
+#
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from scenekit import meshpack
+from scenekit import objreader
+
+MAGIC = b'POBC'
+VERSION = 2  # 2 - smoothing groups of faces
+HEADER = struct.Struct('<4sIQq20sIIIIIII')
+GROUP_HEADER = struct.Struct('<IIII')
+NO_MATERIAL = 0xFFFFFFFF
+CACHE_EXTENSION = '.cache'
+
+
+def _padded(size):
+    """
+    Function returns the size rounded up to a multiple of 4 bytes.
+
+    :param size: int - Size in bytes
+    :rtype : int
+    """
+
+    return (size + 3) & ~3
+
+
+def _file_hash(path):
+    """
+    Function calculates the SHA-1 of the file content, reading it in blocks.
+
+    :param path: str - Path to the file
+    :rtype : bytes
+    """
+
+    hash_ = hashlib.sha1()
+    with open(path, 'rb') as file_:
+        for block in iter(lambda: file_.read(1 << 20), b''):
+            hash_.update(block)
+    return hash_.digest()
+
+
+def _file_stamp(path):
+    """
+    Function returns the size and the modification time of the file.
+
+    :param path: str - Path to the file
+    :return: tuple - int size, int modification time in nanoseconds
+    """
+
+    stat = os.stat(path)
+    mtime = getattr(stat, 'st_mtime_ns', None)  # Python 2 has no st_mtime_ns
+    if mtime is None:
+        mtime = int(stat.st_mtime * 1e9)
+    return stat.st_size, mtime
+
+
+def _to_bytes(values):
+    """
+    Function returns the array as bytes.
+
+    :param values: array.array, numpy.ndarray or memoryview
+    :rtype : bytes
+    """
+
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()  # array.array of Python 2
+
+
+def write_cache(cache_path, obj_path, obj_data, to_z_up, stamp=None, digest=None):
+    """
+    Function saves the parsed OBJ file to the cache file.
+    The data is written to a temporary file first and then it replaces the old cache file, so a damaged cache is never
+    left behind. The old cache file must not be mapped into memory (see read_cache()): Windows can not replace or remove
+    a mapped file. If the cache can not be saved, the temporary file is removed and the error is raised.
+
+    :param cache_path: str - Path to the cache file that will be created
+    :param obj_path: str - Path to the OBJ file
+    :param obj_data: scenekit.objreader.ObjData - Parsed OBJ file
+    :param to_z_up: bool - Was the data converted to Z axis pointing up
+    :param stamp: tuple - Size and modification time of the OBJ file, read from the file if not given
+    :param digest: bytes - SHA-1 of the OBJ file, calculated if not given
+    """
+
+    temp_path = cache_path + '.tmp'
+    try:
+        _write_file(temp_path, obj_path, obj_data, to_z_up, stamp, digest)
+        _replace(temp_path, cache_path)
+    except EnvironmentError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _write_file(file_path, obj_path, obj_data, to_z_up, stamp, digest):
+    """
+    Function writes the cache file, see write_cache().
+    """
+
+    size, mtime = stamp or _file_stamp(obj_path)
+    path_bytes = os.path.abspath(obj_path).encode('utf-8')
+    materials_bytes = json.dumps(obj_data.materials, sort_keys=True).encode('utf-8')
+
+    with open(file_path, 'wb') as file_:
+        file_.write(HEADER.pack(MAGIC, VERSION, size, mtime, digest or _file_hash(obj_path), int(bool(to_z_up)),
+                                len(path_bytes), len(materials_bytes), len(obj_data.groups),
+                                len(obj_data.positions), len(obj_data.uvs), len(obj_data.normals)))
+        for text in (path_bytes, materials_bytes):
+            file_.write(text + b'\0' * (_padded(len(text)) - len(text)))
+        for values in (obj_data.positions, obj_data.uvs, obj_data.normals):
+            file_.write(_to_bytes(values))
+
+        for group in obj_data.groups:
+            name = group.name.encode('utf-8')
+            material = group.material.encode('utf-8') if group.material is not None else b''
+            file_.write(GROUP_HEADER.pack(len(name), len(material) if group.material is not None else NO_MATERIAL,
+                                          len(group.face_counts), len(group.position_indices)))
+            for text in (name, material):
+                file_.write(text + b'\0' * (_padded(len(text)) - len(text)))
+            for values in (group.face_counts, group.smoothing_groups, group.position_indices, group.uv_indices,
+                           group.normal_indices):
+                file_.write(_to_bytes(values))
+
+
+
+def _replace(source_path, target_path):
+    """
+    Function renames the file, the target file is replaced if it exists.
+
+    :param source_path: str - Path to the file
+    :param target_path: str - New path of the file
+    """
+
+    if hasattr(os, 'replace'):
+        os.replace(source_path, target_path)
+    else:  # Python 2
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        os.rename(source_path, target_path)
+
+
+def read_cache(cache_path):
+    """
+    Function maps the cache file into memory. Arrays are views of the mapped file (see scenekit.meshpack).
+    The file stays mapped as long as any of the arrays is used, it is unmapped when the last one is released.
+
+    :param cache_path: str - Path to the cache file
+    :return: tuple - (header values, scenekit.objreader.ObjData)
+    """
+
+    with open(cache_path, 'rb') as file_:
+        buffer_ = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header = HEADER.unpack_from(buffer_, 0)
+    magic, version, size, mtime, digest, to_z_up, path_length, materials_length, groups_num = header[:9]
+    positions_num, uvs_num, normals_num = header[9:]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not an OBJ cache file (or unsupported version): ' + cache_path)
+
+    offset = HEADER.size
+    path = buffer_[offset:offset + path_length].decode('utf-8')
+    offset += _padded(path_length)
+    materials = json.loads(buffer_[offset:offset + materials_length].decode('utf-8'))
+    offset += _padded(materials_length)
+
+    obj_data = objreader.ObjData()
+    obj_data.materials = dict((name, dict((key, tuple(value) if isinstance(value, list) else value)
+                                          for key, value in material.items()))
+                              for name, material in materials.items())
+    obj_data.positions = meshpack._view(buffer_, offset, 'f', positions_num)
+    offset += 4 * positions_num
+    obj_data.uvs = meshpack._view(buffer_, offset, 'f', uvs_num)
+    offset += 4 * uvs_num
+    obj_data.normals = meshpack._view(buffer_, offset, 'f', normals_num)
+    offset += 4 * normals_num
+
+    for _ in range(groups_num):
+        name_length, material_length, face_count, index_count = GROUP_HEADER.unpack_from(buffer_, offset)
+        offset += GROUP_HEADER.size
+        name = buffer_[offset:offset + name_length].decode('utf-8')
+        offset += _padded(name_length)
+        material = None
+        if material_length != NO_MATERIAL:
+            material = buffer_[offset:offset + material_length].decode('utf-8')
+            offset += _padded(material_length)
+
+        group = objreader.ObjGroup(name, material)
+        group.face_counts = meshpack._view(buffer_, offset, 'i', face_count)
+        offset += 4 * face_count
+        group.smoothing_groups = meshpack._view(buffer_, offset, 'i', face_count)
+        offset += 4 * face_count
+        group.position_indices = meshpack._view(buffer_, offset, 'i', index_count)
+        offset += 4 * index_count
+        group.uv_indices = meshpack._view(buffer_, offset, 'i', index_count)
+        offset += 4 * index_count
+        group.normal_indices = meshpack._view(buffer_, offset, 'i', index_count)
+        offset += 4 * index_count
+        obj_data.groups.append(group)
+
+    return (path, size, mtime, digest, bool(to_z_up)), obj_data
+
+
+def is_cache_current(path, to_z_up=True):
+    """
+    Function checks if the cache file of the OBJ file exists and has the same path, size and modification time.
+    Only the header of the cache file is read, the content of the OBJ file is not hashed.
+
+    :param path: str - Path to the *.obj file
+    :param to_z_up: bool - Convert the data to Z axis pointing up (see scenekit.objreader.read_obj())
+    :rtype : bool
+    """
+
+    try:
+        with open(path + CACHE_EXTENSION, 'rb') as file_:
+            header = HEADER.unpack(file_.read(HEADER.size))
+            cached_path = file_.read(header[6]).decode('utf-8')
+    except (struct.error, EnvironmentError, UnicodeDecodeError):
+        return False
+
+    magic, version, size, mtime, digest, cached_z_up = header[:6]
+    return (magic, version, bool(cached_z_up)) == (MAGIC, VERSION, bool(to_z_up)) and \
+        (cached_path, size, mtime) == ((os.path.abspath(path),) + _file_stamp(path))
+
+
+def load_obj(path, to_z_up=True):
+    """
+    Function returns the content of the OBJ file. The cache file is used if it is valid, otherwise the OBJ file
+    is parsed with scenekit.objreader.read_obj() and a new cache file is saved.
+    If the cache can not be saved (e.g. the directory is read only), the parsed data is returned anyway.
+
+    :param path: str - Path to the *.obj file
+    :param to_z_up: bool - Convert the data to Z axis pointing up (see scenekit.objreader.read_obj())
+    :rtype : scenekit.objreader.ObjData
+    """
+
+    cache_path = path + CACHE_EXTENSION
+    stamp = _file_stamp(path)
+    digest = None
+
+    if os.path.isfile(cache_path):
+        try:
+            (cached_path, size, mtime, cached_digest, cached_z_up), obj_data = read_cache(cache_path)
+        except (ValueError, struct.error, EnvironmentError):  # Damaged or old cache file, it will be replaced
+            pass
+        else:
+            if cached_z_up == bool(to_z_up):
+                if (cached_path, size, mtime) == (os.path.abspath(path), stamp[0], stamp[1]):
+                    return obj_data
+                if size == stamp[0]:  # The file was copied or touched, the content may be the same
+                    digest = _file_hash(path)
+                    if digest == cached_digest:  # Save the new path and time, so the hash is not calculated again
+                        temp_path = cache_path + '.tmp'
+                        try:
+                            _write_file(temp_path, path, obj_data, to_z_up, stamp, digest)
+                            del obj_data  # Unmaps the old cache file, Windows can not replace a mapped file
+                            _replace(temp_path, cache_path)
+                        except EnvironmentError:
+                            if os.path.exists(temp_path):
+                                os.remove(temp_path)
+                        return read_cache(cache_path)[1]
+            del obj_data  # The old cache file is unmapped before it is replaced below
+
+    obj_data = objreader.read_obj(path, to_z_up)
+    try:
+        write_cache(cache_path, path, obj_data, to_z_up, stamp, digest)
+    except EnvironmentError:
+        pass
+    return obj_data
@@ -0,0 +1,114 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Parallel parsing of OBJ files in a pool of processes.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Every worker parses one OBJ file and saves it to its cache file (see scenekit.objcache). The parsed arrays are not
+# sent back through a pipe: the main process maps the cache files into memory, so the data is shared by the operating
+# system (page cache) without copying. The main thread of the application only creates the meshes.
+#
+# Workers are separate Python processes. The executable of the application (maya.exe, blender, 3dsmax.exe) can not
+# be used to start them, so a path to a Python interpreter has to be given, e.g.:
+#   Blender: bpy.app.binary_path_python
+#   Maya:    mayapy (in the directory of maya executable)
+# Without an interpreter, and in Python 2 (no concurrent.futures), files are parsed one by one in the main process.
+# Workers are always spawned (never forked from the application) and the interpreter of multiprocessing, which is
+# global for the whole application, is restored when the pool is closed (see spawn_context()).
+#
+
+import contextlib
+import multiprocessing
+import os
+import sys
+
+try:
+    import concurrent.futures as futures
+except ImportError:  # Python 2
+    futures = None
+
+from scenekit import objcache
+
+
+def _parse_to_cache(path, to_z_up):
+    """
+    Function run by the worker processes: parses the OBJ file and saves the cache file.
+
+    :param path: str - Path to the *.obj file
+    :param to_z_up: bool - Convert the data to Z axis pointing up
+    :return: str - Path to the *.obj file
+    """
+
+    objcache.load_obj(path, to_z_up)
+    return path
+
+
+def is_python(executable):
+    """
+    Function checks if the executable is a Python interpreter (and not an application with embedded Python).
+
+    :param executable: str - Path to the executable
+    :rtype : bool
+    """
+
+    name = os.path.basename(executable or '').lower()
+    return name.startswith('python') or name.startswith('mayapy')
+
+
+@contextlib.contextmanager
+def spawn_context(python_executable):
+    """
+    Context manager that returns a 'spawn' multiprocessing context which starts the processes with the interpreter.
+    The interpreter of multiprocessing is global (a context does not have its own), so the previous one
+    is restored at the end, and the application and other scripts still use their own.
+
+    :param python_executable: str - Python interpreter used to start the processes
+    :return: multiprocessing context, e.g. for mp_context of concurrent.futures.ProcessPoolExecutor
+    """
+
+    from multiprocessing import spawn  # Python 3 only, like concurrent.futures
+    previous = spawn.get_executable()
+    multiprocessing.set_executable(python_executable)
+    try:
+        yield multiprocessing.get_context('spawn')
+    finally:
+        multiprocessing.set_executable(previous)
+
+
+def prepare_caches(paths, to_z_up=True, python_executable=None, max_workers=None):
+    """
+    Function makes sure that all of the OBJ files have current cache files. Files without one are parsed in parallel,
+    then every file can be loaded with scenekit.objcache.load_obj() without parsing.
+
+    :param paths: Python list - Paths to the *.obj files
+    :param to_z_up: bool - Convert the data to Z axis pointing up (see scenekit.objreader.read_obj())
+    :param python_executable: str - Python interpreter used to start the workers. sys.executable by default,
+    if it is a Python interpreter.
+    :param max_workers: int - Maximum number of processes. The number of CPUs by default.
+    :return: Python list - Paths of the files that were parsed
+    """
+
+    stale = [path for path in paths if not objcache.is_cache_current(path, to_z_up)]
+    if not stale:
+        return []
+
+    python_executable = python_executable or (sys.executable if is_python(sys.executable) else None)
+    if futures is None or python_executable is None or len(stale) == 1:
+        for path in stale:  # Parse in the main process, there is nothing to gain from a single worker
+            _parse_to_cache(path, to_z_up)
+        return stale
+
+    max_workers = min(max_workers or multiprocessing.cpu_count(), len(stale))
+    with spawn_context(python_executable) as context:
+        with futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            for future in [executor.submit(_parse_to_cache, path, to_z_up) for path in stale]:
+                future.result()  # Errors of the workers are raised here
+    return stale
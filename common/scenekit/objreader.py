@@ -0,0 +1,253 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Streaming reader of Wavefront OBJ and MTL files.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The file is read line by line and the values are appended to typed arrays (4 bytes per number), so no Python object
+# is kept for a vertex or a face and big files (scans of hundreds of MB) can be read without loading them to memory.
+# Faces are split into groups by the "o", "g" and "usemtl" statements. Every group can be returned as
+# a scenekit.meshpack.PackedMesh, so it can be passed to the same functions that create meshes from *.pmesh files.
+# Smoothing groups ("s") are kept for every face, the scripts mark the edges on their borders as hard
+# (see scenekit.meshedges.group_smooth()).
+#
+
+import array
+import os
+
+from scenekit import meshpack
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+
+class ObjGroup(object):
+    """
+    Faces of one group (object) of the OBJ file. Indices point to the arrays of the whole file (ObjData).
+    """
+
+    def __init__(self, name, material):
+        """
+        :param name: str - Name of the group ("g") or of the object ("o")
+        :param material: str - Name of the material ("usemtl") or None
+        """
+
+        self.name = name
+        self.material = material
+        self.face_counts = array.array('i')  # Number of vertices of every face
+        self.smoothing_groups = array.array('i')  # Smoothing group of every face, 0 - "s off"
+        self.position_indices = array.array('i')  # Vertex numbers of all faces, one after another
+        self.uv_indices = array.array('i')  # Texture coordinate numbers of all faces, -1 if not given
+        self.normal_indices = array.array('i')  # Normal numbers of all faces, -1 if not given
+
+
+class ObjData(object):
+    """
+    Content of the OBJ file: flat arrays of positions, texture coordinates and normals, and the groups of faces.
+    """
+
+    def __init__(self):
+        self.positions = array.array('f')  # x, y, z of every vertex
+        self.uvs = array.array('f')  # u, v of every texture coordinate
+        self.normals = array.array('f')  # x, y, z of every normal
+        self.groups = []  # ObjGroup objects in the order of the file
+        self.materials = {}  # Materials read from the MTL files: {name: {statement: value}}
+
+    def get_group(self, name):
+        """
+        Function returns the first group with the given name.
+
+        :param name: str - Name of the group
+        :rtype : ObjGroup
+        """
+
+        for group in self.groups:
+            if group.name == name:
+                return group
+        raise KeyError(name)
+
+    def group_mesh(self, group):
+        """
+        Function returns the mesh of the group. Only vertices used by the group are copied and the faces are renumbered.
+
+        :param group: ObjGroup or str - The group or its name
+        :rtype : scenekit.meshpack.PackedMesh
+        """
+
+        if not isinstance(group, ObjGroup):
+            group = self.get_group(group)
+
+        if numpy is not None:
+            used, face_indices = numpy.unique(numpy.frombuffer(group.position_indices, dtype=numpy.int32),
+                                              return_inverse=True)
+            positions = numpy.frombuffer(self.positions, dtype=numpy.float32).reshape(-1, 3)[used].ravel()
+            return meshpack.PackedMesh(positions, numpy.frombuffer(group.face_counts, dtype=numpy.int32),
+                                       face_indices.astype(numpy.int32))
+
+        new_numbers = {}  # {vertex number in the file: vertex number in the group}
+        positions = array.array('f')
+        face_indices = array.array('i')
+        for index in group.position_indices:
+            new_index = new_numbers.get(index)
+            if new_index is None:
+                new_index = new_numbers[index] = len(new_numbers)
+                positions.extend(self.positions[3 * index:3 * index + 3])
+            face_indices.append(new_index)
+        return meshpack.PackedMesh(positions, group.face_counts, face_indices)
+
+    def group_smoothing(self, group):
+        """
+        Function returns the smoothing group of every face of the group, or None if no face is smoothed.
+
+        :param group: ObjGroup or str - The group or its name
+        :return: array of ints - Smoothing group of every face (0 - no group), or None
+        """
+
+        if not isinstance(group, ObjGroup):
+            group = self.get_group(group)
+        if not len(group.smoothing_groups) or not max(group.smoothing_groups):
+            return None
+        return group.smoothing_groups
+
+    def group_uvs(self, group):
+        """
+        Function returns the texture coordinates of every corner of every face of the group (the same order as the
+        face indices), or None if some corners have no texture coordinates.
+
+        :param group: ObjGroup or str - The group or its name
+        :return: array of floats - u, v of every corner, or None
+        """
+
+        if not isinstance(group, ObjGroup):
+            group = self.get_group(group)
+        if not len(group.uv_indices) or min(group.uv_indices) < 0:
+            return None
+
+        if numpy is not None:
+            uvs = numpy.frombuffer(self.uvs, dtype=numpy.float32).reshape(-1, 2)
+            return uvs[numpy.frombuffer(group.uv_indices, dtype=numpy.int32)].ravel()
+
+        corner_uvs = array.array('f')
+        for index in group.uv_indices:
+            corner_uvs.extend(self.uvs[2 * index:2 * index + 2])
+        return corner_uvs
+
+
+def _to_index(token, count):
+    """
+    Function converts the index from the OBJ file (numbered from 1, or negative - relative to the end)
+    to the index numbered from 0.
+
+    :param token: bytes - Index from the file, may be empty
+    :param count: int - Number of elements read so far
+    :return: int - Index or -1 if the token is empty
+    """
+
+    if not token:
+        return -1
+    index = int(token)
+    return index - 1 if index > 0 else count + index
+
+
+def read_mtl(path):
+    """
+    Function reads the materials from the MTL file. Numeric values are saved as tuples of floats, other as strings.
+
+    :param path: str - Path to the *.mtl file
+    :return: dict - {material name: {statement: value}}, e.g. {'wire_1': {'Kd': (0.5, 0.5, 0.5), 'illum': (2.0,)}}
+    """
+
+    materials = {}
+    material = None
+    with open(path, 'rb') as file_:
+        for line in file_:
+            parts = line.split()
+            if not parts or parts[0].startswith(b'#'):
+                continue
+            statement = parts[0].decode('utf-8')
+            if statement == 'newmtl':
+                material = materials[b' '.join(parts[1:]).decode('utf-8')] = {}
+            elif material is not None:
+                try:
+                    material[statement] = tuple(float(value) for value in parts[1:])
+                except ValueError:  # Names of textures and other not numeric values
+                    material[statement] = b' '.join(parts[1:]).decode('utf-8')
+    return materials
+
+
+def read_obj(path, to_z_up=True):
+    """
+    Function reads the OBJ file (and its MTL files) line by line.
+
+    :param path: str - Path to the *.obj file
+    :param to_z_up: bool - OBJ files use the Y axis pointing up. With True positions and normals are converted to the
+    coordinate system with Z axis pointing up, the same as the one of *.pmesh files: (x, y, z) -> (x, -z, y)
+    :rtype : ObjData
+    """
+
+    data = ObjData()
+    positions, uvs, normals = data.positions, data.uvs, data.normals
+    groups = {}  # {(name, material): ObjGroup}, faces of the same group can be split in the file
+    object_name = group_name = material = None
+    smoothing = 0  # Faces are not smoothed until the first "s" statement
+    group = None
+
+    with open(path, 'rb') as file_:
+        for line in file_:
+            parts = line.split()
+            if not parts:
+                continue
+            statement = parts[0]
+
+            if statement == b'v':
+                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
+                positions.extend((x, -z, y) if to_z_up else (x, y, z))
+            elif statement == b'vt':
+                uvs.extend((float(parts[1]), float(parts[2]) if len(parts) > 2 else 0.0))
+            elif statement == b'vn':
+                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
+                normals.extend((x, -z, y) if to_z_up else (x, y, z))
+            elif statement == b'f':
+                if group is None:
+                    name = group_name or object_name or os.path.splitext(os.path.basename(path))[0]
+                    group = groups.get((name, material))
+                    if group is None:
+                        group = groups[name, material] = ObjGroup(name, material)
+                        data.groups.append(group)
+                vertex_count, uv_count, normal_count = len(positions) // 3, len(uvs) // 2, len(normals) // 3
+                for corner in parts[1:]:
+                    indices = corner.split(b'/')
+                    group.position_indices.append(_to_index(indices[0], vertex_count))
+                    group.uv_indices.append(_to_index(indices[1], uv_count) if len(indices) > 1 else -1)
+                    group.normal_indices.append(_to_index(indices[2], normal_count) if len(indices) > 2 else -1)
+                group.face_counts.append(len(parts) - 1)
+                group.smoothing_groups.append(smoothing)
+            elif statement == b'o':
+                object_name = b' '.join(parts[1:]).decode('utf-8')
+                group_name = None
+                group = None  # The group will be found or created by the next face
+            elif statement == b'g':
+                group_name = b' '.join(parts[1:]).decode('utf-8') or None
+                group = None
+            elif statement == b'usemtl':
+                material = b' '.join(parts[1:]).decode('utf-8')
+                group = None
+            elif statement == b's':
+                smoothing = 0 if len(parts) < 2 or parts[1] == b'off' else int(parts[1])
+            elif statement == b'mtllib':
+                for library in parts[1:]:
+                    library_path = os.path.join(os.path.dirname(path), library.decode('utf-8'))
+                    if os.path.isfile(library_path):
+                        data.materials.update(read_mtl(library_path))
+
+    return data
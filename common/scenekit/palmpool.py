@@ -0,0 +1,209 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Computation of the layout of many palms (see scenekit.palms) in a pool of processes.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Palms are split into parts and every worker computes palms.layout() of one part. Results are not sent back through
+# a pipe: the main process creates one block of shared memory (multiprocessing.shared_memory) for the arrays of all
+# palms and every worker writes its rows directly to it. The main thread of the application only copies the arrays
+# out of the block and creates the nodes. Every palm has its own stream of random numbers, so the result is the same
+# as the one of palms.layout() called in the main process, e.g.:
+#
+#   palm_layout = palmpool.layout(PALMS, up_axis='y', seed=rng.SEED, python_executable=mayapy)
+#
+# Workers are started like in scenekit.objpool, with a Python interpreter given by the script. Without one,
+# without NumPy, in Python older than 3.8 (no shared_memory) or when there are too few palms to pay for starting
+# the processes, palms.layout() is called in the main process. A worker gets at least MIN_PALMS_PER_WORKER palms.
+# The scripts create a few palms and call palms.layout() directly; the pool is meant for tools computing thousands
+# of unique palms (scenekit.scatter instances a few templates instead).
+#
+# Scaling can be measured outside of the applications (common directory in the current directory):
+#   python -m scenekit.palmpool 20000
+#
+
+import multiprocessing
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+try:
+    import concurrent.futures as futures
+except ImportError:  # Python 2
+    futures = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python older than 3.8
+    shared_memory = None
+
+from scenekit import objpool
+from scenekit import palms
+from scenekit import rng
+
+MIN_PALMS_PER_WORKER = 5000  # Smaller parts are computed faster in the main process than a worker is started
+PARTS_PER_WORKER = 2  # Parts are smaller than pool / workers, so a slower worker does not delay the others
+
+_FIELDS = ['segment_matrices', 'segment_key_times', 'segment_parents', 'leaf_matrices', 'leaf_key_times',
+           'leaf_parents']
+
+
+def layout(palm_parameters, up_axis='z', leaf_height=1.0, seed=None, python_executable=None, max_workers=None):
+    """
+    Function computes palms.layout() of the palms in a pool of processes. Arguments and the result are the same
+    as the ones of palms.layout().
+
+    :param palm_parameters: Python list - PalmParameters of every palm
+    :param up_axis: str - 'z' (3Ds Max, Blender) or 'y' (Maya)
+    :param leaf_height: float - Height of leafs above the last segment, in diameters of the trunk
+    :param seed: int - Seed of random rotations of leafs, None - different leafs every time
+    :param python_executable: str - Python interpreter used to start the workers. sys.executable by default,
+    if it is a Python interpreter.
+    :param max_workers: int - Maximum number of processes. The number of CPUs by default, 1 - no workers.
+    :rtype : palms.PalmLayout
+    """
+
+    palm_parameters = [palms.PalmParameters(*palm) for palm in palm_parameters]
+    seed = rng.new_seed() if seed is None else seed  # All of the parts have to use the same seed
+    python_executable = python_executable or (sys.executable if objpool.is_python(sys.executable) else None)
+    max_workers = min(max_workers or multiprocessing.cpu_count(), len(palm_parameters) // MIN_PALMS_PER_WORKER)
+    if numpy is None or futures is None or shared_memory is None or python_executable is None or max_workers < 2:
+        return palms.layout(palm_parameters, up_axis, leaf_height, seed)
+
+    segment_starts = [0] + numpy.cumsum([palm.segs_num for palm in palm_parameters]).tolist()
+    leaf_starts = [0] + numpy.cumsum([palm.leafs_num for palm in palm_parameters]).tolist()
+    for palm in palm_parameters:  # Errors of the parameters are raised before the workers are started
+        if palm.segs_num < 1 or palm.leafs_num < 0 or palm.anim_end <= palm.anim_start:
+            raise ValueError('Wrong parameters of a palm: %r' % (palm,))
+
+    part_size = -(-len(palm_parameters) // (max_workers * PARTS_PER_WORKER))
+    memory = shared_memory.SharedMemory(create=True, size=_size(segment_starts[-1], leaf_starts[-1]))
+    try:
+        with objpool.spawn_context(python_executable) as context:
+            with futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                jobs = [executor.submit(_layout_part, memory.name, segment_starts[-1], leaf_starts[-1],
+                                        segment_starts[first], leaf_starts[first],
+                                        palm_parameters[first:first + part_size], first, up_axis, leaf_height, seed)
+                        for first in range(0, len(palm_parameters), part_size)]
+                for job in jobs:
+                    job.result()  # Errors of the workers are raised here
+        arrays = _arrays(memory.buf, segment_starts[-1], leaf_starts[-1])
+        copies = {}  # The block is released below
+        for field in _FIELDS:  # A loop, not a generator: Python 2 can not delete a name used in a nested scope
+            copies[field] = numpy.array(arrays[field])
+        del arrays  # Views of the block have to be released before it is closed
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return palms.PalmLayout(palm_parameters, segment_starts, copies['segment_parents'], copies['segment_matrices'],
+                            copies['segment_key_times'], leaf_starts, copies['leaf_parents'], copies['leaf_matrices'],
+                            copies['leaf_key_times'])
+
+
+def _shapes(segments, leafs):
+    """
+    Function returns the shapes and types of the arrays of the layout, in the order of _FIELDS.
+    """
+
+    return [((segments, 16), numpy.float64), ((segments, len(palms.SEGMENT_SCALES)), numpy.float64),
+            ((segments,), numpy.int64), ((leafs, 16), numpy.float64), ((leafs, len(palms.LEAF_SCALES)), numpy.float64),
+            ((leafs,), numpy.int64)]
+
+
+def _size(segments, leafs):
+    """
+    Function returns the size of the block of shared memory for the layout, in bytes (at least 1 byte).
+    """
+
+    size = sum(int(numpy.prod(shape)) * numpy.dtype(dtype).itemsize for shape, dtype in _shapes(segments, leafs))
+    return max(size, 1)  # A block of shared memory can not be empty
+
+
+def _arrays(buffer_, segments, leafs):
+    """
+    Function returns NumPy arrays of the layout placed one after another in the buffer (no data is copied).
+
+    :return: dict - {name of the field of palms.PalmLayout: numpy.ndarray}
+    """
+
+    arrays, offset = {}, 0
+    for field, (shape, dtype) in zip(_FIELDS, _shapes(segments, leafs)):
+        arrays[field] = numpy.ndarray(shape, dtype=dtype, buffer=buffer_, offset=offset)
+        offset += arrays[field].nbytes
+    return arrays
+
+
+def _layout_part(memory_name, segments, leafs, first_segment, first_leaf, palm_parameters, first_palm, up_axis,
+                 leaf_height, seed):
+    """
+    Function run by the worker processes: computes the layout of a part of the palms and writes it to its rows
+    of the block of shared memory. Parents are changed to the numbers of rows of all palms.
+
+    :param memory_name: str - Name of the block of shared memory
+    :param segments: int - Number of segments of all palms
+    :param leafs: int - Number of leafs of all palms
+    :param first_segment: int - Row of the first segment of the part
+    :param first_leaf: int - Row of the first leaf of the part
+    :param palm_parameters: Python list - PalmParameters of the palms of the part
+    :param first_palm: int - Number of the first palm of the part, its stream of random numbers
+    """
+
+    part = palms.layout(palm_parameters, up_axis, leaf_height, seed, first_stream=first_palm)
+    part_segments, part_leafs = part.segment_starts[-1], part.leaf_starts[-1]
+    values = {'segment_matrices': part.segment_matrices, 'segment_key_times': part.segment_key_times,
+              'segment_parents': numpy.where(part.segment_parents < 0, -1, part.segment_parents + first_segment),
+              'leaf_matrices': part.leaf_matrices, 'leaf_key_times': part.leaf_key_times,
+              'leaf_parents': part.leaf_parents + first_segment}
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        arrays = _arrays(memory.buf, segments, leafs)
+        for field in _FIELDS:
+            first, count = (first_segment, part_segments) if field.startswith('segment') else (first_leaf, part_leafs)
+            arrays[field][first:first + count] = values[field]
+        del arrays  # Views of the block have to be released before it is closed
+    finally:
+        memory.close()
+
+
+def benchmark(count, worker_counts=None, python_executable=None):
+    """
+    Function measures the time of layout() of count palms for different numbers of workers.
+
+    :param count: int - Number of palms
+    :param worker_counts: Python list - Numbers of workers, 1, 2, 4... up to the number of CPUs by default
+    :param python_executable: str - Python interpreter used to start the workers
+    :return: Python list - (workers, time in seconds, speedup against 1 worker) for every number of workers
+    """
+
+    worker_counts = worker_counts or sorted(set([1] + [2 ** power for power in range(1, 8)
+                                                       if 2 ** power <= multiprocessing.cpu_count()] +
+                                                [multiprocessing.cpu_count()]))
+    palm_parameters = [palms.PalmParameters(diameter=1.2, segs_num=18 + palm % 7, leafs_num=9, bending=20 + palm % 20,
+                                            anim_start=11 + palm % 30, anim_end=26 + palm % 30)
+                       for palm in range(count)]
+    results = []
+    for workers in worker_counts:
+        start = time.time()
+        layout(palm_parameters, seed=rng.SEED, python_executable=python_executable, max_workers=workers)
+        seconds = time.time() - start
+        results.append((workers, seconds, results[0][1] / seconds if results else 1.0))
+    return results
+
+
+if __name__ == '__main__':
+    for workers_, seconds, speedup in benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000):
+        print('%3d workers: %8.3f s, speedup %5.2fx' % (workers_, seconds, speedup))
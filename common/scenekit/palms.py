@@ -0,0 +1,320 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Procedural palm trees: transforms and animation keys of the segments and leafs of many palms, computed at once.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# create_palm() of every script only creates the nodes and applies the numbers computed here, e.g.:
+#
+#   palm_layout = palms.layout(PALMS, up_axis='y')
+#   for palm in range(len(PALMS)):
+#       create_palm(palm_layout, palm, id_num=palm + 1, leaf_mesh=leaf)
+#
+# Every palm is a trunk of segments and a crown of leafs:
+#   - segment 0 is the root of the palm, all other segments are its children,
+#   - leafs are children of the last segment and are distributed around the trunk,
+#   - segments grow one after another (scale keys SEGMENT_SCALES), then all the leafs grow (LEAF_SCALES).
+# Matrices include the scale of the rows (the taper of the trunk, LEAF_SCALE). Scale keys replace the scale
+# of the transform in Maya and Blender, so their values have to be multiplied by matrix_scale() of the row.
+# Rows of all palms are stored one after another: rows of palm p are segment_starts[p]:segment_starts[p + 1]
+# (leaf_starts for leafs), parents are numbers of rows of segments (-1 for roots). Rows are NumPy arrays (Python lists
+# without NumPy), converting thousands of palms to lists would take longer than computing them.
+#
+# Matrices are local (relative to the parent), 16 floats in rows, with the translation in the last row, like
+# the matrices of Maya (xform) and 3Ds Max (Matrix3). Blender multiplies column vectors, so it needs them transposed.
+# Palms are created along the Z axis and bent around the Y axis, up_axis='y' rotates them for Maya.
+#
+# The bend is baked into the transforms of the segments: the axis of the trunk is an arc of a circle (bend()), every
+# segment starts on the arc and is rotated along it, leafs follow the last segment. No bend deformer or modifier is
+# created, so there is nothing to evaluate or to bake into the meshes afterwards.
+#
+
+import collections
+import math
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+from scenekit import rng
+
+PalmParameters = collections.namedtuple('PalmParameters', ['diameter', 'segs_num', 'leafs_num', 'bending',
+                                                           'anim_start', 'anim_end'])
+PalmLayout = collections.namedtuple('PalmLayout', ['palms', 'segment_starts', 'segment_parents', 'segment_matrices',
+                                                   'segment_key_times', 'leaf_starts', 'leaf_parents', 'leaf_matrices',
+                                                   'leaf_key_times'])
+
+SEGMENT_SCALES = [0.001, 1.2, 1]  # Values of scale keys of every segment
+LEAF_SCALES = [0.001, 1]  # Values of scale keys of every leaf
+LEAF_SCALE = 0.9
+LEAF_TILT_X = (-math.pi / 15, math.pi / 15)  # Random rotation of leafs, in radians
+LEAF_TILT_Y = (-math.pi / 8, math.pi / 10)
+LEAF_DOMAIN = 'palms.leafs'  # Domain of the random numbers of leafs (see scenekit.rng), streams are palms
+
+# Changes the coordinates of a Z-up palm to Y-up ones: x -> x, y -> -z, z -> y
+_Y_UP = [[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+
+
+def layout(palms, up_axis='z', leaf_height=1.0, seed=None, first_stream=0):
+    """
+    Function computes the transforms and animation keys of the segments and leafs of the palms.
+
+    :param palms: Python list - PalmParameters of every palm: diameter of the trunk, number of segments and leafs,
+    bending of the trunk (in degrees, from the root to the top), frames of the start and the end of the animation
+    :param up_axis: str - 'z' (3Ds Max, Blender) or 'y' (Maya)
+    :param leaf_height: float - Height of leafs above the last segment, in diameters of the trunk
+    :param seed: int - Seed of random rotations of leafs (see scenekit.rng), None - different leafs every time.
+    Every palm has its own stream of random numbers, so the leafs of a palm do not depend on the other palms.
+    :param first_stream: int - Stream of random numbers of the first palm, next palms use next streams. Used when
+    the palms are split into parts (see scenekit.palmpool): every part starts with the number of its first palm.
+    :rtype : PalmLayout
+    """
+
+    palms = [PalmParameters(*palm) for palm in palms]
+    for palm in palms:
+        if palm.segs_num < 1 or palm.leafs_num < 0 or palm.anim_end <= palm.anim_start:
+            raise ValueError('Wrong parameters of a palm: %r' % (palm,))
+    if up_axis not in ('y', 'z'):
+        raise ValueError('Unknown up axis: %r' % up_axis)
+
+    seed = rng.new_seed() if seed is None else seed  # The same seed for all of the random numbers
+    if numpy is not None:
+        return _layout_numpy(palms, up_axis, leaf_height, seed, first_stream)
+    return _layout_python(palms, up_axis, leaf_height, seed, first_stream)
+
+
+def palm_rows(palm_layout, palm):
+    """
+    Function returns the numbers of rows of segments and leafs of the palm.
+
+    :param palm_layout: PalmLayout - Result of layout()
+    :param palm: int - Number of the palm
+    :return: tuple - (range of segments, range of leafs)
+    """
+
+    return (range(palm_layout.segment_starts[palm], palm_layout.segment_starts[palm + 1]),
+            range(palm_layout.leaf_starts[palm], palm_layout.leaf_starts[palm + 1]))
+
+
+def matrix_scale(matrix):
+    """
+    Function returns the scale of the matrix of a row along its x, y and z axes: the values of the scale channels
+    of the transform set from the matrix.
+
+    :param matrix: sequence of floats - 16 floats in rows, e.g. a row of PalmLayout.segment_matrices
+    :return: tuple - (x, y, z) scale
+    """
+
+    return tuple(math.sqrt(sum(float(matrix[4 * axis + column]) ** 2 for column in range(3))) for axis in range(3))
+
+
+def bend(height, length, angle):
+    """
+    Function returns the point of the bent trunk: the axis of the trunk is an arc of a circle, bent around the Y axis
+    towards +X, which turns by the angle from the root to the top. The point keeps its distance from the root along
+    the axis, so segments are not stretched.
+
+    :param height: float - Distance of the point from the root, along the straight trunk
+    :param length: float - Length of the trunk
+    :param angle: float - Bending of the whole trunk, in radians
+    :return: tuple - (x, z, rotation) - Position of the point and rotation of the trunk around the Y axis (radians)
+    """
+
+    rotation = angle * height / length
+    if abs(rotation) < 1e-9:  # Straight trunk
+        return 0.0, float(height), rotation
+    radius = height / rotation
+    return radius * (1.0 - math.cos(rotation)), radius * math.sin(rotation), rotation
+
+
+def _bend_numpy(heights, lengths, angles):
+    """
+    NumPy version of bend(): arrays of heights, lengths and angles, returns arrays of x, z and rotations.
+    """
+
+    rotations = angles * heights / lengths
+    straight = numpy.abs(rotations) < 1e-9
+    radii = heights / numpy.where(straight, 1.0, rotations)
+    x = numpy.where(straight, 0.0, radii * (1.0 - numpy.cos(rotations)))
+    z = numpy.where(straight, heights, radii * numpy.sin(rotations))
+    return x, z, rotations
+
+
+def _layout_numpy(palms, up_axis, leaf_height, seed, first_stream):
+    """
+    NumPy version of layout(): rows of all palms are computed with array operations.
+    """
+
+    diameter, segs_num, leafs_num, bending, anim_start, anim_end = [numpy.array(column, dtype=numpy.float64)
+                                                                    for column in zip(*palms)]
+    interval = (anim_end - anim_start) / (segs_num + 1.0)  # Interval of scale keys of the segments
+
+    segment_starts = numpy.append(0, numpy.cumsum(segs_num.astype(numpy.int64)))
+    segment_palm = numpy.repeat(numpy.arange(len(palms)), segs_num.astype(numpy.int64))
+    number = numpy.arange(segment_starts[-1]) - segment_starts[segment_palm]  # Number of the segment in its palm
+    roots = segment_starts[segment_palm]
+    segment_parents = numpy.where(number == 0, -1, roots)
+
+    segment_diameter = diameter[segment_palm]
+    translations = numpy.zeros((len(number), 3))  # Segments are children of the root, so they are placed on the arc
+    translations[:, 0], translations[:, 2], angles = _bend_numpy(segment_diameter * number,
+                                                                 segment_diameter * segs_num[segment_palm],
+                                                                 numpy.radians(bending[segment_palm]))
+    taper = 1.0 - number / (segs_num[segment_palm] * 4.0)  # The segments at the top are thinner
+    segment_matrices = _compose_numpy([_scale_numpy(numpy.stack([taper, taper, numpy.ones(len(number))], axis=1)),
+                                       _rotation_numpy(1, angles), _translation_numpy(translations)])
+    segment_times = anim_start[segment_palm] + interval[segment_palm] * number
+    segment_key_times = segment_times[:, None] + interval[segment_palm][:, None] * numpy.arange(len(SEGMENT_SCALES))
+
+    leaf_starts = numpy.append(0, numpy.cumsum(leafs_num.astype(numpy.int64)))
+    leaf_palm = numpy.repeat(numpy.arange(len(palms)), leafs_num.astype(numpy.int64))
+    leaf_number = numpy.arange(leaf_starts[-1]) - leaf_starts[leaf_palm]
+    leaf_parents = segment_starts[leaf_palm + 1] - 1  # The last segment of the palm
+
+    jump = 2 * math.pi / leafs_num[leaf_palm]  # Leafs are spread evenly around the trunk, +/- 1/3 of the interval
+    streams, draws = leaf_palm + first_stream, leaf_number * 3  # Three random numbers of every leaf in its palm stream
+    around = rng.uniform(seed, LEAF_DOMAIN, streams, draws, -math.pi + jump * (leaf_number - 1 / 3.0),
+                         -math.pi + jump * (leaf_number + 1 / 3.0))
+    tilt_x = rng.uniform(seed, LEAF_DOMAIN, streams, draws + 1, *LEAF_TILT_X)
+    tilt_y = rng.uniform(seed, LEAF_DOMAIN, streams, draws + 2, *LEAF_TILT_Y)
+    leaf_translations = numpy.zeros((len(leaf_number), 3))
+    leaf_translations[:, 2] = diameter[leaf_palm] * leaf_height
+    leaf_matrices = _compose_numpy([_scale_numpy(numpy.full((len(leaf_number), 3), LEAF_SCALE)),
+                                    _rotation_numpy(0, tilt_x), _rotation_numpy(1, tilt_y),
+                                    _rotation_numpy(2, around), _translation_numpy(leaf_translations)])
+    leaf_times = anim_start[leaf_palm] + interval[leaf_palm] * segs_num[leaf_palm]
+    leaf_key_times = leaf_times[:, None] + interval[leaf_palm][:, None] * numpy.arange(len(LEAF_SCALES))
+
+    if up_axis == 'y':
+        y_up = numpy.array(_Y_UP)
+        segment_matrices = numpy.matmul(numpy.matmul(y_up.T, segment_matrices), y_up)
+        leaf_matrices = numpy.matmul(numpy.matmul(y_up.T, leaf_matrices), y_up)
+
+    return PalmLayout(palms, segment_starts.tolist(), segment_parents, segment_matrices.reshape(-1, 16),
+                      segment_key_times, leaf_starts.tolist(), leaf_parents, leaf_matrices.reshape(-1, 16),
+                      leaf_key_times)
+
+
+def _identity_numpy(count):
+    return numpy.tile(numpy.eye(4), (count, 1, 1))
+
+
+def _scale_numpy(scales):
+    matrices = _identity_numpy(len(scales))
+    for axis in range(3):
+        matrices[:, axis, axis] = scales[:, axis]
+    return matrices
+
+
+def _translation_numpy(translations):
+    matrices = _identity_numpy(len(translations))
+    matrices[:, 3, :3] = translations
+    return matrices
+
+
+def _rotation_numpy(axis, angles):
+    """
+    Function returns the matrices of rotations around the axis (0, 1, 2 for x, y, z) by the angles (radians).
+    """
+
+    first, second = [(1, 2), (2, 0), (0, 1)][axis]
+    matrices = _identity_numpy(len(angles))
+    cos, sin = numpy.cos(angles), numpy.sin(angles)
+    matrices[:, first, first] = cos
+    matrices[:, first, second] = sin
+    matrices[:, second, first] = -sin
+    matrices[:, second, second] = cos
+    return matrices
+
+
+def _compose_numpy(matrices):
+    """
+    Function multiplies the lists of matrices: the first one is applied first.
+    """
+
+    result = matrices[0]
+    for matrix in matrices[1:]:
+        result = numpy.matmul(result, matrix)
+    return result
+
+
+def _layout_python(palms, up_axis, leaf_height, seed, first_stream):
+    """
+    Pure Python version of layout(), used when NumPy is not available.
+    """
+
+    segment_starts, segment_parents, segment_matrices, segment_key_times = [0], [], [], []
+    leaf_starts, leaf_parents, leaf_matrices, leaf_key_times = [0], [], [], []
+
+    for stream, palm in enumerate(palms, first_stream):
+        interval = (palm.anim_end - palm.anim_start) / (palm.segs_num + 1.0)
+        root = segment_starts[-1]
+        for number in range(palm.segs_num):
+            x, z, angle = bend(palm.diameter * number, palm.diameter * palm.segs_num, math.radians(palm.bending))
+            translation = [x, 0.0, z]
+            taper = 1.0 - number / (palm.segs_num * 4.0)
+            segment_matrices.append(_compose_python([_scale_python([taper, taper, 1.0]), _rotation_python(1, angle),
+                                                     _translation_python(translation)]))
+            segment_parents.append(-1 if number == 0 else root)
+            time = palm.anim_start + interval * number
+            segment_key_times.append([time + interval * key for key in range(len(SEGMENT_SCALES))])
+        segment_starts.append(root + palm.segs_num)
+
+        jump = 2 * math.pi / palm.leafs_num if palm.leafs_num else 0.0
+        time = palm.anim_start + interval * palm.segs_num
+        numbers = list(range(palm.leafs_num))
+        streams, draws = [stream] * palm.leafs_num, [number * 3 for number in numbers]
+        arounds = rng.uniform(seed, LEAF_DOMAIN, streams, draws,
+                              [-math.pi + jump * (number - 1 / 3.0) for number in numbers],
+                              [-math.pi + jump * (number + 1 / 3.0) for number in numbers])
+        tilts_x = rng.uniform(seed, LEAF_DOMAIN, streams, [draw + 1 for draw in draws], *LEAF_TILT_X)
+        tilts_y = rng.uniform(seed, LEAF_DOMAIN, streams, [draw + 2 for draw in draws], *LEAF_TILT_Y)
+        for around, tilt_x, tilt_y in zip(arounds, tilts_x, tilts_y):
+            leaf_matrices.append(_compose_python([_scale_python([LEAF_SCALE] * 3), _rotation_python(0, tilt_x),
+                                                  _rotation_python(1, tilt_y), _rotation_python(2, around),
+                                                  _translation_python([0.0, 0.0, palm.diameter * leaf_height])]))
+            leaf_parents.append(segment_starts[-1] - 1)
+            leaf_key_times.append([time + interval * key for key in range(len(LEAF_SCALES))])
+        leaf_starts.append(leaf_starts[-1] + palm.leafs_num)
+
+    if up_axis == 'y':
+        y_up_t = [list(column) for column in zip(*_Y_UP)]
+        segment_matrices = [_compose_python([y_up_t, matrix, _Y_UP]) for matrix in segment_matrices]
+        leaf_matrices = [_compose_python([y_up_t, matrix, _Y_UP]) for matrix in leaf_matrices]
+
+    return PalmLayout(palms, segment_starts, segment_parents, [sum(matrix, []) for matrix in segment_matrices],
+                      segment_key_times, leaf_starts, leaf_parents, [sum(matrix, []) for matrix in leaf_matrices],
+                      leaf_key_times)
+
+
+def _scale_python(scale):
+    return [[scale[0], 0.0, 0.0, 0.0], [0.0, scale[1], 0.0, 0.0], [0.0, 0.0, scale[2], 0.0], [0.0, 0.0, 0.0, 1.0]]
+
+
+def _translation_python(translation):
+    return [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], list(translation) + [1.0]]
+
+
+def _rotation_python(axis, angle):
+    first, second = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix = _scale_python([1.0, 1.0, 1.0])
+    matrix[first][first] = matrix[second][second] = math.cos(angle)
+    matrix[first][second] = math.sin(angle)
+    matrix[second][first] = -math.sin(angle)
+    return matrix
+
+
+def _compose_python(matrices):
+    result = matrices[0]
+    for matrix in matrices[1:]:
+        result = [[sum(row[i] * matrix[i][column] for i in range(4)) for column in range(4)] for row in result]
+    return result
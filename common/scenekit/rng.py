@@ -0,0 +1,124 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Reproducible random numbers shared by the scripts: the same seed gives the same scene in every application.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Random generators of NumPy and of the random module give different numbers for the same seed, and Maya and
+# 3Ds Max do not ship NumPy by default, so they can not be used if all of the scripts have to create the same scene.
+# This module uses a counter based generator instead: every number is a hash (SplitMix64) of the seed, the domain,
+# the number of a stream and the number of the draw in the stream. It gives the same numbers with NumPy (whole arrays
+# at once) and without it, and the numbers do not depend on the order in which they are drawn, e.g.:
+#
+#   # 3 numbers for every leaf, stream of every leaf is its palm, so other palms do not change its leafs
+#   tilts = rng.uniform(seed, 'palms.leafs', streams=leaf_palm, draws=leaf_number * 3 + 1, low=-0.2, high=0.2)
+#
+# Streams split the numbers of a seed: e.g. every palm uses its own stream, so adding a palm or leafs to a palm
+# does not change the other palms. Domains split the streams by their purpose: numbers are given by the pair
+# (domain, stream), so the stream of palm 0 and the stream of scattered instance 0 are not the same.
+#
+
+import random
+import zlib
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+SEED = 2017  # Seed used by the scripts, the same in all of the applications
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15  # Increment of SplitMix64
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+
+
+def new_seed():
+    """
+    Function returns a random seed, used when no seed was given. It is drawn once, so the rest of the numbers
+    is still computed from a single seed.
+
+    :rtype : int
+    """
+
+    return random.SystemRandom().getrandbits(63)
+
+
+def uniform(seed, domain, streams, draws, low=0.0, high=1.0):
+    """
+    Function returns random numbers from the range [low, high): one number for every pair (stream, draw).
+
+    :param seed: int - Seed of the numbers, None - a new random seed
+    :param domain: str - Purpose of the numbers (e.g. 'palms.leafs'), streams of different domains are different
+    :param streams: sequence of ints - Number of the stream of every number (e.g. number of the palm)
+    :param draws: sequence of ints - Number of every number in its stream
+    :param low: float or sequence of floats - Lower end of the range (of every number)
+    :param high: float or sequence of floats - Upper end of the range (of every number)
+    :return: Random numbers: NumPy array (Python list without NumPy)
+    """
+
+    seed = new_seed() if seed is None else seed
+    base = (seed * _GOLDEN + _domain_key(domain)) & _MASK  # Stream 0 of the domain
+    if numpy is not None:
+        return _uniform_numpy(base, streams, draws, low, high)
+    return _uniform_python(base, streams, draws, low, high)
+
+
+def _domain_key(domain):
+    """
+    Function returns the 64 bit key of the domain, the same in Python 2 and 3 (hash() of str is randomized).
+    """
+
+    return _mix_python(zlib.crc32(domain.encode('utf-8')) & 0xffffffff)
+
+
+def _mix_python(value):
+    """
+    Function returns the SplitMix64 hash of the 64 bit value.
+    """
+
+    value = ((value ^ (value >> 30)) * _MIX_1) & _MASK
+    value = ((value ^ (value >> 27)) * _MIX_2) & _MASK
+    return value ^ (value >> 31)
+
+
+def _uniform_python(base, streams, draws, low, high):
+    streams, draws = list(streams), list(draws)
+    low = low if isinstance(low, (list, tuple)) else [low] * len(streams)
+    high = high if isinstance(high, (list, tuple)) else [high] * len(streams)
+    numbers = []
+    for stream, draw, low_, high_ in zip(streams, draws, low, high):
+        state = _mix_python((base + stream) & _MASK)  # The first number of the stream
+        fraction = (_mix_python((state + (draw + 1) * _GOLDEN) & _MASK) >> 11) * 2.0 ** -53  # 53 bits of a float
+        numbers.append(low_ + (high_ - low_) * fraction)
+    return numbers
+
+
+def _mix_numpy(values):
+    values = (values ^ (values >> numpy.uint64(30))) * numpy.uint64(_MIX_1)
+    values = (values ^ (values >> numpy.uint64(27))) * numpy.uint64(_MIX_2)
+    return values ^ (values >> numpy.uint64(31))
+
+
+def _uniform_numpy(base, streams, draws, low, high):
+    """
+    NumPy version of uniform(): operations on unsigned 64 bit integers wrap around like the masked ones
+    of the Python version.
+    """
+
+    with numpy.errstate(over='ignore'):
+        states = _mix_numpy(numpy.uint64(base) + numpy.asarray(streams, dtype=numpy.int64).astype(numpy.uint64))
+        counters = numpy.asarray(draws, dtype=numpy.int64).astype(numpy.uint64) + numpy.uint64(1)
+        values = _mix_numpy(states + counters * numpy.uint64(_GOLDEN))
+    fractions = (values >> numpy.uint64(11)).astype(numpy.float64) * 2.0 ** -53
+    low = numpy.asarray(low, dtype=numpy.float64)
+    return low + (numpy.asarray(high, dtype=numpy.float64) - low) * fractions
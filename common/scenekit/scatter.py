@@ -0,0 +1,97 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Random placement of many instances of a few templates (e.g. palm trees) on a ground plane.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# Scattered objects are not created one by one: every script creates a few templates and lets the cheapest instancing
+# of the application place them (Maya: particle instancer, Blender: group instances, 3Ds Max: instances of
+# the template hierarchy).
+#
+# Instancers of the applications can not shift the animation of a single instance, so the animation offset is given
+# by the template: every instance uses one of `variants` templates, animated variant_offsets[variant] frames later
+# than the first one. A few variants are enough to make the animation look random.
+#
+
+import collections
+import math
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+from scenekit import rng
+
+ScatterLayout = collections.namedtuple('ScatterLayout', ['positions', 'rotations', 'scales', 'variants',
+                                                         'variant_offsets'])
+
+SCALE_RANGE = (0.8, 1.2)  # Random uniform scale of instances
+VARIANTS = 4  # Default number of templates with different animation offsets
+DOMAIN = 'scatter'  # Domain of the random numbers (see scenekit.rng), streams are instances
+
+
+def scatter(count, area, height=0.0, up_axis='z', scale_range=SCALE_RANGE, max_time_offset=0.0, variants=VARIANTS,
+            seed=None):
+    """
+    Function places the instances randomly in the rectangle of the ground plane.
+
+    :param count: int - Number of instances
+    :param area: tuple - ((min, min), (max, max)) - The rectangle on the ground plane: x and y for up_axis='z',
+    x and z for up_axis='y'
+    :param height: float - Position of the ground plane along the up axis
+    :param up_axis: str - 'z' (3Ds Max, Blender) or 'y' (Maya)
+    :param scale_range: tuple - (min, max) - Range of the uniform scale of instances
+    :param max_time_offset: float - Animation offset of the last variant, in frames
+    :param variants: int - Number of templates with different animation offsets
+    :param seed: int - Seed of the placement (see scenekit.rng), None - different placement every time. Every instance
+    has its own stream of random numbers, so changing the count does not move the other instances.
+    :return: ScatterLayout - positions: rows of x, y, z, rotations: rows of Euler angles (radians, only around the up
+    axis), scales: float for every instance, variants: the template of every instance, variant_offsets: animation
+    offset of every template. Rows are NumPy arrays (Python lists without NumPy).
+    """
+
+    if count < 0 or variants < 1:
+        raise ValueError('Wrong number of instances or variants: %r, %r' % (count, variants))
+    if up_axis not in ('y', 'z'):
+        raise ValueError('Unknown up axis: %r' % up_axis)
+    (min_a, min_b), (max_a, max_b) = area
+    variant_offsets = [max_time_offset * variant / float(max(variants - 1, 1)) for variant in range(variants)]
+    up = 1 if up_axis == 'y' else 2  # Axes of the ground plane are the two other ones
+    plane_a, plane_b = [axis for axis in range(3) if axis != up]
+
+    seed = rng.new_seed() if seed is None else seed
+    instances = list(range(count))  # Every instance has its own stream of five random numbers
+
+    def draw(number, low, high):
+        return rng.uniform(seed, DOMAIN, instances, [number] * count, low, high)
+
+    coordinate_a, coordinate_b = draw(0, min_a, max_a), draw(1, min_b, max_b)
+    angles, scales, choices = draw(2, -math.pi, math.pi), draw(3, scale_range[0], scale_range[1]), draw(4, 0, variants)
+
+    if numpy is not None:
+        positions = numpy.full((count, 3), float(height))
+        positions[:, plane_a] = coordinate_a
+        positions[:, plane_b] = coordinate_b
+        rotations = numpy.zeros((count, 3))
+        rotations[:, up] = angles
+        return ScatterLayout(positions, rotations, scales, numpy.minimum(choices.astype(numpy.int64), variants - 1),
+                             variant_offsets)
+
+    layout = ScatterLayout([], [], scales, [min(int(choice), variants - 1) for choice in choices], variant_offsets)
+    for a, b, angle in zip(coordinate_a, coordinate_b, angles):
+        position = [float(height)] * 3
+        position[plane_a], position[plane_b] = a, b
+        rotation = [0.0] * 3
+        rotation[up] = angle
+        layout.positions.append(position)
+        layout.rotations.append(rotation)
+    return layout
@@ -0,0 +1,121 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Iterative traversal of the scene graph and matching of names of nodes by their prefixes.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The scene graph is walked with a stack instead of recursion, so deep hierarchies (e.g. thousands of palms with
+# their segments and leafs) do not reach the recursion limit of Python. Every node is visited once, so all of the
+# work that needs the nodes of the scene should be done in a single walk, e.g.:
+#
+#   prefixes = scenewalk.PrefixTrie([('Palm', wood_material), ('leaf', leaf_material)])
+#   for node in scenewalk.walk([MaxPlus.Core.GetRootNode()], lambda node: node.Children):
+#       material = prefixes.longest(str(node.Name))
+#
+# The walk does not depend on the application: children of a node are given by a function of the script.
+#
+
+_VALUE = None  # Key of the value of a prefix in a node of the trie, other keys are characters
+
+
+def walk(roots, children):
+    """
+    Generator of nodes of the scene graph: depth-first, every node before its children, children in their order.
+
+    :param roots: sequence - Nodes where the walk starts
+    :param children: function(node) - Returns the children of the node
+    :return: generator - Nodes of the graph
+    """
+
+    stack = list(reversed(list(roots)))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(children(node))))
+
+
+def visit(roots, children, visitors):
+    """
+    Function walks the scene graph once and calls every visitor for every node, so many steps can share one walk.
+
+    :param roots: sequence - Nodes where the walk starts
+    :param children: function(node) - Returns the children of the node
+    :param visitors: Python list - Functions called with every node
+    :return: int - Number of visited nodes
+    """
+
+    count = 0
+    for node in walk(roots, children):
+        for visitor in visitors:
+            visitor(node)
+        count += 1
+    return count
+
+
+class PrefixTrie(object):
+    """
+    Prefixes of names with their values. A name is matched against all of the prefixes at once: the time of a match
+    depends on the length of the name, not on the number of prefixes.
+    """
+
+    def __init__(self, prefixes=()):
+        """
+        :param prefixes: sequence - (prefix, value) pairs
+        """
+
+        self._root = {}
+        for prefix, value in prefixes:
+            self.add(prefix, value)
+
+    def add(self, prefix, value):
+        """
+        Function adds the prefix. A value of the same prefix added earlier is replaced.
+
+        :param prefix: str - The prefix of names
+        :param value: Value returned for names with the prefix
+        """
+
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[_VALUE] = value
+
+    def matches(self, name):
+        """
+        Function returns the values of all of the prefixes of the name.
+
+        :param name: str - The name
+        :return: Python list - Values of the matched prefixes, from the shortest prefix
+        """
+
+        values = []
+        node = self._root
+        for char in name:
+            if _VALUE in node:
+                values.append(node[_VALUE])
+            node = node.get(char)
+            if node is None:
+                return values
+        if _VALUE in node:
+            values.append(node[_VALUE])
+        return values
+
+    def longest(self, name, default=None):
+        """
+        Function returns the value of the longest prefix of the name: the most specific one.
+
+        :param name: str - The name
+        :param default: Value returned when no prefix matches the name
+        :return: Value of the longest matched prefix
+        """
+
+        values = self.matches(name)
+        return values[-1] if values else default
@@ -0,0 +1,84 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Time model shared by the scripts: times are frames of a scene with FPS frames per second.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The scripts calculate all times (keys of the animation, time range of the scene) as float frames. Frames are
+# converted to the unit of the application only when they are written to it, whole arrays at once:
+#   Maya:    seconds (om.MTime with kSeconds unit), so keys do not depend on the time unit of the scene
+#   3Ds Max: ticks, 4800 per second
+#   Blender: frames of the scene, scaled if the scene has other frame rate than FPS
+# Every script sets the frame rate of its scene to FPS, so the animation has the same timing in all applications.
+#
+
+try:
+    import numpy
+except ImportError:  # Maya and 3Ds Max do not ship NumPy by default
+    numpy = None
+
+FPS = 25  # Frame rate of the scene created by the scripts
+TICKS_PER_SECOND = 4800  # Internal time unit of 3Ds Max
+UNITS = ['frames', 'seconds', 'ticks']
+
+
+def convert(frames, unit, fps=FPS):
+    """
+    Function converts frames to the time unit of the application.
+
+    :param frames: sequence of floats - Frames (at FPS frames per second)
+    :param unit: str - One of UNITS: 'frames', 'seconds' or 'ticks'. Ticks are rounded to integers.
+    :param fps: float - Frame rate of the application, used by 'frames' unit (FPS by default)
+    :return: Python list - Converted times
+    """
+
+    if unit not in UNITS:
+        raise ValueError('Unknown time unit: %r' % unit)
+    scale = {'frames': float(fps) / FPS, 'seconds': 1.0 / FPS, 'ticks': float(TICKS_PER_SECOND) / FPS}[unit]
+
+    if numpy is not None:
+        times = numpy.asarray(frames, dtype=numpy.float64) * scale
+        return numpy.rint(times).astype(numpy.int64).tolist() if unit == 'ticks' else times.tolist()
+    if unit == 'ticks':
+        return [int(round(frame * scale)) for frame in frames]
+    return [frame * scale for frame in frames]
+
+
+def to_ticks(frame):
+    """
+    Function converts a single frame to ticks of 3Ds Max.
+
+    :param frame: float - Frame (at FPS frames per second)
+    :rtype : int
+    """
+
+    return int(round(frame * float(TICKS_PER_SECOND) / FPS))
+
+
+def frame_range(start, end, step):
+    """
+    Function returns frames from start (included) to end (excluded) with equal intervals, like range() for floats.
+    Frames are calculated from the start, so errors of adding the step do not accumulate.
+
+    :param start: float - The first frame
+    :param end: float - End of the range
+    :param step: float - Interval between frames
+    :return: Python list - Frames
+    """
+
+    if step <= 0:
+        raise ValueError('Step of the range of frames has to be positive: %r' % step)
+    frames = []
+    frame = float(start)
+    while frame < end:
+        frames.append(frame)
+        frame = start + len(frames) * step
+    return frames
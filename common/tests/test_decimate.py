@@ -0,0 +1,49 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.decimate.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from scenekit import decimate
+from scenekit import meshpack
+
+COMMON = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LodCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.mesh = meshpack.load_mesh(os.path.join(COMMON, 'cloud.pmesh'))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cached_levels_are_the_same(self):
+        lods = decimate.build_lods(self.mesh, cache_dir=self.cache_dir)
+        paths = decimate.lod_cache_paths(self.mesh, decimate.LOD_RATIOS, self.cache_dir)
+        self.assertTrue(all(os.path.isfile(path) for path in paths))
+        for lod, cached in zip(lods, decimate.build_lods(self.mesh, cache_dir=self.cache_dir)):
+            for field in ('positions', 'face_counts', 'face_indices'):
+                self.assertEqual(list(getattr(lod, field)), list(getattr(cached, field)))
+
+    def test_ratios_are_part_of_the_key(self):
+        self.assertNotEqual(decimate.lod_cache_paths(self.mesh, (0.5,), self.cache_dir),
+                            decimate.lod_cache_paths(self.mesh, (0.4,), self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
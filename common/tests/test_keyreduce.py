@@ -0,0 +1,78 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.keyreduce.
+#
+
+import unittest
+
+from scenekit import keyreduce
+from scenekit import keytable
+
+# Position keys of the cloud in 3Ds Max: x and y do not change, z does
+CLOUD_FRAMES = [29, 67, 115, 163, 210, 240]
+CLOUD_POSITIONS = [[2.409] * 6, [-39.5] * 6, [31.7, 33, 32.3, 31.5, 32.3, 31.4]]
+
+
+def curve_frames(table):
+    return dict(((curve.target, curve.property_name, curve.axis), curve.times) for curve in table.curves())
+
+
+class SimplifyCurveTest(unittest.TestCase):
+
+    def test_line_keeps_the_ends(self):
+        kept, error = keyreduce.simplify_curve([0, 1, 2, 3], [0.0, 1.0, 2.0, 3.0], 0.001)
+        self.assertEqual(kept, [0, 3])
+        self.assertAlmostEqual(error, 0.0)
+
+    def test_peak_is_kept(self):
+        kept, error = keyreduce.simplify_curve([0, 1, 2, 3, 4], [0.0, 0.0, 5.0, 0.0, 0.0], 0.1)
+        self.assertEqual(kept, [0, 1, 2, 3, 4])
+
+
+class ReduceTableTest(unittest.TestCase):
+
+    def test_axes_of_a_property_keep_the_same_frames(self):
+        table = keytable.KeyTable()
+        table.add_keys('cloud', 'position', CLOUD_FRAMES, CLOUD_POSITIONS, [keytable.CUSTOM] * 6)
+        report = keyreduce.reduce_table(table, 0.001)
+        frames = curve_frames(table)
+        self.assertEqual(frames[('cloud', 'position', 2)], [float(frame) for frame in CLOUD_FRAMES])
+        self.assertEqual(frames[('cloud', 'position', 0)], frames[('cloud', 'position', 2)])
+        self.assertEqual(frames[('cloud', 'position', 1)], frames[('cloud', 'position', 2)])
+        self.assertEqual(report.keys_removed, 0)
+
+    def test_properties_and_targets_are_reduced_separately(self):
+        table = keytable.KeyTable()
+        frames = [0, 1, 2, 3, 4]
+        table.add_keys('a', 'scale', frames, [[1.0] * 5] * 3)
+        table.add_keys('a', 'position', frames, [[0.0, 0.0, 5.0, 0.0, 0.0], [0.0] * 5, [0.0] * 5])
+        table.add_keys('b', 'position', frames, [[0.0, 1.0, 2.0, 3.0, 4.0]] * 3)
+        report = keyreduce.reduce_table(table, 0.01)
+        kept = curve_frames(table)
+        for axis in range(3):
+            self.assertEqual(kept[('a', 'scale', axis)], [0.0, 4.0])
+            self.assertEqual(kept[('a', 'position', axis)], [0.0, 1.0, 2.0, 3.0, 4.0])
+            self.assertEqual(kept[('b', 'position', axis)], [0.0, 4.0])
+        self.assertEqual(report.keys_before, 45)
+        self.assertEqual(report.keys_removed, 18)
+
+    def test_tangents_around_removed_keys_are_linear(self):
+        table = keytable.KeyTable()
+        table.add_keys('a', 'scale', [0, 1, 2, 3], [[0.0, 1.0, 2.0, 2.0]] * 3)
+        keyreduce.reduce_table(table, 0.01)
+        curve = table.curves()[0]
+        self.assertEqual(curve.times, [0.0, 2.0, 3.0])
+        self.assertEqual(curve.out_tangents[0], keytable.LINEAR)
+        self.assertEqual(curve.in_tangents[1], keytable.LINEAR)
+        self.assertEqual(curve.out_tangents[1], keytable.FAST)
+
+    def test_max_error_of_kept_frames(self):
+        table = keytable.KeyTable()
+        table.add_keys('a', 'position', [0, 1, 2], [[0.0, 0.005, 0.0], [0.0, 1.0, 0.0], None])
+        report = keyreduce.reduce_table(table, 0.01)
+        self.assertEqual(report.keys_removed, 0)  # y needs frame 1, so x keeps it too
+        self.assertAlmostEqual(report.max_error, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.keytable.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import unittest
+
+from scenekit import keytable
+
+
+class Recorder(object):
+    """
+    Flush function that saves the curves and the reduction report of every written table.
+    """
+
+    def __init__(self):
+        self.flushes = []
+
+    def __call__(self, table):
+        self.flushes.append((table.curves(), table.reduction))
+
+
+class KeyTableTest(unittest.TestCase):
+
+    def test_last_added_key_is_kept(self):
+        table = keytable.KeyTable()
+        table.add('box', 'scale', 0, 10, 1.0)
+        table.add('box', 'scale', 0, 0, 0.5)
+        table.add('box', 'scale', 0, 10, 2.0, keytable.LINEAR, keytable.LINEAR)
+        curve, = table.curves()
+        self.assertEqual((curve.target, curve.property_name, curve.axis), ('box', 'scale', 0))
+        self.assertEqual(curve.times, [0.0, 10.0])
+        self.assertEqual(curve.values, [0.5, 2.0])
+        self.assertEqual(curve.in_tangents, [keytable.FAST, keytable.LINEAR])
+
+    def test_curves_are_ordered_by_targets_and_channels(self):
+        table = keytable.KeyTable()
+        table.add_keys('sphere', 'position', [0, 5], [[0, 1], None, [2, 3]])
+        table.add_keys('box', 'rotation', [0], [[10], [20], [30]])
+        table.add('sphere', 'scale', 1, 0, 1.0)
+        self.assertEqual([(curve.target, curve.property_name, curve.axis) for curve in table.curves()],
+                         [('sphere', 'position', 0), ('sphere', 'position', 2), ('sphere', 'scale', 1),
+                          ('box', 'rotation', 0), ('box', 'rotation', 1), ('box', 'rotation', 2)])
+
+    def test_numpy_and_python_give_same_curves(self):
+        if keytable.numpy is None:
+            self.skipTest('No NumPy')
+        table = keytable.KeyTable()
+        for key in range(20):
+            table.add('node%d' % (key % 3), keytable.PROPERTIES[key % 2], key % 3, key % 7, key * 0.5)
+        self.assertEqual(table._curves_numpy(), table._curves_python())
+
+    def test_wrong_keys(self):
+        table = keytable.KeyTable()
+        self.assertRaises(ValueError, table.add, 'box', 'color', 0, 0, 1.0)
+        self.assertRaises(ValueError, table.add, 'box', 'scale', 3, 0, 1.0)
+        self.assertRaises(ValueError, table.add, 'box', 'scale', 0, 0, float('nan'))
+        self.assertRaises(ValueError, table.add, 'box', 'scale', 0, float('inf'), 1.0)
+        self.assertRaises(ValueError, table.add, 'box', 'scale', 0, 0, 1.0, len(keytable.TANGENT_NAMES))
+        self.assertEqual(len(table), 0)
+
+
+class CollectTest(unittest.TestCase):
+
+    def test_nested_calls_write_once(self):
+        outer, inner = Recorder(), Recorder()
+        with keytable.collect(outer) as outer_table:
+            outer_table.add('box', 'scale', 0, 0, 1.0)
+            with keytable.collect(inner) as inner_table:
+                self.assertIs(inner_table, outer_table)
+                inner_table.add('box', 'scale', 0, 5, 2.0)
+            self.assertEqual(outer.flushes, [])
+        self.assertEqual(inner.flushes, [])
+        (curves, reduction), = outer.flushes
+        self.assertEqual(curves[0].times, [0.0, 5.0])
+        self.assertIsNone(reduction)
+        self.assertEqual(len(outer_table), 0)
+
+    def test_error_writes_nothing(self):
+        recorder = Recorder()
+        try:
+            with keytable.collect(recorder) as table:
+                table.add('box', 'scale', 0, 0, 1.0)
+                raise RuntimeError('Failed step')
+        except RuntimeError:
+            pass
+        self.assertEqual(recorder.flushes, [])
+        with keytable.collect(recorder):  # The next step starts with a new table
+            pass
+        self.assertEqual(recorder.flushes, [([], None)])
+
+    def test_flush_collected_merges_reports(self):
+        recorder = Recorder()
+        keytable.flush_collected()  # Nothing to write outside of collect()
+        with keytable.collect(recorder, tolerance=0.01) as table:
+            table.add_keys('box', 'position', [0, 5, 10], [[0, 5, 10]])  # The middle key is on the line
+            keytable.flush_collected()
+            self.assertEqual(len(table), 0)
+            table.add_keys('box', 'position', [0, 5, 10], [[0, 1, 0]])  # The peak is kept
+        self.assertEqual(len(recorder.flushes), 2)
+        self.assertEqual(recorder.flushes[0][0][0].times, [0.0, 10.0])
+        self.assertEqual(recorder.flushes[1][0][0].times, [0.0, 5.0, 10.0])
+        self.assertEqual((recorder.flushes[0][1].keys_before, recorder.flushes[0][1].keys_removed), (3, 1))
+        self.assertEqual((recorder.flushes[1][1].keys_before, recorder.flushes[1][1].keys_removed), (6, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.materialrules.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import unittest
+
+from scenekit import materialrules
+
+NAMES = ['water', 'chest', 'chest_metal_part', 'lock001', 'Palm_element_1_0', 'leaf_1_0', 'land', 'land_lod1']
+
+
+class PartitionTest(unittest.TestCase):
+
+    def test_first_rule_wins(self):
+        rules = [materialrules.rule('gray', patterns=['*lock*', '*metal*']),
+                 materialrules.rule('wood', patterns=['chest*', 'Palm*']),
+                 materialrules.rule('water', patterns=['water', '*'])]  # Everything that is left
+        self.assertEqual(materialrules.partition(NAMES, rules),
+                         [('gray', [2, 3]), ('wood', [1, 4]), ('water', [0, 5, 6, 7])])
+
+    def test_patterns_match_whole_names(self):
+        rules = [materialrules.rule('sand', patterns=['land']), materialrules.rule('leaf', patterns=['leaf?1'])]
+        self.assertEqual(materialrules.partition(NAMES, rules), [('sand', [6])])
+
+    def test_excludes_limit_their_rule(self):
+        rules = [materialrules.rule('wood', patterns=['chest*'], excludes=['*metal*']),
+                 materialrules.rule('gray', patterns=['*_part'])]
+        self.assertEqual(materialrules.partition(NAMES, rules), [('wood', [1]), ('gray', [2])])
+
+    def test_tags_and_shared_materials(self):
+        wood = object()
+        rules = [materialrules.rule('gray', tags=['lock']),
+                 materialrules.rule(wood, patterns=['chest']),
+                 materialrules.rule('leaf', patterns=['leaf*']),
+                 materialrules.rule(wood, tags=['segment', 'lock'])]
+        tags = [(), (), (), ('lock',), ('segment',), (), (), ()]
+        self.assertEqual(materialrules.partition(NAMES, rules, tags),
+                         [('gray', [3]), (wood, [1, 4]), ('leaf', [5])])
+
+    def test_ignore_case(self):
+        rules = [materialrules.rule('gray', patterns=['LOCK*'])]
+        self.assertEqual(materialrules.partition(NAMES, rules), [])
+        self.assertEqual(materialrules.partition(NAMES, rules, ignore_case=True), [('gray', [3])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.meshedges.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import unittest
+
+from scenekit import meshedges
+
+
+def grid(size):
+    """
+    Function returns a flat grid of size x size quads: positions, face counts and face indices.
+    """
+
+    positions = [float(value) for y in range(size + 1) for x in range(size + 1) for value in (x, y, 0)]
+    face_indices = []
+    for y in range(size):
+        for x in range(size):
+            corner = y * (size + 1) + x
+            face_indices.extend([corner, corner + 1, corner + size + 2, corner + size + 1])
+    return positions, [4] * size * size, face_indices
+
+
+def edge_faces(face_counts, mesh_edges):
+    faces = {}
+    corner = 0
+    for face, count in enumerate(face_counts):
+        for edge in mesh_edges.corner_edges[corner:corner + count]:
+            faces.setdefault(int(edge), []).append(face)
+        corner += count
+    return faces
+
+
+class SmoothingGroupsTest(unittest.TestCase):
+
+    def check(self, face_counts, mesh_edges, groups):
+        for edge, faces in edge_faces(face_counts, mesh_edges).items():
+            if len(faces) == 2 and not mesh_edges.smooth[edge]:
+                self.assertFalse(groups[faces[0]] & groups[faces[1]], 'Hard edge %d is smoothed' % edge)
+
+    def test_flat_grid_is_one_group(self):
+        positions, face_counts, face_indices = grid(3)
+        mesh_edges = meshedges.compute_edges(positions, face_counts, face_indices)
+        groups = meshedges.smoothing_groups(face_counts, mesh_edges)
+        self.assertEqual(len(set(groups)), 1)
+        self.assertNotEqual(groups[0], 0)
+
+    def test_hard_edge_inside_soft_surface(self):
+        # A hard edge between faces 0 and 1 that ends inside the surface: the faces are still connected by
+        # soft edges around it, but must not share a group
+        positions, face_counts, face_indices = grid(3)
+        mesh_edges = meshedges.compute_edges(positions, face_counts, face_indices)
+        mesh_edges.smooth = list(mesh_edges.smooth)
+        mesh_edges.smooth[mesh_edges.edge_numbers([1, 5])[0]] = False
+        groups = meshedges.smoothing_groups(face_counts, mesh_edges)
+        self.check(face_counts, mesh_edges, groups)
+        self.assertFalse(groups[0] & groups[1])
+        self.assertNotIn(0, groups)
+
+    def test_faces_without_soft_edges(self):
+        positions = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0]
+        face_counts, face_indices = [4, 4], [0, 1, 2, 3, 1, 0, 4, 5]  # Two faces at a right angle
+        mesh_edges = meshedges.compute_edges(positions, face_counts, face_indices)
+        self.assertEqual(meshedges.smoothing_groups(face_counts, mesh_edges), [0, 0])
+
+
+class GroupSmoothTest(unittest.TestCase):
+
+    def test_borders_of_groups_are_hard(self):
+        positions, face_counts, face_indices = grid(2)  # Faces 0, 1 in the first row, 2, 3 in the second one
+        mesh_edges = meshedges.compute_edges(positions, face_counts, face_indices, face_groups=[1, 1, 2, 0])
+        for edge, faces in edge_faces(face_counts, mesh_edges).items():
+            self.assertEqual(mesh_edges.smooth[edge], sorted(faces) == [0, 1], 'Edge of faces %r' % (faces,))
+
+    def test_groups_ignore_angle(self):
+        positions = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0]
+        face_counts, face_indices = [4, 4], [0, 1, 2, 3, 1, 0, 4, 5]  # Two faces at a right angle
+        mesh_edges = meshedges.compute_edges(positions, face_counts, face_indices, face_groups=[3, 3])
+        self.assertTrue(mesh_edges.smooth[mesh_edges.edge_numbers([0, 1])[0]])
+        self.assertNotIn(0, meshedges.smoothing_groups(face_counts, mesh_edges))
+
+
+if __name__ == '__main__':
+    unittest.main()
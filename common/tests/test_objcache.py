@@ -0,0 +1,95 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.objcache.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from scenekit import objcache
+
+OBJ = b"""v 0 0 0
+v 1 0 0
+v 1 1 0
+g plane
+s 1
+f 1 2 3
+"""
+
+
+class LoadObjTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.obj')
+        self.cache_path = self.path + objcache.CACHE_EXTENSION
+        self.write(OBJ)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, content, path=None):
+        with open(path or self.path, 'wb') as file_:
+            file_.write(content)
+
+    def touch(self, path):
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    def positions(self, obj_data):
+        return [float(value) for value in obj_data.positions]
+
+    def test_cache_is_saved_and_used(self):
+        self.assertFalse(objcache.is_cache_current(self.path))
+        parsed = objcache.load_obj(self.path)
+        self.assertTrue(objcache.is_cache_current(self.path))
+        cached = objcache.load_obj(self.path)
+        self.assertEqual(self.positions(cached), self.positions(parsed))
+        self.assertEqual(list(cached.group_smoothing('plane')), [1])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['test.obj', 'test.obj.cache'])
+
+    def test_changed_file_is_parsed_again(self):
+        objcache.load_obj(self.path)
+        self.write(OBJ.replace(b'v 1 1 0', b'v 1 1 5'))
+        self.touch(self.path)
+        self.assertFalse(objcache.is_cache_current(self.path))
+        self.assertEqual(self.positions(objcache.load_obj(self.path))[6:9], [1.0, -5.0, 1.0])
+        self.assertTrue(objcache.is_cache_current(self.path))
+
+    def test_touched_file_refreshes_cache(self):
+        objcache.load_obj(self.path)
+        self.touch(self.path)
+        self.assertFalse(objcache.is_cache_current(self.path))
+        obj_data = objcache.load_obj(self.path)  # Same content: the cache is saved again with the new time
+        self.assertTrue(objcache.is_cache_current(self.path))
+        self.assertEqual(self.positions(obj_data)[6:9], [1.0, 0.0, 1.0])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['test.obj', 'test.obj.cache'])
+
+    def test_axis_and_damaged_cache(self):
+        objcache.load_obj(self.path)
+        self.assertFalse(objcache.is_cache_current(self.path, to_z_up=False))
+        self.assertEqual(self.positions(objcache.load_obj(self.path, to_z_up=False))[6:9], [1.0, 1.0, 0.0])
+        self.write(b'damaged', self.cache_path)
+        self.assertEqual(self.positions(objcache.load_obj(self.path))[6:9], [1.0, 0.0, 1.0])
+        self.assertTrue(objcache.is_cache_current(self.path))
+
+    def test_failed_save_leaves_no_temporary_file(self):
+        os.mkdir(self.cache_path)  # The cache file can not replace a directory
+        self.assertEqual(len(objcache.load_obj(self.path).groups), 1)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['test.obj', 'test.obj.cache'])
+        self.assertTrue(os.path.isdir(self.cache_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.objreader.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from scenekit import objreader
+
+COMMON = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OBJ = b"""# Two quads of one object, a triangle of another one
+mtllib test.mtl
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 2 0 0
+v 2 1 0
+vt 0 0
+vt 1 0
+vt 1 1
+vt 0 1
+o first
+usemtl red
+s 1
+f 1/1 2/2 3/3 4/4
+s off
+f 2/1 5/2 6/3 3/4
+o second
+f -4 -2 -1
+"""
+
+MTL = b"""newmtl red
+Kd 1 0 0
+map_Kd red.png
+"""
+
+
+class ReadObjTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.obj')
+        with open(self.path, 'wb') as file_:
+            file_.write(OBJ)
+        with open(os.path.join(self.directory, 'test.mtl'), 'wb') as file_:
+            file_.write(MTL)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_groups_and_materials(self):
+        obj_data = objreader.read_obj(self.path)
+        self.assertEqual([(group.name, group.material) for group in obj_data.groups],
+                         [('first', 'red'), ('second', 'red')])
+        self.assertEqual(obj_data.materials, {'red': {'Kd': (1.0, 0.0, 0.0), 'map_Kd': 'red.png'}})
+
+    def test_z_up(self):
+        positions = objreader.read_obj(self.path).positions
+        self.assertEqual(list(positions[9:12]), [0.0, 0.0, 1.0])  # (0, 1, 0) -> (0, 0, 1)
+        positions = objreader.read_obj(self.path, to_z_up=False).positions
+        self.assertEqual(list(positions[9:12]), [0.0, 1.0, 0.0])
+
+    def test_group_mesh_renumbers_vertices(self):
+        obj_data = objreader.read_obj(self.path)
+        mesh = obj_data.group_mesh('second')  # Negative indices: vertices 3, 5 and 6 of the file
+        self.assertEqual(list(mesh.face_counts), [3])
+        self.assertEqual(list(mesh.face_indices), [0, 1, 2])
+        self.assertEqual(list(mesh.positions), [1.0, 0.0, 1.0, 2.0, 0.0, 0.0, 2.0, 0.0, 1.0])
+
+    def test_uvs(self):
+        obj_data = objreader.read_obj(self.path)
+        self.assertEqual(list(obj_data.group_uvs('first'))[:8], [0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0])
+        self.assertIsNone(obj_data.group_uvs('second'))
+
+    def test_smoothing_groups(self):
+        obj_data = objreader.read_obj(self.path)
+        self.assertEqual(list(obj_data.group_smoothing('first')), [1, 0])
+        self.assertIsNone(obj_data.group_smoothing('second'))  # "s off" is kept by the next object
+
+    def test_chest_is_smoothed(self):
+        obj_data = objreader.read_obj(os.path.join(COMMON, 'chest_for_Blender.obj'))
+        groups = obj_data.group_smoothing('chest')
+        self.assertEqual(len(groups), len(obj_data.get_group('chest').face_counts))
+        self.assertNotIn(0, list(groups))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.palmpool.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import sys
+import unittest
+
+from scenekit import palmpool
+from scenekit import palms
+from scenekit import rng
+
+PALMS = [palms.PalmParameters(diameter=1.0 + number * 0.1, segs_num=10 + number, leafs_num=number % 4 + 6,
+                              bending=20 + number * 3, anim_start=number, anim_end=number + 5) for number in range(6)]
+
+
+class LayoutTest(unittest.TestCase):
+
+    def test_few_palms_in_main_process(self):
+        pooled = palmpool.layout(PALMS, up_axis='y', leaf_height=4, seed=rng.SEED, max_workers=2)
+        serial = palms.layout(PALMS, up_axis='y', leaf_height=4, seed=rng.SEED)
+        self.assertEqual(repr(pooled), repr(serial))
+
+    def test_pool_gives_same_layout(self):
+        if palmpool.numpy is None or palmpool.shared_memory is None:
+            self.skipTest('No NumPy or shared memory')
+        min_palms_per_worker = palmpool.MIN_PALMS_PER_WORKER
+        palmpool.MIN_PALMS_PER_WORKER = 1  # Six palms are split between two workers
+        try:
+            pooled = palmpool.layout(PALMS, up_axis='y', leaf_height=4, seed=rng.SEED, python_executable=sys.executable,
+                                     max_workers=2)
+        finally:
+            palmpool.MIN_PALMS_PER_WORKER = min_palms_per_worker
+        serial = palms.layout(PALMS, up_axis='y', leaf_height=4, seed=rng.SEED)
+        self.assertEqual(pooled.palms, serial.palms)
+        for field in ('segment_starts', 'leaf_starts'):
+            self.assertEqual(list(getattr(pooled, field)), list(getattr(serial, field)))
+        for field in palmpool._FIELDS:
+            self.assertEqual(palmpool.numpy.asarray(getattr(pooled, field)).tolist(),
+                             palmpool.numpy.asarray(getattr(serial, field)).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
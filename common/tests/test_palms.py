@@ -0,0 +1,42 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.palms.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import unittest
+
+from scenekit import palms
+from scenekit import rng
+
+PALM = palms.PalmParameters(diameter=1.3, segs_num=20, leafs_num=9, bending=34, anim_start=11, anim_end=26)
+
+
+class MatrixScaleTest(unittest.TestCase):
+
+    def test_taper_of_segments(self):
+        for up_axis, axes in (('z', (0, 1)), ('y', (0, 2))):
+            palm_layout = palms.layout([PALM], up_axis=up_axis, seed=rng.SEED)
+            for number, row in enumerate(palms.palm_rows(palm_layout, 0)[0]):
+                scale = palms.matrix_scale(palm_layout.segment_matrices[row])
+                taper = 1.0 - number / (PALM.segs_num * 4.0)
+                for axis in range(3):
+                    self.assertAlmostEqual(scale[axis], taper if axis in axes else 1.0)
+
+    def test_scale_of_leafs(self):
+        palm_layout = palms.layout([PALM], up_axis='y', seed=rng.SEED)
+        for row in palms.palm_rows(palm_layout, 0)[1]:
+            for value in palms.matrix_scale(palm_layout.leaf_matrices[row]):
+                self.assertAlmostEqual(value, palms.LEAF_SCALE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Check that every module of scenekit can be imported by Python 2 (Maya and 3Ds Max with Python 2).
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+#
+# The interpreter is given by the PYTHON2 environment variable or found on the PATH, without one the test is skipped:
+#   PYTHON2=/path/to/python2.7 python -m pytest tests
+#
+
+import glob
+import os
+import subprocess
+import unittest
+
+COMMON = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_python2():
+    """
+    Function returns a working Python 2 interpreter or None.
+
+    :rtype : str
+    """
+
+    candidates = [os.environ.get('PYTHON2'), 'python2.7', 'python2']
+    for candidate in [candidate for candidate in candidates if candidate]:
+        try:
+            output = subprocess.check_output([candidate, '-c', 'import sys; print(sys.version_info[0])'],
+                                             stderr=subprocess.STDOUT)
+        except (OSError, subprocess.CalledProcessError):
+            continue
+        if output.strip() == b'2':
+            return candidate
+    return None
+
+
+class Python2ImportTest(unittest.TestCase):
+
+    def test_modules_import(self):
+        python2 = find_python2()
+        if python2 is None:
+            self.skipTest('No Python 2 interpreter')
+        modules = sorted(os.path.splitext(os.path.basename(path))[0]
+                         for path in glob.glob(os.path.join(COMMON, 'scenekit', '*.py')))
+        environment = dict((name, value) for name, value in os.environ.items() if name != 'PYTHONPATH')  # Python 3
+        for module in modules:
+            process = subprocess.Popen([python2, '-B', '-c', 'import scenekit.' + module], cwd=COMMON, env=environment,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            output = process.communicate()[0]
+            self.assertEqual(process.returncode, 0, 'scenekit.%s: %s' % (module, output.decode('utf-8', 'replace')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.rng.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import unittest
+
+from scenekit import palms
+from scenekit import rng
+from scenekit import scatter
+
+
+class UniformTest(unittest.TestCase):
+
+    def test_domains_give_different_streams(self):
+        streams, draws = list(range(8)) * 5, [draw for draw in range(5) for _ in range(8)]
+        leafs = list(rng.uniform(rng.SEED, palms.LEAF_DOMAIN, streams, draws))
+        instances = list(rng.uniform(rng.SEED, scatter.DOMAIN, streams, draws))
+        for leaf, instance in zip(leafs, instances):
+            self.assertNotEqual(leaf, instance)
+
+    def test_same_domain_gives_same_numbers(self):
+        first = list(rng.uniform(rng.SEED, 'test', [0, 1, 2], [0, 0, 3], -1.0, 1.0))
+        second = list(rng.uniform(rng.SEED, 'test', [2, 0, 1], [3, 0, 0], -1.0, 1.0))
+        self.assertEqual(first, [second[1], second[2], second[0]])
+        for number in first:
+            self.assertTrue(-1.0 <= number < 1.0)
+
+    def test_numpy_and_python_give_same_numbers(self):
+        if rng.numpy is None:
+            self.skipTest('No NumPy')
+        streams, draws = [0, 1, 7, 2 ** 40], [0, 5, 3, 2]
+        base = (rng.SEED * rng._GOLDEN + rng._domain_key('test')) & rng._MASK
+        self.assertEqual(list(rng._uniform_numpy(base, streams, draws, 0.0, 1.0)),
+                         rng._uniform_python(base, streams, draws, 0.0, 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
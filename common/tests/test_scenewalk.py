@@ -0,0 +1,69 @@
+# __author__ = 'Pawel Kowalski'
+#
+# Tests of scenekit.scenewalk.
+#
+# Copyright (C) Pawel Kowalski
+# www.pkowalski.com
+# www.behance.net/pkowalski
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+
+import sys
+import unittest
+
+from scenekit import scenewalk
+
+# Scene graph: {node: children}
+GRAPH = {'root': ['Palm_1', 'chest'], 'Palm_1': ['Palm_element_1_0', 'leaf_1_0'], 'Palm_element_1_0': [],
+         'leaf_1_0': [], 'chest': ['lock'], 'lock': []}
+
+
+class WalkTest(unittest.TestCase):
+
+    def test_depth_first_order(self):
+        self.assertEqual(list(scenewalk.walk(['root'], GRAPH.get)),
+                         ['root', 'Palm_1', 'Palm_element_1_0', 'leaf_1_0', 'chest', 'lock'])
+        self.assertEqual(list(scenewalk.walk(['chest', 'Palm_1'], GRAPH.get)),
+                         ['chest', 'lock', 'Palm_1', 'Palm_element_1_0', 'leaf_1_0'])
+
+    def test_deep_hierarchy(self):
+        depth = sys.getrecursionlimit() * 2
+        nodes = list(scenewalk.walk([0], lambda node: [node + 1] if node < depth else []))
+        self.assertEqual(nodes, list(range(depth + 1)))
+
+    def test_visitors_share_one_walk(self):
+        first, second = [], []
+        self.assertEqual(scenewalk.visit(['root'], GRAPH.get, [first.append, second.append]), len(GRAPH))
+        self.assertEqual(first, second)
+        self.assertEqual(first, list(scenewalk.walk(['root'], GRAPH.get)))
+
+
+class PrefixTrieTest(unittest.TestCase):
+
+    def test_longest_match(self):
+        trie = scenewalk.PrefixTrie([('Palm', 'wood'), ('Palm_element', 'bark'), ('leaf', 'leaf')])
+        self.assertEqual(trie.longest('Palm_element_1_0'), 'bark')
+        self.assertEqual(trie.longest('Palm_1'), 'wood')
+        self.assertEqual(trie.longest('Palm_elem'), 'wood')
+        self.assertEqual(trie.longest('leaf'), 'leaf')
+        self.assertEqual(trie.longest('lock', 'gray'), 'gray')
+        self.assertIsNone(trie.longest('Pal'))
+
+    def test_all_matches(self):
+        trie = scenewalk.PrefixTrie([('', 'any'), ('P', 'p'), ('Palm', 'wood')])
+        self.assertEqual(trie.matches('Palm_1'), ['any', 'p', 'wood'])
+        self.assertEqual(trie.matches('chest'), ['any'])
+        self.assertEqual(trie.matches(''), ['any'])
+
+    def test_prefix_added_again_is_replaced(self):
+        trie = scenewalk.PrefixTrie([('leaf', 'leaf')])
+        trie.add('leaf', 'green')
+        self.assertEqual(trie.matches('leaf_1_0'), ['green'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,11 +35,12 @@
 import glob
 import math
 import os
-import random
+import sys
 import time
 
 import maya.OpenMayaUI as omui
 import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
 import maya.cmds as cmds
 import maya.mel as mel
 import pymel.core as pm
@@ -48,14 +49,14 @@ try:
     # Maya2016 - PySide & Qt4
     from PySide.QtCore import Qt, SIGNAL
     from PySide.QtGui import (QMessageBox, QListWidgetItem, QFileDialog, QDialog, QWidget, QGridLayout, QLabel,
-                              QPushButton, QListWidget, QDesktopWidget)
+                              QPushButton, QListWidget, QDesktopWidget, QDoubleSpinBox, QSpinBox)
     from shiboken import wrapInstance
 except ImportError:
     # Maya2017+ - PySide2 & Qt5
     from PySide2.QtCore import Qt, SIGNAL
     from shiboken2 import wrapInstance
     from PySide2.QtWidgets import (QMessageBox, QListWidgetItem, QFileDialog, QDialog, QWidget, QGridLayout, QLabel,
-                                   QPushButton, QListWidget, QDesktopWidget)
+                                   QPushButton, QListWidget, QDesktopWidget, QDoubleSpinBox, QSpinBox)
 
 
 class DataTable(object):
@@ -66,7 +67,10 @@ class DataTable(object):
 
     target_list = None
     target_label = None
+    target_tolerance = None  # Spin box with the tolerance of the reduction of keys, 0 - keys are not reduced
     scores_list = []
+    details_list = []  # Statistics of the steps (reduction of keys, build mode), saved apart from the times
+    measure_redraw = False  # Measure a redraw before every step to estimate the time saved by the build mode
     next_step = 0  # the step that should be performed next (when running the script step-by-step)
     ignore_steps = False  # if ignore_steps is false the animation is step by step
 
@@ -84,36 +88,44 @@ class DataTable(object):
                               required by some functions.
         """
 
+        from scenekit import keytable
+
         self.target_label.setText(text)  # Update the label of UI
-        if path is None:  # If no path was passed as argument, then do not pass this variable to target function
-            ts = time.time()  # Start measuring time
-            function()  # Execute the function passed as an argument
-        else:
-            ts = time.time()
-            function(path)  # if path was passed then pass it to the target function
+        ts = time.time()  # Start measuring time
+        tolerance = self.target_tolerance.value() if self.target_tolerance else None
+        # The viewport, undo and autosave are suspended during the step (see build_mode()). Keys created by the step
+        # are reduced (see scenekit.keyreduce) and written to the scene at its end.
+        with build_mode(self.measure_redraw) as build, keytable.collect(flush_keys, tolerance) as keys:
+            if path is None:  # If no path was passed as argument, then do not pass this variable to target function
+                function()  # Execute the function passed as an argument
+            else:
+                function(path)  # if path was passed then pass it to the target function
         te = time.time()  # Record the ending time of command
-        score = [text, te - ts]  # Measure the interval
+        score = [text, te - ts - build.redraw_time]  # Measure the interval, without the measured redraw
         self.scores_list.append(score)  # append the
 
         self.target_list.addItem(QListWidgetItem(str(score)))  # Add measured time to scores list in UI
+        details = [build_score(build)]
+        if keys.reduction is not None and keys.reduction.keys_removed:
+            details.insert(0, reduction_score(keys.reduction))
+        for detail in details:
+            self.details_list.append([text] + detail)
+            self.target_list.addItem(QListWidgetItem(str(detail)))
 
     def save(self):
         """
-        Function saves the execution times of commands to the file.
+        Function saves the execution times of commands to the file, one line for every step. Statistics of the steps
+        are saved to a separate file, scores_Maya_build.txt.
         """
 
-        i = 0
-        scores = []
-
-        while i < self.target_list.count():
-            scores.append(self.target_list.item(i).text())
-            i += 1
-
         path = QFileDialog.getExistingDirectory(None, 'Select a folder to save the scores_Maya.txt file',
                                                 'D:/')
         with open(path + '/scores_Maya.txt', 'w') as file_:
-            for score in scores:
-                file_.write(score + '\n')
+            for score in self.scores_list:
+                file_.write(str(score) + '\n')
+        with open(path + '/scores_Maya_build.txt', 'w') as file_:
+            for detail in self.details_list:
+                file_.write(str(detail) + '\n')
 
     # noinspection PyMethodMayBeStatic,PyMethodMayBeStatic
     def reset(self):
@@ -152,6 +164,12 @@ class GUI(QDialog):
         self.connect(btn_start, SIGNAL("clicked()"), self.fn_no_steps)  # Connect button to function
         self.connect(btn_step, SIGNAL("clicked()"), self.fn_step)
         self.times_list = QListWidget(self)  # Create a list widget
+        self.tolerance_box = QDoubleSpinBox()  # Tolerance of the reduction of keys
+        self.tolerance_box.setDecimals(4)
+        self.tolerance_box.setSingleStep(0.001)
+        self.scatter_box = QSpinBox()  # Number of scattered palms, 0 - four palms placed by hand
+        self.scatter_box.setRange(0, 100000)
+        self.scatter_box.setSingleStep(100)
         btn_save = QPushButton('Save scores')
         btn_reset = QPushButton('Clear the scene')
 
@@ -160,6 +178,11 @@ class GUI(QDialog):
         grid_internal.addWidget(btn_step, 0, 0)
         grid_internal.addWidget(btn_start, 0, 1)
 
+        grid_internal.addWidget(QLabel('Key reduction tolerance'), 1, 0)
+        grid_internal.addWidget(self.tolerance_box, 1, 1)
+        grid_internal.addWidget(QLabel('Scattered palms'), 2, 0)
+        grid_internal.addWidget(self.scatter_box, 2, 1)
+
         grid.addLayout(grid_internal, 1, 0)
         grid.addWidget(self.times_list, 2, 0)
         grid.addWidget(btn_save, 3, 0)
@@ -168,6 +191,7 @@ class GUI(QDialog):
         self.data_table = DataTable()
         self.data_table.target_list = self.times_list
         self.data_table.target_label = self.label_info
+        self.data_table.target_tolerance = self.tolerance_box
 
         self.connect(btn_reset, SIGNAL("clicked()"), self.data_table.reset)
         self.connect(btn_save, SIGNAL("clicked()"), self.data_table.save)
@@ -210,11 +234,14 @@ class GUI(QDialog):
             self.path = QFileDialog.getExistingDirectory(self, 'Select the folder of additional files (named "common")')
             print self.path
 
+        add_common_to_path(self.path)  # Python modules shared by the scripts are stored with the additional files
+
         functions_with_names = [["Setup the scene", prepare_scene, self.path],
                                 ["Import basic objects", import_and_animate_basic_meshes, self.path],
-                                ["Create a shark finn and a cloud", create_shark_and_cloud, None],
+                                ["Create a shark finn and a cloud", create_shark_and_cloud, self.path],
                                 ["Create a chest with Macro script", create_chest, None],
-                                ["Create and animate trees", create_and_animate_trees, None],
+                                ["Create and animate trees",
+                                 lambda path: create_and_animate_trees(path, self.scatter_box.value()), self.path],
                                 ["Fix objects hierarchy, finish the animation", change_hierarchy_and_animate, None],
                                 ["Create and assign materials", create_and_assign_materials, None]]
 
@@ -229,106 +256,298 @@ class GUI(QDialog):
             self.data_table.run(text=line[0], function=line[1], path=line[2])
 
 
-def frange(start, end, jump):
+def add_common_to_path(path):
     """
-    Function returns a list of floats, similar to int range(function)
+    Function makes the Python modules from the directory of additional files ("common") importable. The directory
+    holds the scenekit package shared by the scripts of all applications (see common/scenekit/__init__.py);
+    functions of this script import its modules when they run, after this function was called.
 
-    :param start: float - Start of a range
-    :param end: float - End of a range
-    :param jump: float - Interval between values
-    :rtype : list of floats
+    :param path: string - The directory with necessary files
     """
-    while start < end:
-        yield start
-        start += jump
+
+    path = os.path.normpath(path)
+    if path not in sys.path:
+        sys.path.append(path)
 
 
-def set_scale_keys(target, keyframes):
+def mayapy_path():
     """
-    Function animates the scale of given object by creating the given keyframes.
+    Function returns the path to mayapy, the Python interpreter of Maya. It is used to start worker processes
+    (see scenekit.objpool), the executable of Maya can not start them.
 
-    :param target:  String - Name of an object which scale will be animated
-    :param keyframes: Python list - Keyframes that will be created: [[int time, float scale (1 = 100%),] ...]
+    :rtype : str
+    """
+
+    return os.path.join(os.path.dirname(sys.executable), 'mayapy' + ('.exe' if os.name == 'nt' else ''))
+
+
+def reduction_score(reduction):
+    """
+    Function describes the result of the reduction of keys for the scores list.
+
+    :param reduction: scenekit.keyreduce.ReductionReport - Result of the reduction
+    :return: Python list - [str description, int removed keys, float maximum error]
+    """
+
+    return ['Keys removed (of %d), max error' % reduction.keys_before, reduction.keys_removed,
+            reduction.max_error]
+
+
+def build_score(build):
+    """
+    Function describes the build mode of a step for the scores list.
+
+    :param build: scenekit.buildmode.BuildMode - Statistics of the build mode
+    :return: Python list - [str description, int skipped redraws, float estimated saved time]. The time is given only
+    when the time of a redraw was measured.
+    """
+
+    if build.redraw_measured:
+        return ['Build mode: redraws skipped, estimated time saved', build.redraws_skipped, build.time_saved]
+    return ['Build mode: redraws skipped', build.redraws_skipped]
+
+
+def build_mode(measure_redraw=False):
+    """
+    Function returns the context in which every step of the script is run (see scenekit.buildmode): Viewport 2.0 is
+    paused, changes are not recorded in the undo queue and the scene is not autosaved. Settings are restored at
+    the end of the step.
+
+    :param measure_redraw: bool - Force one redraw before the step to estimate the time saved by skipped redraws.
+    Only for measurements: the redraw takes time (BuildMode.redraw_time) that is not a part of the step.
+    :return: Context manager that gives scenekit.buildmode.BuildMode
+    """
+
+    from scenekit import buildmode
+
+    def pause_viewport():
+        paused = cmds.ogs(query=True, pause=True)
+        if not paused:
+            cmds.ogs(pause=True)  # The flag toggles the pause
+        return paused
+
+    def resume_viewport(paused):
+        if not paused:
+            cmds.ogs(pause=True)
+
+    def disable_undo():
+        state = cmds.undoInfo(query=True, state=True)
+        cmds.undoInfo(stateWithoutFlush=False)  # The undo queue is not flushed
+        return state
+
+    def disable_autosave():
+        state = cmds.autoSave(query=True, enable=True)
+        cmds.autoSave(enable=False)
+        return state
+
+    return buildmode.suspended([(pause_viewport, resume_viewport),
+                                (disable_undo, lambda state: cmds.undoInfo(stateWithoutFlush=state)),
+                                (disable_autosave, lambda state: cmds.autoSave(enable=state))],
+                               redraw=(lambda: cmds.refresh(force=True)) if measure_redraw else None)
+
+
+def refresh():
+    """
+    Function redraws the viewports. In build mode (see build_mode()) the redraw is skipped.
     """
 
-    for keyframe in keyframes:  # For every keyframe from the list of keyframes scale object at proper time
-        scale_value = float(keyframe[0])
-        cmds.setKeyframe(target, attribute='scaleX', v=scale_value, time=keyframe[1], itt="fast", ott="fast")
-        cmds.setKeyframe(target, attribute='scaleY', v=scale_value, time=keyframe[1], itt="fast", ott="fast")
-        cmds.setKeyframe(target, attribute='scaleZ', v=scale_value, time=keyframe[1], itt="fast", ott="fast")
+    from scenekit import buildmode
 
+    if not buildmode.skip_redraw():
+        cmds.refresh(force=True)
 
-def leafs_rotations(number_of_leafs):
+
+def index_nodes(role, nodes):
+    """
+    Function records nodes created by the script in the node index (see scenekit.nodeindex). Nodes are stored
+    by their UUIDs, which do not change when the nodes are renamed or parented.
+
+    :param role: str - Role of the nodes in the scene, e.g. 'segment'
+    :param nodes: Python list - Names of the nodes
+    """
+
+    from scenekit import nodeindex
+
+    if nodes:  # cmds.ls() without nodes would return all of the nodes of the scene
+        nodeindex.add(role, cmds.ls(nodes, uuid=True))
+
+
+def indexed_nodes(role, shapes=False):
     """
-    Creates the list of angles of leafs around the palm tree.
-    Leafs should be placed more or less evenly around the trunk but appear to be placed randomly.
-    The leafs should not be placed too close, because they would overlap.
+    Function returns the nodes of the role recorded by index_nodes(), without a scan of the scene.
 
-    :param number_of_leafs: int - Number of leafs
-    :return: Python list - List of angles of leafs around the palm tree
+    :param role: str - Role of the nodes in the scene
+    :param shapes: bool - Return the shapes of the nodes instead of the nodes
+    :return: Python list - Full names of the nodes (or shapes). Nodes deleted from the scene are skipped.
     """
 
-    x = -180  # Leafs are placed around the trunk, so the range is 360 deg. x = 0, y = 2*pi would also be ok.
-    y = 180
-    angles = []
-    jump = (y - x) / float(number_of_leafs)  # Divide the range by the number of leafs and create an array
+    from scenekit import nodeindex
 
-    while x < y:
-        random.seed()
-        angles.append(random.uniform(x - (jump / 3.0), x + (jump / 3.0)))  # every leaf is placed +/- (1/3)*interval
-        x += jump
+    uuids = nodeindex.get(role)
+    nodes = cmds.ls(uuids, long=True) if uuids else []
+    if shapes and nodes:
+        return cmds.listRelatives(nodes, shapes=True, fullPath=True) or []
+    return nodes
 
-    return angles
+
+def set_scale_keys(target, keyframes, base_scale=(1.0, 1.0, 1.0)):
+    """
+    Function animates the scale of given object by creating the given keyframes.
+
+    :param target:  String - Name of an object which scale will be animated
+    :param keyframes: Python list - Keyframes that will be created: [[float scale (1 = 100%), float frame] ...]
+    :param base_scale: tuple - x, y, z scale multiplied by the values of keys (e.g. the scale of the rest transform,
+    which keys replace)
+    """
+
+    from scenekit import keytable
+
+    times = [keyframe[1] for keyframe in keyframes]
+    scales = [[float(keyframe[0]) * axis_scale for keyframe in keyframes] for axis_scale in base_scale]
+    with keytable.collect(flush_keys) as table:  # Keys are written to the scene at the end of the step
+        table.add_keys(target, 'scale', times, scales)
 
 
 def set_position_keys(target, keyframes):
     """
     Function animates the position of given object by creating the given keyframes.
 
-    :param target:  String - Name of an object which scale will be animated
-    :param keyframes: Python list - Keyframes that will be created: [[int time, [float x, float y, float z]], ...]
+    :param target:  String - Name of an object which position will be animated
+    :param keyframes: Python list - Keyframes that will be created: [[[float x, float y, float z], float frame], ...]
+    """
+
+    from scenekit import keytable
+
+    times = [keyframe[1] for keyframe in keyframes]
+    positions = [[keyframe[0][axis] for keyframe in keyframes] for axis in range(3)]
+    with keytable.collect(flush_keys) as table:
+        table.add_keys(target, 'position', times, positions)
+
+
+# Attributes and types of animation curves of the channels of scenekit.keytable, and functions that convert
+# values given in units of the scene to internal units stored by curves (centimeters, radians)
+MAYA_CHANNELS = {'position': (['translateX', 'translateY', 'translateZ'], oma.MFnAnimCurve.kAnimCurveTL,
+                              om.MDistance.uiToInternal),
+                 'rotation': (['rotateX', 'rotateY', 'rotateZ'], oma.MFnAnimCurve.kAnimCurveTA,
+                              om.MAngle.uiToInternal),
+                 'scale': (['scaleX', 'scaleY', 'scaleZ'], oma.MFnAnimCurve.kAnimCurveTU, float)}
+# Time units of Maya for frame rates of scenekit.timebase.FPS
+MAYA_TIME_UNITS = {24: 'film', 25: 'pal', 30: 'ntsc', 48: 'show', 50: 'palf', 60: 'ntscf'}
+# Tangent types in the order of scenekit.keytable: smooth, linear, step, fast, slow, custom, flat, plateau
+MAYA_TANGENTS = [oma.MFnAnimCurve.kTangentSmooth, oma.MFnAnimCurve.kTangentLinear, oma.MFnAnimCurve.kTangentStep,
+                 oma.MFnAnimCurve.kTangentFast, oma.MFnAnimCurve.kTangentSlow, oma.MFnAnimCurve.kTangentFixed,
+                 oma.MFnAnimCurve.kTangentFlat, oma.MFnAnimCurve.kTangentPlateau]
+
+
+def flush_keys(table):
     """
+    Function writes the keys collected by a step of the script to the scene, one set_keys() call per animation curve.
 
-    for keyframe in keyframes:  # For every keyframe from the list of keyframes scale object at proper time
-        cmds.setKeyframe(target, attribute='translateX', v=keyframe[0][0], time=keyframe[1], itt="fast", ott="fast")
-        cmds.setKeyframe(target, attribute='translateY', v=keyframe[0][1], time=keyframe[1], itt="fast", ott="fast")
-        cmds.setKeyframe(target, attribute='translateZ', v=keyframe[0][2], time=keyframe[1], itt="fast", ott="fast")
+    :param table: scenekit.keytable.KeyTable - Collected keys
+    """
+
+    for curve in table.curves():
+        attributes, curve_type, to_internal = MAYA_CHANNELS[curve.property_name]
+        set_keys(curve.target, [attributes[curve.axis]], curve.times,
+                 [[to_internal(value) for value in curve.values]], curve_type, curve.in_tangents, curve.out_tangents)
 
 
-def create_object(verts_pos, face_verts):
+def set_keys(target, attributes, times, values, curve_type, in_tangents=None, out_tangents=None):
+    """
+    Function creates keyframes of attributes of the object, with "fast" tangents by default.
+    Instead of a cmds.setKeyframe() call for every key of every attribute, all keys of an attribute are added to its
+    animation curve with one MFnAnimCurve.addKeys() call. The curve is created if the attribute is not animated yet,
+    otherwise the keys are merged with the existing ones. Changes are not recorded in the undo queue.
+
+    :param target: String - Name of an object which attributes will be animated
+    :param attributes: Python list - Names of attributes, e.g. ['scaleX', 'scaleY', 'scaleZ']
+    :param times: Python list - Frames of keyframes (see scenekit.timebase), the same for all attributes
+    :param values: Python list - List of values of keyframes for every attribute, in internal units
+    :param curve_type: int - Type of created curves: oma.MFnAnimCurve.kAnimCurveTL (distance),
+    oma.MFnAnimCurve.kAnimCurveTU (no unit) etc.
+    :param in_tangents: Python list - Type of the in tangent of every key, as numbers of scenekit.keytable
+    (see MAYA_TANGENTS)
+    :param out_tangents: Python list - Type of the out tangent of every key
     """
-    Function creates an object with mesh given by vertice and face data.
 
-    :type face_verts: Python list
-    :type verts_pos: Python list
+    from scenekit import timebase
+
+    in_tangents = [MAYA_TANGENTS[tangent] for tangent in in_tangents or [3] * len(times)]  # 3 - fast
+    out_tangents = [MAYA_TANGENTS[tangent] for tangent in out_tangents] if out_tangents else in_tangents
+    # Frames of the scripts are converted to seconds, so keys do not depend on the time unit of the scene
+    mtimes = om.MTimeArray([om.MTime(seconds, om.MTime.kSeconds) for seconds in timebase.convert(times, 'seconds')])
+    for attribute, attribute_values in zip(attributes, values):
+        plug = om.MSelectionList().add(target + '.' + attribute).getPlug(0)
+        curves = oma.MAnimUtil.findAnimation(plug)
+        curve_fn = oma.MFnAnimCurve()
+        if len(curves):
+            curve_fn.setObject(curves[0])
+        else:
+            curve_fn.create(plug, curve_type)
+        curve_fn.addKeys(mtimes, om.MDoubleArray(attribute_values), in_tangents[0], out_tangents[0],
+                         True)  # Keep the existing keys
+        if len(set(in_tangents)) > 1 or len(set(out_tangents)) > 1:  # Keys with other tangents are changed one by one
+            for mtime, in_tangent, out_tangent in zip(mtimes, in_tangents, out_tangents):
+                index = curve_fn.find(mtime)
+                curve_fn.setInTangentType(index, in_tangent)
+                curve_fn.setOutTangentType(index, out_tangent)
+
+
+def as_list(values):
+    """
+    Function converts a buffer of numbers (NumPy array, memoryview, array.array or list) to a Python list.
+    OpenMaya arrays are created from a Python list with a single call.
+
+    :param values: sequence of numbers
+    :rtype : list
+    """
+
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+def create_object(positions, face_counts, face_connects, soften_edges=True, uvs=None, face_groups=None):
+    """
+    Function creates an object with mesh given by vertice and face data.
+    Data is passed as flat arrays, the same that are stored in *.pmesh files, so every OpenMaya array is built
+    with one call instead of appending elements one by one.
+
+    :param positions: sequence of floats - x, y, z of every vertex, one after another (Z axis points up)
+    :param face_counts: sequence of ints - Number of vertices of every face. Faces can have any number of vertices.
+    :param face_connects: sequence of ints - Vertex numbers of all faces, one after another
+    :param soften_edges: bool - Soften the edges with angle between faces smaller than 30 degrees
+    (see set_soft_edges()). With False all edges are hard.
+    :param uvs: sequence of floats - u, v of every corner of every face (in the order of face_connects) or None
+    :param face_groups: sequence of ints - Smoothing group of every face (0 - no group), e.g. read from an OBJ file.
+    Edges between faces of the same group are soft, soften_edges is not used.
     """
 
     shark_mesh = om.MObject()
-    points = om.MFloatPointArray()  # An array that is storing positions od vertices. Do not include id of vertices
-
-    for vert in verts_pos:  # add every point to Maya float points array
-        p = om.MFloatPoint(vert[0], vert[2], -vert[1])
-        points.append(p)
-
-    face_connects = om.MIntArray()  # an array for vertice numbers per face.
-    face_counts = om.MIntArray()  # an array for total number of vertices per face
-    for verts in face_verts:
-        # In Maya mesh is created on a base of two arrays: list of vertice numbers and list of numbers of vertices
-        # of faces. Vertice numbers from the first list are not grouped by faces, this is just a one dimension array.
-        # Based on this list only it would be impossible to recreate mesh, because number of vertices in faces may vary
-        # (in this example every face have 3 vertices, but this is not obligatory).
-        #  The second array stores the number of vertices of faces. From this list Mata gets a number of vertices of a
-        # face, let's call it N, then assigns next N vertices to this face. The process is repeated for every face.
-
-        face_connects.append(verts[0])  # Append vertices of face.
-        face_connects.append(verts[1])
-        face_connects.append(verts[2])
-        face_counts.append(len(verts))  # append the number of vertices for this face
+    mesh_data = (as_list(positions), as_list(face_counts), as_list(face_connects))  # Used to calculate soft edges
+
+    # Data is saved with the Z axis pointing up, Maya uses the Y axis: (x, y, z) -> (x, z, -y)
+    positions = mesh_data[0]
+    points = om.MFloatPointArray([(x, z, -y) for x, y, z in zip(positions[0::3], positions[1::3], positions[2::3])])
+
+    # In Maya mesh is created on a base of two arrays: list of vertice numbers and list of numbers of vertices
+    # of faces. Vertice numbers from the first list are not grouped by faces, this is just a one dimension array.
+    # Based on this list only it would be impossible to recreate mesh, because number of vertices in faces may vary.
+    # The second array stores the number of vertices of faces. From this list Maya gets a number of vertices of a
+    # face, let's call it N, then assigns next N vertices to this face. The process is repeated for every face.
+    face_connects = om.MIntArray(mesh_data[2])  # an array for vertice numbers per face.
+    face_counts = om.MIntArray(mesh_data[1])  # an array for total number of vertices per face
+
     mesh_fs = om.MFnMesh()
-    mesh_fs.create(points, face_counts, face_connects, parent=shark_mesh)
-    mesh_fs.updateSurface()
+    if uvs is None:
+        mesh_fs.create(points, face_counts, face_connects, parent=shark_mesh)
+    else:  # Every corner of every face has its own texture coordinates, so the corners use them one by one
+        uvs = as_list(uvs)
+        mesh_fs.create(points, face_counts, face_connects, om.MFloatArray(uvs[0::2]), om.MFloatArray(uvs[1::2]),
+                       parent=shark_mesh)
+        mesh_fs.assignUVs(face_counts, om.MIntArray(range(len(face_connects))))
     node_name = mesh_fs.name()
-    cmds.polySoftEdge(node_name, a=30, ch=1)  # Automatically soften the edges of the mesh
+    if soften_edges or face_groups is not None:  # Soften the edges of the mesh, without a polySoftEdge history node
+        set_soft_edges(mesh_fs, *mesh_data, face_groups=face_groups)
+    mesh_fs.updateSurface()
 
     # assign new mesh to default shading group
     cmds.sets(node_name, e=True, fe='initialShadingGroup')
@@ -336,31 +555,179 @@ def create_object(verts_pos, face_verts):
     #  Most functions need a Transform node. Ths line returns it.
 
 
-def create_palm(diameter, segs_num, leafs_num, bending, id_num, anim_start, anim_end):
+def set_soft_edges(mesh_fs, positions, face_counts, face_connects, angle=30, face_groups=None):
+    """
+    Function sets soft and hard edges of the mesh. It does the same as cmds.polySoftEdge(), but the edges are
+    calculated by the scenekit.meshedges module (the same as in other scripts) and no history node is created.
+    Maya numbers the edges in its own way, so they are matched by their vertices.
+
+    :param mesh_fs: om.MFnMesh - The mesh
+    :param positions: sequence of floats - x, y, z of every vertex
+    :param face_counts: sequence of ints - Number of vertices of every face
+    :param face_connects: sequence of ints - Vertex numbers of all faces
+    :param angle: float - Edges with smaller angle between faces are soft (degrees)
+    :param face_groups: sequence of ints - Smoothing group of every face, edges between groups are hard. None - angle
+    is used.
     """
-    Function creates a single palm tree.
-    This function was created to show how to create basic geometry objects, use instances and use modifications.
 
-    :param diameter: float - inner diameter of pine
-    :param segs_num: int - number of segments of the pine
-    :param leafs_num: int - number of leafs
-    :param bending: float - how much bended the pine is
-    :param id_num: int - ID of the tree
-    :param anim_start: int - Starting frame of the tree animation
-    :param anim_end: int - Ending frame of the tree animation
+    from scenekit import meshedges
+
+    mesh_edges = meshedges.compute_edges(positions, face_counts, face_connects, smooth_angle=angle,
+                                         face_groups=face_groups)
+    maya_edges = []  # Vertices of edges in Maya order, read from the mesh without parsing the text of polyInfo
+    for edge in range(mesh_fs.numEdges):
+        maya_edges.extend(mesh_fs.getEdgeVertices(edge))
+    smooth = [bool(mesh_edges.smooth[number]) for number in mesh_edges.edge_numbers(maya_edges)]
+    mesh_fs.setEdgeSmoothings(om.MIntArray(range(len(smooth))), smooth)  # All edges are set with one call
+    mesh_fs.cleanupEdgeSmoothing()
+
+
+LOD_PRE_MEL = ('for ($shape in `ls -type mesh`) if (`attributeQuery -exists -node $shape "lodHiddenInViewport"`) '
+               'setAttr ($shape + ".lodVisibility") 1;')
+LOD_POST_MEL = ('for ($shape in `ls -type mesh`) if (`attributeQuery -exists -node $shape "lodHiddenInViewport"`) '
+                'setAttr ($shape + ".lodVisibility") (!`getAttr ($shape + ".lodHiddenInViewport")`);')
+
+
+def add_render_mel(attribute, script):
+    """
+    Function adds the MEL script to a render script of render globals, after the scripts that are already there.
+    The script is added only once.
+
+    :param attribute: string - Attribute of defaultRenderGlobals, e.g. 'preMel'
+    :param script: string - MEL script
+    """
+
+    current = cmds.getAttr('defaultRenderGlobals.' + attribute) or ''
+    if script not in current:
+        cmds.setAttr('defaultRenderGlobals.' + attribute, (current + ' ' if current else '') + script, type='string')
+
+
+def remove_render_mel(attribute, script):
+    """
+    Function removes the MEL script added by add_render_mel(), so the render script is the same as before.
+
+    :param attribute: string - Attribute of defaultRenderGlobals, e.g. 'preMel'
+    :param script: string - MEL script
+    """
+
+    current = cmds.getAttr('defaultRenderGlobals.' + attribute) or ''
+    cmds.setAttr('defaultRenderGlobals.' + attribute, current.replace(' ' + script, '').replace(script, ''),
+                 type='string')
+
+
+def create_lods(transform, mesh_data, ratios=None, soften_edges=True, cache_dir=None):
+    """
+    Function creates levels of detail (LOD) of the object. Meshes simplified by the scenekit.decimate module are added
+    as next shapes of the same transform node, so they follow its animation and get its material.
+    Shapes of levels of detail are not rendered, they are shown in the viewport instead of the full mesh
+    (see set_viewport_lod()), so the playback of the scene is faster. The full mesh is shown for rendering by
+    a pre render MEL script of render globals and hidden again by a post render script. The scripts are added
+    to the render scripts of the scene, remove_lods() restores them.
+
+    :param transform: string - Transform node of the object with the full mesh
+    :param mesh_data: scenekit.meshpack.PackedMesh - The full mesh of the object
+    :param ratios: sequence of floats - Number of faces of every level relative to the full mesh
+    (scenekit.decimate.LOD_RATIOS by default)
+    :param soften_edges: bool - Soften the edges of levels of detail (see create_object())
+    :param cache_dir: string - Directory where decimated levels are saved and loaded by the next runs, None - no cache
+    :return: Python list - Names of shape nodes of the levels of detail, from the most detailed one
+    """
+
+    from scenekit import decimate
+
+    full_shape = cmds.listRelatives(transform, shapes=True, fullPath=True, noIntermediate=True)[0]
+    cmds.addAttr(full_shape, longName='lodHiddenInViewport', attributeType='bool')
+
+    shapes = []
+    name = transform.split('|')[-1]
+    for level, lod_mesh in enumerate(decimate.build_lods(mesh_data, ratios or decimate.LOD_RATIOS, cache_dir), 1):
+        lod_transform = create_object(lod_mesh.positions, lod_mesh.face_counts, lod_mesh.face_indices,
+                                      soften_edges=soften_edges)[0]
+        lod_shape = cmds.listRelatives(lod_transform, shapes=True, fullPath=True)[0]
+        lod_shape = cmds.parent(lod_shape, transform, shape=True, relative=True)[0]  # Move the shape to the object
+        cmds.delete(lod_transform)
+        lod_shape = cmds.rename(lod_shape, '%sLod%dShape' % (name, level))
+        cmds.addAttr(lod_shape, longName='lodLevel', attributeType='long', defaultValue=level)
+        for attribute in ['primaryVisibility', 'castsShadows', 'receiveShadows', 'visibleInReflections',
+                          'visibleInRefractions']:
+            cmds.setAttr(lod_shape + '.' + attribute, False)  # Levels of detail are invisible for the renderer
+        shapes.append(lod_shape)
+
+    # The scripts are saved in the scene, so they work also for batch rendering
+    add_render_mel('preMel', LOD_PRE_MEL)
+    add_render_mel('postMel', LOD_POST_MEL)
+    set_viewport_lod(transform, 1)
+    return shapes
+
+
+def remove_lods(transform):
+    """
+    Function deletes the levels of detail created by create_lods() and shows the full mesh. When no object has levels
+    of detail any more, render scripts of render globals are restored.
+
+    :param transform: string - Transform node of the object with levels of detail
+    """
+
+    for shape in cmds.listRelatives(transform, shapes=True, fullPath=True, noIntermediate=True) or []:
+        if cmds.attributeQuery('lodLevel', node=shape, exists=True):
+            cmds.delete(shape)
+        elif cmds.attributeQuery('lodHiddenInViewport', node=shape, exists=True):
+            cmds.deleteAttr(shape + '.lodHiddenInViewport')
+            cmds.setAttr(shape + '.lodVisibility', True)
+    if not [shape for shape in cmds.ls(type='mesh') if cmds.attributeQuery('lodHiddenInViewport', node=shape,
+                                                                           exists=True)]:
+        remove_render_mel('preMel', LOD_PRE_MEL)
+        remove_render_mel('postMel', LOD_POST_MEL)
+
+
+def set_viewport_lod(transform, level):
+    """
+    Function selects the level of detail shown in the viewport. Other levels and the full mesh are hidden.
+
+    :param transform: string - Transform node of the object with levels of detail created by create_lods()
+    :param level: int - Level of detail, 0 shows the full mesh
+    """
+
+    for shape in cmds.listRelatives(transform, shapes=True, fullPath=True, noIntermediate=True) or []:
+        if cmds.attributeQuery('lodLevel', node=shape, exists=True):
+            cmds.setAttr(shape + '.lodVisibility', cmds.getAttr(shape + '.lodLevel') == level)
+        elif cmds.attributeQuery('lodHiddenInViewport', node=shape, exists=True):
+            cmds.setAttr(shape + '.lodHiddenInViewport', level != 0)
+            cmds.setAttr(shape + '.lodVisibility', level == 0)
+
+
+def create_shared_mesh(mesh_data, name):
+    """
+    Function creates a mesh that will be shared by other objects: its shape is instanced under their transform nodes
+    (cmds.parent(shape, transform, shape=True, add=True)), so the scene has only one copy of the mesh data.
+    The transform node of the mesh is hidden, so the mesh is not displayed and not rendered in the origin.
+
+    :param mesh_data: scenekit.meshpack.PackedMesh - Vertex and face data
+    :param name: str - Name of the transform node of the mesh
+    :return: str - Full name of the shape node
     """
 
-    keyframe_interval = (anim_end - anim_start) / (segs_num + 1.0)  # interval of scale keyframes of the pine segments
+    transform = cmds.rename(create_object(mesh_data.positions, mesh_data.face_counts, mesh_data.face_indices)[0], name)
+    cmds.setAttr(transform + '.visibility', False)  # Hides only this instance of the shape
+    return cmds.listRelatives(transform, shapes=True, fullPath=True)[0]
 
-    anim_start /= 25.0  # Convert frames to the time
-    anim_end /= 25.0  # Need to convert now, because the number of segments is probably
-    keyframe_interval /= 25.0  # grater then the number of frames between the start and the end o the animation of tree
 
-    # list of times of keyframes for the pine
-    # and leafs. Equal time intervals.
-    keyframe_list = list(frange(start=anim_start, end=anim_end, jump=keyframe_interval))
+def create_palm(palm_layout, palm, id_num, leaf_mesh):
+    """
+    Function creates a single palm tree. Transforms and keys of its segments and leafs are computed for all the palms
+    at once by scenekit.palms.layout(), this function only creates the nodes and applies them.
+    This function was created to show how to create basic geometry objects, use instances and use modifications.
+
+    :param palm_layout: scenekit.palms.PalmLayout - Transforms and keys of the palms
+    :param palm: int - Number of the palm in the layout
+    :param id_num: int - ID of the tree
+    :param leaf_mesh: scenekit.meshpack.PackedMesh - Vertex and face data of the leaf
+    """
 
-    keyframe_list.reverse()  # Because the pop() will be used and the first frame should be the smallest number
+    from scenekit import meshregistry, palms
+
+    diameter = palm_layout.palms[palm].diameter
+    segment_rows, leaf_rows = palms.palm_rows(palm_layout, palm)
 
     source_segment = 'segment_original'  # Create an object that will be instanced
     cmds.polyCone(r=diameter / 2, h=-diameter * 8, n=source_segment, subdivisionsY=5)  # Create a cone. Cone will have a
@@ -376,23 +743,20 @@ def create_palm(diameter, segs_num, leafs_num, bending, id_num, anim_start, anim
     cmds.xform(source_segment, piv=bottom_of_mesh, ws=True)
 
     segments_tab = []  # A list of all the segments of the tree.
-    for i in xrange(segs_num):
-        cmds.refresh(f=True)
+    for i, row in enumerate(segment_rows):
+        refresh()
         # Create segments of pine of the palm tree
 
         current_segment_name = 'Palm_element_' + str(id_num) + '_' + str(i)
         cmds.instance('segment_original', n=current_segment_name)  # Create an instance with segment geometry
-        cmds.move(diameter * i, current_segment_name, moveY=True, absolute=True)
-        # Every node should be diameter higher then last one
-
-        # The nodes at the top of the tree should be smaller then those at the bottom:
-        cmds.scale(1.0 - (i / (segs_num * 4.0)), 1.0 - (i / (segs_num * 4.0)), 1, current_segment_name)
+        # Every node is placed on the bent axis of the trunk and the nodes at the top of the tree are smaller then
+        # those at the bottom. Segments are parented relatively later, so the matrix is already the one relative to
+        # the root.
+        cmds.xform(current_segment_name, objectSpace=True, matrix=list(palm_layout.segment_matrices[row]))
         segments_tab.append(pm.PyNode(current_segment_name))  # Append to the nodes table
-        anim_start_frame = keyframe_list.pop()  # Pop one time from the keyframe times list
-        set_scale_keys(target=current_segment_name, keyframes=[[0.001, str(anim_start_frame) + 'sec'],
-                                                               [1.2, str(anim_start_frame + keyframe_interval) + 'sec'],
-                                                               [1,
-                                                                str(anim_start_frame + 2 * keyframe_interval) + 'sec']])
+        set_scale_keys(target=current_segment_name,
+                       keyframes=list(zip(palms.SEGMENT_SCALES, palm_layout.segment_key_times[row])),
+                       base_scale=palms.matrix_scale(palm_layout.segment_matrices[row]))
 
     cmds.delete(source_segment)  # Delete the source object, instance will not be removed
     root = segments_tab[0]
@@ -400,69 +764,31 @@ def create_palm(diameter, segs_num, leafs_num, bending, id_num, anim_start, anim
         # Parent every segment to the root node.
         pm.parent(current_segment, root, relative=True)  # Using PyMel here to make managing ocjects easier
         # (long object names vchange after parenting, PyMel manages them better)
+    index_nodes('segment', [segment.longName() for segment in segments_tab])
 
     # The leaf will be created from saved vertex data in a similar way to cloud.
-
-    verts_list = [[0.0874634, 0.283682, -0.150049], [-9.33334, 3.45312, -5.19915], [-0.0979366, -0.242619, -0.151449],
-                  [0.0756626, 0.288981, 0.00435066], [-0.110037, -0.237219, 0.00305176],
-                  [-0.0341358, 0.0332813, 0.222252], [-0.046236, 0.0384817, 0.376751], [-2.00844, -0.0782185, -0.04245],
-                  [-1.49184, 1.38118, -0.0476494], [-1.51604, 1.39538, 0.200851], [-2.03964, -0.0789185, 0.205851],
-                  [-1.79314, 0.661982, 0.356852], [-8.51614, 2.95795, -3.08655], [-8.65224, 1.73258, -3.67535],
-                  [-7.77134, 3.93545, -3.64315], [-7.89874, 3.98053, -3.41335], [-8.77254, 1.77508, -3.43515],
-                  [-8.38964, 2.89923, -3.33135], [-1.81954, 0.668982, 0.60585], [-5.86674, 0.829681, -0.820549],
-                  [-5.03134, 3.19562, -0.787249], [-5.10854, 3.23514, -0.531349], [-5.94654, 0.870181, -0.570749],
-                  [-5.56024, 2.07138, -0.438848], [-5.63774, 2.11408, -0.182249], [-7.35774, 1.29268, -2.00885],
-                  [-6.54364, 3.59313, -1.90675], [-6.65514, 3.64373, -1.65775], [-7.46144, 1.34048, -1.75845],
-                  [-7.10164, 2.51205, -1.60085], [-3.83754, 1.37038, 0.50765], [-4.09794, 0.257582, -0.106649],
-                  [-3.33404, 2.40815, -0.13835], [-3.38054, 2.42888, 0.109451], [-4.14974, 0.269781, 0.141151],
-                  [-3.78934, 1.35658, 0.259151], [-7.21234, 2.56052, -1.34435], [-8.70384, 4.0245, -4.67165],
-                  [-9.38574, 2.48178, -4.54065], [-9.16784, 3.28523, -4.39535], [-9.32104, 2.46601, -4.65515],
-                  [-8.76504, 4.03897, -4.55925], [-9.10294, 3.26697, -4.51255]]
-
-    faces_list = [[0, 5, 8], [3, 9, 6], [0, 8, 3], [1, 40, 38], [2, 5, 4], [5, 2, 11], [1, 38, 39], [5, 0, 6],
-                  [17, 37, 14], [15, 39, 12], [37, 41, 15], [7, 2, 10], [40, 42, 17], [10, 4, 18], [11, 32, 8],
-                  [9, 33, 18], [8, 32, 9], [13, 25, 16], [7, 31, 11], [16, 28, 12], [23, 29, 20], [21, 36, 24],
-                  [20, 27, 21], [19, 34, 22], [19, 29, 23], [22, 30, 24], [35, 20, 32], [33, 21, 30], [32, 20, 33],
-                  [25, 19, 28], [31, 19, 35], [28, 22, 36], [29, 17, 26], [27, 12, 36], [26, 15, 27], [31, 10, 34],
-                  [25, 17, 29], [34, 18, 30], [40, 13, 38], [38, 16, 12], [42, 1, 37], [41, 1, 39], [37, 1, 41],
-                  [40, 1, 42], [5, 11, 8], [9, 18, 6], [8, 9, 3], [5, 6, 4], [2, 7, 11], [0, 3, 6], [17, 42, 37],
-                  [15, 41, 39], [15, 14, 37], [2, 4, 10], [17, 13, 40], [4, 6, 18], [11, 35, 32], [33, 30, 18],
-                  [32, 33, 9], [25, 28, 16], [31, 35, 11], [28, 36, 12], [29, 26, 20], [21, 27, 36], [20, 26, 27],
-                  [19, 31, 34], [19, 25, 29], [22, 34, 30], [35, 23, 20], [21, 24, 30], [20, 21, 33], [19, 22, 28],
-                  [19, 23, 35], [22, 24, 36], [17, 14, 26], [27, 15, 12], [26, 14, 15], [31, 7, 10], [25, 13, 17],
-                  [34, 10, 18], [13, 16, 38], [12, 39, 38]]
-
-    leaf_source_name = create_object(verts_list, faces_list)  # Create the leaf object that will be instanced
-    cmds.rename(leaf_source_name, "leaf")
-
-    anim_start_frame = keyframe_list.pop()
+    # The mesh is created only once, with the first palm tree. Leafs of all of the palms are instances of its shape,
+    # so all of them share one mesh node.
+    shared_leaf = meshregistry.get_shared_mesh(leaf_mesh, create=lambda: create_shared_mesh(leaf_mesh, "leaf_shared"),
+                                               is_valid=cmds.objExists)  # The mesh could be deleted, e.g. in new scene
+    leaf_source = cmds.createNode('transform', name="leaf")  # Create the leaf object that will be instanced
+    leaf_shape = cmds.parent(shared_leaf, leaf_source, shape=True, add=True)[0]  # An instance of the shape, not a copy
+    cmds.sets(leaf_shape, e=True, fe='initialShadingGroup')
 
     last_node_name = segments_tab[-1].longName()  # Get the last element of the palm tree. It will be a parent of leafs.
-    i = 0
-    for rot_z in leafs_rotations(number_of_leafs=leafs_num):  # Leafs should be distributed around the pine.
+    for i, row in enumerate(leaf_rows):  # Leafs are distributed around the pine.
         current_leaf_name = "leaf_" + str(id_num) + '_' + str(i)
-        cmds.instance("leaf", n=current_leaf_name)
-        cmds.move(diameter * 4, current_leaf_name, moveY=True, relative=True)
-
-        cmds.rotate(random.uniform(-math.pi / 15, math.pi / 15), rot_z, random.uniform(-math.pi / 8, math.pi / 10),
-                    current_leaf_name)
+        cmds.instance(leaf_source, n=current_leaf_name)
+        cmds.xform(current_leaf_name, objectSpace=True, matrix=list(palm_layout.leaf_matrices[row]))
         set_scale_keys(target=current_leaf_name,
-                       keyframes=[[0.001, str(anim_start_frame) + "sec"],
-                                  [1, str(anim_start_frame + keyframe_interval) + "sec"]])
-        cmds.scale(0.9, 0.9, 0.9, current_leaf_name)
+                       keyframes=list(zip(palms.LEAF_SCALES, palm_layout.leaf_key_times[row])),
+                       base_scale=palms.matrix_scale(palm_layout.leaf_matrices[row]))
         cmds.parent(current_leaf_name, last_node_name, relative=True)
-        i += 1
+    # The only transforms under the last segment are the leafs
+    index_nodes('leaf', cmds.listRelatives(last_node_name, children=True, type='transform', fullPath=True))
 
-    cmds.delete("leaf")
-
-    # Now the bend modifier will be applied to the source element of a palm tree. Other elements wil be also affected
-    # because they are parented to it.
-    cmds.nonLinear(root.longName(), type='bend', after=True, curvature=2 * bending, lowBound=0)
-
-    # Rescale the handle of a modifier, it will look nicer
-    for name in cmds.ls():
-        if name.endswith('Handle'):
-            cmds.scale(60, 60, 60, name)
+    cmds.delete(leaf_source)
+    # The trunk is already bent by the transforms of the segments, so no bend deformer has to be created and evaluated
 
     return root.longName()
 
@@ -474,6 +800,10 @@ def prepare_scene(path):
     :param path: string - The directory with necessary files
     """
 
+    from scenekit import nodeindex, timebase
+
+    nodeindex.clear()  # Nodes recorded by the previous run are not in the new scene
+    cmds.currentUnit(time=MAYA_TIME_UNITS[timebase.FPS])  # The same frame rate in all of the scripts
     cmds.playbackOptions(min=0, max=260)  # Set the animation range
 
     cmds.autoKeyframe(state=False)  # Make sure, that the AutoKey button is disabled
@@ -517,12 +847,37 @@ def prepare_scene(path):
 
     cam = cmds.camera(name="RenderCamera", focusDistance=35, position=[-224.354, 79.508, 3.569],
                       rotation=[-19.999, -90, 0])  # create camera to set background (imageplane)
+    index_nodes('camera', [cam[0]])
     # Set Image Plane for camera background
     cmds.imagePlane(camera=cmds.ls(cam)[1], fileName=(path.replace("\\", "/") + '/bg.bmp'))
     cmds.setAttr("imagePlaneShape1.depth", 400)
     cmds.setAttr("imagePlaneShape1.fit", 4)
 
 
+def import_obj(file_path, lod_ratios=None):
+    """
+    Function imports an obj file. The file is read by the reader shared by all the scripts (instead of the importer
+    of Maya, cmds.file(i=True)) and every group of the file is created with create_object().
+
+    :param file_path: string - Path to the *.obj file
+    :param lod_ratios: sequence of floats - Levels of detail created for every group (see create_lods()). None - no LOD
+    :return: Python list - Names of created transform nodes, one for every group of the file
+    """
+
+    from scenekit import objcache
+
+    obj_data = objcache.load_obj(file_path)  # Parsed data is saved next to the file and reused by the next runs
+    nodes = []
+    for group in obj_data.groups:
+        mesh = obj_data.group_mesh(group)
+        node_name = create_object(mesh.positions, mesh.face_counts, mesh.face_indices, soften_edges=False,
+                                  uvs=obj_data.group_uvs(group), face_groups=obj_data.group_smoothing(group))
+        nodes.append(cmds.rename(node_name, group.name))
+        if lod_ratios:
+            create_lods(nodes[-1], mesh, lod_ratios, soften_edges=False, cache_dir=os.path.dirname(file_path))
+    return nodes
+
+
 def import_and_animate_basic_meshes(path):
     """
     This function imports some objects and animates them.
@@ -531,270 +886,41 @@ def import_and_animate_basic_meshes(path):
     :param path: string - The directory with necessary files
     """
 
-    cmds.file(path + '\water.obj', i=True)  # Import an obj file
+    from scenekit import decimate
+    from scenekit import objpool
+
+    # Parse the files that have no current cache in parallel (workers are started with mayapy, Python 3 only).
+    # Later import_obj() only loads the caches.
+    objpool.prepare_caches([os.path.join(path, 'water.obj'), os.path.join(path, 'land.obj')],
+                           python_executable=mayapy_path())
+
+    index_nodes('water', import_obj(os.path.join(path, 'water.obj')))  # Import an obj file
     set_scale_keys(target="water", keyframes=[[0.001, 1], [1, 9]])  # Set the animation keys
 
-    cmds.file(path + '\land.obj', i=True)
+    import_obj(os.path.join(path, 'land.obj'), lod_ratios=decimate.LOD_RATIOS)  # Proxy meshes for the viewport
     set_scale_keys(target="land", keyframes=[[0.001, 8], [1, 11]])
 
 
-def create_shark_and_cloud():
+def create_shark_and_cloud(path):
     """
     Creates meshes from vertex and face data.
     Two functions are used: one is easier to read an one is more useful.
     Similar functions can be used in importer plugin.
+
+    :param path: string - The directory with necessary files
     """
-    shark_verts_pos = [[-2.42281, -0.814631, 1.55561], [0.0166863, -0.854455, 1.91858], [-2.42281, -0.482041, 1.55561],
-                       [0.0166863, -0.44221, 1.91858], [-2.57592, -0.814631, 3.45857], [-1.41455, -0.810425, 3.54678],
-                       [-2.57592, -0.482041, 3.45857], [-1.41455, -0.486246, 3.54678], [-2.54367, -0.8214, -0.819357],
-                       [-2.54367, -0.475272, -0.819357], [0.422536, -0.421143, -0.277747],
-                       [0.422536, -0.875526, -0.277747]]
-    shark_face_verts = [[8, 10, 11], [4, 7, 6], [0, 5, 4], [1, 7, 5], [3, 6, 7], [2, 4, 6], [0, 9, 8], [2, 10, 9],
-                        [3, 11, 10], [1, 8, 11], [8, 9, 10], [4, 5, 7], [0, 1, 5], [1, 3, 7], [3, 2, 6], [2, 0, 4],
-                        [0, 2, 9], [2, 3, 10], [3, 1, 11], [1, 0, 8]]
+    from scenekit import meshpack
 
-    shark_node_name = create_object(shark_verts_pos, shark_face_verts)
+    shark = meshpack.load_mesh(os.path.join(path, 'shark.pmesh'))  # Vertex and face data is stored in a packed file
+    shark_node_name = create_object(shark.positions, shark.face_counts, shark.face_indices)
     cmds.rename(shark_node_name, "shark")
     set_scale_keys(target="shark", keyframes=[[0.001, 9], [1, 15]])
     cmds.move(-9.18464, -4, -54.9695, "shark", absolute=True)  # Set position
 
-    cloud_verts_pos = [[-4.59048, -11.5324, -2.85738], [4.19166, -11.3976, -1.66769], [-2.72098, 4.70308, -0.947684],
-                       [5.35751, 5.31851, -1.84713], [-2.55545, -10.6202, 1.76613], [6.33762, -11.4932, 3.83193],
-                       [-4.05797, 5.18567, 4.01239], [5.16506, 4.23825, 3.03181], [-7.57451, -3.27952, -1.45211],
-                       [-5.04695, -3.47346, -2.50455], [0.944433, 6.59175, -3.95915], [5.33078, -2.79647, -1.9336],
-                       [-1.41402, -13.436, -1.63148], [2.25454, -13.8944, 4.36555], [5.20539, -3.61147, 4.18473],
-                       [1.21982, 6.42224, 2.21349], [-5.31748, -3.30419, 3.23747], [6.47434, -13.4315, 0.369284],
-                       [-4.49047, -13.0672, -0.366047], [7.06894, 7.09671, -0.225245], [-3.55781, 7.03288, 2.01675],
-                       [-4.64846, -11.0102, -2.8238], [-5.21395, -10.2643, -2.81557], [-5.11732, -9.4053, -2.68607],
-                       [-4.63491, -8.46356, -2.67066], [-4.67857, -7.34732, -3.28498], [-4.66886, -6.0801, -2.95555],
-                       [-4.96425, -4.77316, -3.20924], [-3.07051, 4.22094, -1.27774], [-3.28412, 3.47717, -1.22602],
-                       [-3.06383, 2.42297, -1.70111], [-4.21875, 1.15586, -2.44524], [-4.59185, 0.108139, -1.878],
-                       [-4.55174, -1.04221, -2.62517], [-5.07763, -2.24332, -2.5385], [-2.5496, 5.2281, -1.08924],
-                       [-2.47412, 5.97114, -1.56816], [-2.32934, 6.64407, -2.13384], [-1.81588, 6.7158, -2.66064],
-                       [-1.09603, 6.51815, -3.1696], [-0.384585, 6.59353, -3.55172], [0.2763, 6.63422, -3.91024],
-                       [4.97608, 5.33017, -2.21633], [4.42463, 5.3988, -2.82698], [3.87665, 5.59257, -3.30965],
-                       [3.39066, 6.12778, -3.09912], [2.87637, 6.75938, -2.90991], [2.28094, 6.88389, -3.07711],
-                       [1.62215, 6.6081, -3.54207], [5.6303, 4.88423, -1.69767], [5.93795, 4.18237, -2.02055],
-                       [6.34299, 3.28777, -2.50259], [6.01454, 2.16795, -2.41291], [5.48294, 0.915054, -1.48493],
-                       [5.56809, -0.331761, -1.62049], [5.22757, -1.57047, -1.65198], [4.34654, -10.8263, -1.71773],
-                       [4.03986, -10.0871, -1.25091], [4.44435, -9.26752, -1.48684], [4.98975, -8.10985, -2.09718],
-                       [5.97541, -6.66577, -2.29159], [6.40411, -5.31424, -1.4463], [5.74385, -4.03539, -2.07227],
-                       [3.67823, -11.9509, -1.39023], [2.99699, -12.6519, -1.24017], [2.34207, -12.9799, -1.36114],
-                       [1.56308, -12.9821, -1.2517], [0.805849, -13.3548, -0.833223], [0.0592078, -13.9428, -0.927655],
-                       [-0.69599, -13.9633, -1.40722], [-4.48329, -11.8284, -3.03768], [-4.25605, -12.4004, -3.18883],
-                       [-3.80349, -12.8516, -3.39871], [-3.33853, -12.9033, -3.36947], [-2.8886, -12.6499, -2.84013],
-                       [-2.44545, -12.7983, -2.31099], [-1.98028, -12.9664, -1.95086], [-2.35827, -11.0242, 1.95376],
-                       [-2.04212, -11.8418, 2.40821], [-1.43451, -12.5864, 2.6025], [-0.464936, -12.8909, 2.70888],
-                       [0.277662, -13.0811, 3.36934], [0.744878, -13.5168, 3.99864], [1.39473, -13.9213, 4.33037],
-                       [5.84659, -11.8736, 4.11287], [5.35056, -12.4986, 4.28095], [4.93181, -13.3184, 4.37555],
-                       [4.62338, -14.1254, 4.68631], [4.25795, -14.4315, 4.95028], [3.74167, -14.2483, 4.93854],
-                       [3.06639, -13.9383, 4.62452], [6.93981, -10.9459, 3.54401], [6.81082, -10.1381, 3.49907],
-                       [5.67307, -9.16372, 4.27475], [5.07461, -8.06029, 4.44253], [5.59865, -6.89624, 3.44476],
-                       [5.71477, -5.76001, 4.10377], [5.43378, -4.68175, 4.73674], [5.26349, 3.76686, 2.83477],
-                       [5.03478, 3.10254, 2.51034], [5.60882, 2.3842, 2.96899], [5.28509, 1.44248, 4.19756],
-                       [5.06031, 0.227875, 4.11658], [5.74926, -1.10308, 4.13182], [5.23316, -2.41592, 4.08796],
-                       [4.77104, 4.2432, 2.87455], [4.26316, 4.37717, 2.64462], [3.77346, 4.88327, 2.60995],
-                       [3.33051, 5.59131, 2.87838], [2.8952, 5.78294, 3.20531], [2.40009, 5.74118, 3.04044],
-                       [1.83982, 6.00027, 2.49207], [-3.6252, 5.55577, 4.01007], [-3.01992, 5.85201, 3.70423],
-                       [-2.42564, 5.92598, 3.42756], [-1.77262, 6.08702, 3.08948], [-1.00918, 6.32267, 2.76293],
-                       [-0.205574, 6.30027, 2.54408], [0.543592, 6.39312, 2.26653], [-4.3646, 4.48682, 3.61868],
-                       [-4.17321, 3.39143, 3.43435], [-4.33876, 2.23708, 3.90402], [-4.28137, 1.23009, 3.54935],
-                       [-5.12764, 0.0918598, 3.99807], [-5.19081, -1.02315, 3.43132], [-5.29362, -2.11191, 2.91219],
-                       [-2.60726, -10.127, 2.17327], [-3.51078, -9.45301, 2.9977], [-3.79006, -8.71694, 3.36178],
-                       [-4.10539, -7.95529, 2.76918], [-4.42019, -6.85349, 2.78951], [-4.84402, -5.52935, 2.81615],
-                       [-5.09285, -4.46128, 3.52657], [4.30574, -11.5671, -1.50565], [4.50195, -11.8334, -1.25188],
-                       [4.83568, -12.1377, -0.98148], [5.20644, -12.408, -0.722621], [5.55156, -12.5921, -0.461673],
-                       [5.89193, -12.7367, -0.20753], [6.24181, -12.9731, 0.0607195], [6.29933, -11.7357, 3.70063],
-                       [6.30325, -12.1743, 3.31666], [6.22233, -12.6801, 2.81164], [5.95056, -13.1009, 2.2757],
-                       [5.81332, -13.7173, 1.74536], [6.03473, -14.0856, 1.23336], [6.39401, -13.9265, 0.764305],
-                       [-3.11063, -10.9355, 1.50183], [-3.75236, -11.6171, 1.07977], [-4.00088, -12.4831, 0.713789],
-                       [-3.78955, -13.2201, 0.516292], [-3.5181, -13.5544, 0.376321], [-3.54252, -13.4297, 0.189794],
-                       [-3.90938, -13.1606, -0.068965], [-4.75366, -11.8561, -2.68642], [-4.89771, -12.3524, -2.40486],
-                       [-5.09703, -12.9067, -2.14409], [-5.40772, -13.3663, -1.91872], [-5.6412, -13.5851, -1.59908],
-                       [-5.5659, -13.5145, -1.1818], [-5.09332, -13.2428, -0.743286], [5.45017, 5.73622, -1.85555],
-                       [5.63365, 6.26245, -1.85505], [6.1073, 6.76594, -1.94462], [6.58044, 7.20559, -1.85469],
-                       [6.88931, 7.53961, -1.51406], [7.10716, 7.66078, -1.04544], [7.19471, 7.51389, -0.59239],
-                       [5.40772, 4.66524, 3.02514], [5.76931, 5.01291, 2.65931], [6.14507, 5.2088, 2.16144],
-                       [6.27824, 5.38063, 1.43376], [6.17431, 5.62542, 0.759444], [6.24094, 5.98304, 0.33088],
-                       [6.67544, 6.4994, 0.0532598], [-2.6477, 4.65851, -0.662931], [-2.71723, 4.72583, -0.337669],
-                       [-3.02974, 5.03001, 0.0133729], [-3.55156, 5.4128, 0.457088], [-4.08555, 5.6588, 0.878288],
-                       [-4.20689, 6.06137, 1.27083], [-3.94135, 6.61804, 1.64613], [-3.90152, 5.41826, 3.96519],
-                       [-3.68639, 5.69672, 3.7975], [-3.57372, 5.96746, 3.6043], [-3.50975, 6.24396, 3.36952],
-                       [-3.38908, 6.56161, 3.08272], [-3.23099, 6.92618, 2.74989], [-3.27483, 7.14141, 2.38829],
-                       [1.45619, -7.49005, -3.83906], [-2.15714, 3.22855, 4.74324], [-3.20732, -16.3363, 0.593722],
-                       [8.50918, 6.1379, -0.126037], [-1.3075, 10.5179, 0.0826635], [6.66269, -11.5952, 0.976294],
-                       [6.18407, -10.885, 3.95382], [4.6369, -16.5258, 3.13471], [-6.47456, -10.6289, -2.18081],
-                       [-2.82653, 6.85526, 3.372], [-2.65245, 4.26594, -0.23955], [6.45967, -11.2423, 3.81836],
-                       [1.33039, -11.5956, 4.72251], [1.30475, 4.5572, -3.30185], [8.00107, -6.69582, 2.12858],
-                       [4.57166, 6.984, 2.49627], [-3.24572, -12.1366, -3.56982], [5.3204, 6.36013, -2.56745],
-                       [-3.11957, 7.73189, 2.69959], [6.77177, 0.0625889, 4.49272], [6.94192, -4.53513, -1.62334],
-                       [7.13623, 2.29023, 2.48835], [-5.82156, -11.0413, 0.905474], [-1.63365, -0.816481, -2.63599],
-                       [-3.79753, -3.1284, 4.1384], [-6.72222, 2.34786, 1.69348], [-0.365939, -17.3946, 3.7759],
-                       [-2.86998, 8.92864, -2.32206], [-1.19507, -7.54906, -2.6852], [4.65156, 2.46804, -4.03467],
-                       [3.35007, -14.7047, 0.201495], [1.6206, 3.8501, 3.19007], [2.27385, 10.1786, 0.636264],
-                       [-0.511457, -9.4981, 5.60078], [1.90472, -3.64936, 4.72947], [-3.64124, -14.7226, 1.98156],
-                       [0.714248, -11.7933, -1.52495], [-7.27783, -2.97639, 1.02711], [0.0551114, -15.631, 0.740704],
-                       [4.08346, -6.60669, 4.23111], [-3.96676, -3.6568, -3.18453], [0.128981, -15.0967, 4.90768],
-                       [5.1814, -0.697958, -2.3693], [-2.24666, 3.46083, -1.55516], [-1.03731, 9.80536, -2.4258],
-                       [2.76201, 7.5254, -2.57689], [-3.21442, 0.849207, -3.77201], [-4.5522, 4.79028, 3.52668],
-                       [-4.2064, -13.7668, -2.8477], [7.41965, 0.205489, 0.882005], [-7.04821, -1.17492, -1.75941],
-                       [7.28529, -10.4271, 2.98472], [7.00561, -4.39045, 2.97423], [2.43302, 1.91306, 4.44534],
-                       [2.09039, -17.1687, 0.520695], [-3.27282, 1.6396, 3.67241], [-6.87723, -7.81655, 0.412325],
-                       [5.25677, 8.8326, 0.858971], [-1.28577, -11.2257, 2.07694], [0.805838, 8.11066, 0.90506],
-                       [-0.46974, -2.74816, 4.81187], [-3.06642, 7.51852, -0.246379], [4.55288, 2.79781, 2.29269],
-                       [4.04536, -8.45291, -2.82363], [-1.69131, -8.69729, 4.54945], [7.44942, 3.06384, -0.812776],
-                       [-0.375084, 2.10788, -3.87666], [-2.33075, -13.1125, 1.34638], [3.73976, -15.1661, 5.22367],
-                       [-4.13958, -10.4225, 1.48909], [-6.57359, -4.40388, -2.5274], [-1.19156, -17.5279, 2.70367],
-                       [1.48849, 0.940755, -3.11198], [-6.25666, -8.51528, -2.26368], [5.42219, -14.6917, 0.904344],
-                       [-5.30033, 2.91069, 2.77322], [-3.69181, 5.1199, 4.16583], [5.23465, -10.0999, -0.279651],
-                       [3.30916, -9.50085, 4.15144], [6.64312, -7.95079, 0.064867], [2.06641, -11.3195, -2.02518],
-                       [-6.87761, -1.18354, 1.26735], [-1.93959, -3.56711, -3.96444], [-0.33943, -13.7318, 2.4941],
-                       [3.44558, -13.2893, 5.10556], [-3.73378, -8.56427, -2.31567], [-2.35109, -5.13952, 5.32983],
-                       [6.42324, 0.543804, 2.58669], [7.86166, -5.16509, 0.692536], [3.76085, -3.61315, -3.37012],
-                       [5.44298, -14.2463, 3.15755], [-1.70985, -15.7899, 0.0519905], [2.26734, -13.5848, -1.39097],
-                       [5.74778, 6.39146, 1.10414], [-2.11671, 9.79717, 1.08835], [2.8608, 8.25119, 1.23121],
-                       [-1.18382, 4.3518, 3.89946], [7.96713, 5.05793, 1.41253], [-6.69457, -4.65279, -1.21029],
-                       [0.0191634, -9.11299, -2.26856], [-3.81062, -7.07655, 2.93881], [-7.32947, 0.0447152, 1.78407],
-                       [1.69836, -8.23934, 4.66153], [-6.6485, -10.8634, -0.11143], [-4.06035, -15.9321, 1.42343],
-                       [4.5849, 7.70502, -0.677262], [-1.09886, -1.13732, 5.43579], [2.70622, -0.301464, -3.82059],
-                       [-5.6857, -1.744, -2.71823], [-5.81655, -12.8909, -1.16874], [0.289658, -18.1278, 2.42564],
-                       [-4.47469, -6.57199, 2.10047], [0.112202, 10.0015, 0.627223], [0.235416, 8.04662, -3.31171],
-                       [-2.24934, -5.91415, -2.4902], [-2.55157, 4.50158, -2.19153], [6.43219, 3.07829, 2.6692],
-                       [-3.97414, 5.64061, 1.87932], [-4.56586, 0.0207524, 4.42228], [4.63573, -2.79558, 3.89731],
-                       [6.43056, -6.98187, 3.0528], [-0.986888, -5.57974, 4.56781], [2.21565, 4.82825, 3.77766],
-                       [-1.71112, -11.9039, -1.80275], [2.9143, -7.33767, -3.12538], [3.40413, -13.6728, -0.739559],
-                       [7.51963, -2.20202, 0.395068], [5.59617, -12.9598, 1.13681], [-2.42802, 6.61584, -0.938049],
-                       [5.51021, -11.3324, -0.968232], [6.25447, 5.61217, -1.3508], [-1.20197, 8.31877, -2.62206],
-                       [4.7415, 1.08838, 4.32509], [5.97589, -3.48225, -1.75155], [-2.15625, -15.757, 0.921245],
-                       [-2.94145, -6.93029, -3.58556], [2.64081, 5.92833, -2.84607], [3.95925, -17.4688, 1.86022],
-                       [-3.52455, -14.873, 0.832899], [-3.21377, -9.36567, 4.09077], [-4.48335, -7.68947, 1.74946]]
-
-    cloud_face_verts = [[0, 21, 205], [205, 70, 0], [21, 22, 205], [22, 23, 205], [23, 24, 274], [24, 25, 324],
-                        [25, 26, 229], [26, 27, 229], [27, 9, 229], [205, 71, 70], [205, 72, 71], [205, 73, 72],
-                        [205, 74, 73], [312, 75, 74], [312, 76, 75], [312, 12, 76], [28, 2, 35], [35, 304, 28],
-                        [304, 35, 36], [304, 36, 37], [304, 37, 38], [304, 38, 39], [232, 39, 40], [232, 40, 41],
-                        [202, 41, 10], [29, 28, 304], [30, 29, 304], [31, 30, 232], [32, 31, 235], [33, 32, 235],
-                        [34, 33, 235], [9, 34, 229], [3, 49, 218], [218, 42, 3], [49, 50, 218], [50, 51, 218],
-                        [51, 52, 218], [52, 53, 261], [53, 54, 231], [54, 55, 231], [55, 11, 278], [218, 43, 42],
-                        [218, 44, 43], [325, 45, 44], [325, 46, 45], [325, 47, 46], [325, 48, 47], [202, 10, 48],
-                        [56, 1, 63], [63, 269, 56], [269, 63, 64], [269, 64, 65], [269, 65, 66], [269, 66, 67],
-                        [225, 67, 68], [225, 68, 69], [312, 69, 12], [57, 56, 269], [58, 57, 269], [59, 58, 269],
-                        [60, 59, 252], [61, 60, 252], [62, 61, 313], [11, 62, 278], [4, 77, 247], [247, 126, 4],
-                        [77, 78, 247], [78, 79, 247], [79, 80, 247], [80, 81, 201], [81, 82, 201], [82, 83, 201],
-                        [83, 13, 201], [247, 127, 126], [328, 128, 127], [289, 129, 128], [289, 130, 129],
-                        [275, 131, 130], [275, 132, 131], [213, 16, 132], [84, 5, 91], [91, 200, 84], [200, 91, 92],
-                        [195, 92, 93], [273, 93, 94], [267, 94, 95], [267, 95, 96], [228, 96, 97], [228, 97, 14],
-                        [85, 84, 200], [86, 85, 195], [87, 86, 195], [88, 87, 195], [89, 88, 273], [90, 89, 273],
-                        [13, 90, 273], [7, 105, 251], [251, 98, 7], [105, 106, 251], [106, 107, 311], [107, 108, 311],
-                        [108, 109, 311], [109, 110, 311], [110, 111, 285], [111, 15, 285], [251, 99, 98],
-                        [251, 100, 99], [321, 101, 100], [321, 102, 101], [223, 103, 102], [308, 104, 103],
-                        [308, 14, 104], [112, 6, 119], [119, 265, 112], [265, 119, 120], [265, 120, 121],
-                        [190, 121, 122], [244, 122, 123], [307, 123, 124], [307, 124, 125], [213, 125, 16],
-                        [113, 112, 265], [114, 113, 265], [115, 114, 265], [116, 115, 285], [117, 116, 285],
-                        [118, 117, 285], [15, 118, 285], [0, 70, 237], [237, 154, 0], [70, 71, 237], [71, 72, 237],
-                        [72, 73, 280], [73, 74, 280], [74, 75, 280], [75, 76, 227], [76, 12, 227], [237, 155, 154],
-                        [237, 156, 155], [237, 157, 156], [237, 158, 157], [327, 159, 158], [327, 160, 159],
-                        [327, 18, 160], [63, 1, 133], [133, 314, 63], [314, 133, 134], [314, 134, 135], [314, 135, 136],
-                        [314, 136, 137], [314, 137, 138], [263, 138, 139], [263, 139, 17], [64, 63, 314], [65, 64, 281],
-                        [66, 65, 281], [67, 66, 281], [68, 67, 219], [69, 68, 227], [12, 69, 227], [5, 84, 279],
-                        [279, 140, 5], [84, 85, 279], [85, 86, 279], [86, 87, 279], [87, 88, 257], [88, 89, 257],
-                        [89, 90, 230], [90, 13, 230], [279, 141, 140], [279, 142, 141], [279, 143, 142],
-                        [263, 144, 143], [263, 145, 144], [263, 146, 145], [263, 17, 146], [77, 4, 147], [147, 256, 77],
-                        [256, 147, 148], [256, 148, 149], [256, 149, 150], [256, 150, 151], [327, 151, 152],
-                        [327, 152, 153], [327, 153, 18], [78, 77, 256], [79, 78, 256], [80, 79, 272], [81, 80, 272],
-                        [82, 81, 272], [83, 82, 230], [13, 83, 230], [1, 56, 318], [318, 133, 1], [56, 57, 266],
-                        [57, 58, 266], [58, 59, 209], [59, 60, 209], [60, 61, 209], [61, 62, 322], [62, 11, 322],
-                        [318, 134, 133], [318, 135, 134], [318, 136, 135], [318, 137, 136], [318, 138, 137],
-                        [318, 139, 138], [316, 17, 139], [49, 3, 161], [161, 319, 49], [319, 161, 162], [319, 162, 163],
-                        [319, 163, 164], [319, 164, 165], [192, 165, 166], [192, 166, 167], [192, 167, 19],
-                        [50, 49, 319], [51, 50, 319], [52, 51, 254], [53, 52, 254], [54, 53, 254], [55, 54, 238],
-                        [11, 55, 238], [7, 98, 305], [305, 168, 7], [98, 99, 305], [99, 100, 305], [100, 101, 208],
-                        [101, 102, 208], [102, 103, 208], [103, 104, 208], [104, 14, 241], [305, 169, 168],
-                        [305, 170, 169], [286, 171, 170], [286, 172, 171], [286, 173, 172], [192, 174, 173],
-                        [192, 19, 174], [91, 5, 140], [140, 240, 91], [240, 140, 141], [240, 141, 142], [240, 142, 143],
-                        [240, 143, 144], [316, 144, 145], [316, 145, 146], [316, 146, 17], [92, 91, 240], [93, 92, 240],
-                        [94, 93, 240], [95, 94, 309], [96, 95, 309], [97, 96, 241], [14, 97, 241], [3, 42, 206],
-                        [206, 161, 3], [42, 43, 206], [43, 44, 206], [44, 45, 234], [45, 46, 234], [46, 47, 234],
-                        [47, 48, 302], [48, 10, 302], [206, 162, 161], [206, 163, 162], [206, 164, 163],
-                        [206, 165, 164], [246, 166, 165], [246, 167, 166], [204, 19, 167], [35, 2, 175], [175, 317, 35],
-                        [317, 175, 176], [317, 176, 177], [317, 177, 178], [317, 178, 179], [250, 179, 180],
-                        [250, 180, 181], [250, 181, 20], [36, 35, 317], [37, 36, 317], [38, 37, 317], [39, 38, 320],
-                        [40, 39, 320], [41, 40, 320], [10, 41, 320], [6, 112, 198], [198, 182, 6], [112, 113, 198],
-                        [113, 114, 198], [114, 115, 248], [115, 116, 248], [116, 117, 248], [117, 118, 248],
-                        [118, 15, 284], [198, 183, 182], [198, 184, 183], [207, 185, 184], [207, 186, 185],
-                        [207, 187, 186], [207, 188, 187], [250, 20, 188], [105, 7, 168], [168, 282, 105],
-                        [282, 168, 169], [282, 169, 170], [282, 170, 171], [282, 171, 172], [282, 172, 173],
-                        [282, 173, 174], [204, 174, 19], [106, 105, 282], [107, 106, 282], [108, 107, 282],
-                        [109, 108, 204], [110, 109, 204], [111, 110, 284], [15, 111, 284], [2, 28, 199], [199, 175, 2],
-                        [28, 29, 199], [29, 30, 199], [30, 31, 239], [31, 32, 239], [32, 33, 297], [33, 34, 297],
-                        [34, 9, 259], [199, 176, 175], [199, 177, 176], [199, 178, 177], [199, 179, 178],
-                        [306, 180, 179], [306, 181, 180], [306, 20, 181], [21, 0, 154], [154, 298, 21], [298, 154, 155],
-                        [298, 155, 156], [298, 156, 157], [298, 157, 158], [298, 158, 159], [298, 159, 160],
-                        [211, 160, 18], [22, 21, 298], [23, 22, 197], [24, 23, 197], [25, 24, 197], [26, 25, 262],
-                        [27, 26, 262], [9, 27, 259], [4, 126, 258], [258, 147, 4], [126, 127, 258], [127, 128, 329],
-                        [128, 129, 329], [129, 130, 300], [130, 131, 300], [131, 132, 226], [132, 16, 270],
-                        [258, 148, 147], [211, 149, 148], [211, 150, 149], [211, 151, 150], [211, 152, 151],
-                        [211, 153, 152], [211, 18, 153], [119, 6, 182], [182, 236, 119], [236, 182, 183],
-                        [236, 183, 184], [236, 184, 185], [236, 185, 186], [236, 186, 187], [236, 187, 188],
-                        [306, 188, 20], [120, 119, 236], [121, 120, 264], [122, 121, 264], [123, 122, 264],
-                        [124, 123, 290], [125, 124, 290], [16, 125, 270], [240, 309, 94], [209, 266, 58],
-                        [93, 273, 195], [195, 273, 88], [219, 227, 68], [230, 257, 89], [300, 329, 129], [262, 259, 27],
-                        [184, 198, 207], [248, 198, 114], [239, 199, 30], [179, 199, 306], [200, 195, 85],
-                        [92, 195, 200], [130, 289, 275], [14, 308, 228], [278, 231, 55], [232, 235, 31],
-                        [208, 305, 100], [194, 268, 203], [167, 246, 204], [204, 284, 110], [274, 205, 23],
-                        [74, 205, 312], [234, 206, 44], [165, 206, 246], [207, 198, 283], [188, 207, 250],
-                        [276, 241, 315], [241, 208, 104], [238, 322, 11], [315, 241, 322], [170, 305, 286],
-                        [254, 238, 54], [160, 211, 298], [259, 262, 245], [235, 229, 34], [255, 296, 271],
-                        [102, 321, 223], [125, 213, 307], [239, 214, 199], [290, 270, 125], [256, 272, 79],
-                        [243, 299, 227], [302, 234, 47], [207, 283, 250], [288, 225, 205], [296, 189, 217],
-                        [202, 261, 255], [44, 218, 325], [143, 279, 263], [299, 243, 326], [285, 311, 110],
-                        [220, 285, 249], [301, 221, 302], [284, 248, 118], [223, 222, 291], [127, 247, 328],
-                        [295, 244, 213], [310, 222, 223], [158, 237, 327], [224, 323, 230], [225, 288, 313],
-                        [269, 252, 59], [287, 245, 300], [214, 239, 270], [323, 280, 260], [280, 237, 72],
-                        [94, 267, 273], [291, 222, 201], [229, 324, 25], [217, 271, 296], [215, 257, 230],
-                        [215, 230, 323], [261, 218, 52], [261, 202, 218], [41, 202, 232], [255, 232, 202],
-                        [233, 216, 193], [320, 302, 10], [294, 234, 302], [234, 294, 206], [235, 232, 255],
-                        [229, 235, 212], [214, 306, 199], [236, 264, 120], [280, 191, 237], [293, 327, 237],
-                        [210, 276, 238], [238, 254, 210], [259, 297, 34], [8, 270, 239], [144, 316, 240],
-                        [194, 203, 240], [309, 241, 96], [277, 322, 241], [242, 220, 249], [311, 251, 106],
-                        [243, 219, 196], [219, 243, 227], [190, 244, 295], [122, 244, 190], [329, 300, 245],
-                        [292, 245, 262], [284, 204, 246], [294, 302, 221], [201, 247, 80], [247, 201, 222],
-                        [221, 301, 248], [198, 248, 283], [223, 249, 310], [321, 249, 223], [317, 320, 38],
-                        [250, 193, 216], [100, 251, 321], [251, 220, 242], [189, 313, 288], [313, 278, 62],
-                        [222, 253, 247], [222, 275, 253], [319, 254, 51], [286, 210, 254], [255, 212, 235],
-                        [271, 212, 255], [256, 224, 272], [151, 327, 256], [257, 279, 87], [196, 257, 299],
-                        [148, 258, 211], [245, 292, 329], [239, 259, 8], [245, 287, 259], [215, 299, 257],
-                        [215, 323, 260], [189, 296, 231], [231, 261, 53], [197, 292, 262], [197, 262, 25],
-                        [263, 196, 219], [138, 263, 314], [264, 290, 123], [306, 214, 264], [121, 190, 265],
-                        [265, 285, 115], [266, 268, 194], [139, 318, 316], [291, 228, 223], [96, 228, 267],
-                        [277, 268, 209], [266, 209, 268], [67, 225, 269], [313, 269, 225], [270, 8, 226],
-                        [270, 226, 132], [271, 217, 303], [212, 271, 229], [272, 230, 82], [230, 272, 224],
-                        [273, 201, 13], [201, 273, 291], [324, 274, 24], [217, 205, 274], [132, 275, 213],
-                        [213, 310, 249], [241, 276, 208], [210, 208, 276], [241, 309, 277], [268, 277, 203],
-                        [231, 278, 189], [278, 313, 189], [196, 263, 279], [279, 257, 196], [280, 227, 299],
-                        [227, 280, 75], [281, 219, 67], [314, 281, 64], [174, 204, 282], [282, 204, 108],
-                        [283, 248, 193], [193, 250, 283], [248, 284, 221], [246, 221, 284], [190, 249, 285],
-                        [285, 265, 190], [192, 286, 254], [173, 286, 192], [287, 226, 8], [287, 8, 259],
-                        [288, 217, 189], [205, 217, 288], [128, 328, 289], [289, 253, 275], [290, 214, 270],
-                        [264, 214, 290], [291, 267, 228], [267, 291, 273], [211, 292, 197], [292, 211, 258],
-                        [323, 224, 293], [237, 191, 293], [206, 294, 246], [221, 246, 294], [249, 190, 295],
-                        [213, 249, 295], [261, 231, 296], [261, 296, 255], [297, 239, 32], [259, 239, 297],
-                        [298, 211, 197], [298, 197, 22], [280, 299, 260], [260, 299, 215], [226, 287, 300],
-                        [226, 300, 131], [301, 193, 248], [301, 233, 193], [302, 233, 301], [302, 320, 233],
-                        [324, 229, 303], [303, 229, 271], [39, 232, 304], [304, 232, 30], [210, 286, 305],
-                        [305, 208, 210], [188, 306, 236], [236, 306, 264], [244, 307, 213], [123, 307, 244],
-                        [103, 223, 308], [308, 223, 228], [240, 203, 309], [203, 277, 309], [275, 222, 310],
-                        [275, 310, 213], [220, 251, 311], [311, 285, 220], [69, 312, 225], [312, 205, 225],
-                        [252, 313, 61], [252, 269, 313], [219, 314, 263], [314, 219, 281], [315, 238, 276],
-                        [315, 322, 238], [194, 316, 318], [316, 194, 240], [216, 317, 250], [179, 250, 317],
-                        [266, 318, 56], [194, 318, 266], [254, 319, 192], [165, 192, 319], [320, 216, 233],
-                        [317, 216, 320], [249, 321, 242], [242, 321, 251], [322, 277, 209], [322, 209, 61],
-                        [323, 293, 191], [280, 323, 191], [303, 217, 324], [274, 324, 217], [325, 218, 202],
-                        [48, 325, 202], [196, 299, 326], [196, 326, 243], [327, 293, 224], [327, 224, 256],
-                        [253, 328, 247], [289, 328, 253], [329, 258, 127], [258, 329, 292]]
-
-    cloud_node_name = create_object(cloud_verts_pos, cloud_face_verts)
+    cloud = meshpack.load_mesh(os.path.join(path, 'cloud.pmesh'))
+    cloud_node_name = create_object(cloud.positions, cloud.face_counts, cloud.face_indices)
     cmds.rename(cloud_node_name, "cloud")
+    create_lods("cloud", cloud, cache_dir=path)  # The viewport shows a simplified cloud, the render the full one
     set_scale_keys(target="cloud", keyframes=[[0.001, 62], [1.1, 67], [1, 69]])
     cmds.move(-9.18464, 31, 39.500, "cloud", absolute=True)
     set_position_keys(target="cloud", keyframes=[[[2.409, 31.7, 39.500], 69, [5, 5]],
@@ -1017,6 +1143,8 @@ doDelete;
     '''
 
     pm.mel.eval(recorded_macro)
+    index_nodes('chest', ['CHEST'])  # Names given by the macro
+    index_nodes('lock', ['LOCK_BODY', 'LOCK_1', 'LOCK_A', 'LOCK_B'])
     set_scale_keys(target='CHEST', keyframes=[[0.001, 57], [0.1, 63]])
     set_position_keys(target='CHEST', keyframes=[[[-3.892, 0.764, 0.349], 57, [1, 1]],
                                                  [[-3.892, 2.297, 0.349], 61, [1, 1]],
@@ -1026,41 +1154,94 @@ doDelete;
     cmds.parent('CHEST', 'land')
 
 
-def create_and_animate_trees():
+def scatter_palms(count, leaf_mesh, area=((-150, -150), (150, 150)), height=-4.0, max_time_offset=40):
+    """
+    Function places many palm trees with a particle instancer. Only a few palms are created (templates with different
+    animation offsets, see scenekit.scatter), the instancer draws them at the particles, so the number of nodes
+    does not grow with the number of palms.
+
+    :param count: int - Number of palms
+    :param leaf_mesh: scenekit.meshpack.PackedMesh - Vertex and face data of the leaf
+    :param area: tuple - ((min x, min z), (max x, max z)) - The rectangle where the palms are placed
+    :param height: float - Height of the ground
+    :param max_time_offset: float - Animation offset of the last template, in frames
+    :return: str - Name of the instancer
+    """
+
+    from scenekit import palms, rng, scatter
+
+    placement = scatter.scatter(count, area, height=height, up_axis='y', max_time_offset=max_time_offset,
+                                seed=rng.SEED)
+    template = palms.PalmParameters(diameter=1.2, segs_num=20, leafs_num=9, bending=30, anim_start=11, anim_end=26)
+    palm_layout = palms.layout([template._replace(anim_start=template.anim_start + offset,
+                                                  anim_end=template.anim_end + offset)
+                                for offset in placement.variant_offsets], up_axis='y', leaf_height=4, seed=rng.SEED)
+    templates = [create_palm(palm_layout, variant, id_num=variant + 1, leaf_mesh=leaf_mesh)
+                 for variant in range(len(placement.variant_offsets))]
+    cmds.hide(templates)  # The instancer draws the templates also when they are hidden
+
+    # Per particle attributes of the instancer. Attributes ending with 0 store the initial state of particles.
+    particles = cmds.particle(position=[tuple(position) for position in placement.positions], name='palm_positions')[1]
+    cmds.setAttr(particles + '.startFrame', 0)
+    for attribute, data_type in [('rotationPP', 'vectorArray'), ('scalePP', 'vectorArray'), ('indexPP', 'doubleArray')]:
+        cmds.addAttr(particles, longName=attribute, dataType=data_type)
+        cmds.addAttr(particles, longName=attribute + '0', dataType=data_type)
+    cmds.setAttr(particles + '.rotationPP0', count,
+                 *[tuple(math.degrees(angle) for angle in rotation) for rotation in placement.rotations],
+                 type='vectorArray')
+    cmds.setAttr(particles + '.scalePP0', count, *[(scale, scale, scale) for scale in placement.scales],
+                 type='vectorArray')
+    cmds.setAttr(particles + '.indexPP0', [float(variant) for variant in placement.variants], type='doubleArray')
+
+    instancer = cmds.particleInstancer(particles, addObject=True, object=templates, position='position',
+                                       rotation='rotationPP', scale='scalePP', objectIndex='indexPP')
+    # Like the palms placed by hand, the particles and the instancer are children of the land, so the palms rotate
+    # with the island (see change_hierarchy_and_animate()). Instances are placed at the local positions
+    # of the particles and transformed by the instancer, which moves with the land.
+    cmds.parent(cmds.listRelatives(particles, parent=True)[0], 'land', relative=True)
+    return cmds.parent(instancer, 'land', relative=True)[0]
+
+
+def create_and_animate_trees(path, scatter_count=0):
     """
     Function uses the create_palm() support function to create and animate some palm trees.
     It was created to show how to create basic geometry objects, use instances and use modifications.
-    """
 
-    palm1 = create_palm(diameter=1.3, segs_num=20, leafs_num=9, bending=34, id_num=1, anim_start=11, anim_end=26)
-    palm2 = create_palm(diameter=1.6, segs_num=20, leafs_num=9, bending=34, id_num=2, anim_start=40, anim_end=45)
-    palm3 = create_palm(diameter=1.1, segs_num=18, leafs_num=9, bending=24, id_num=3, anim_start=20, anim_end=35)
-    palm4 = create_palm(diameter=1.1, segs_num=24, leafs_num=9, bending=24, id_num=4, anim_start=25, anim_end=40)
+    :param path: string - The directory with necessary files
+    :param scatter_count: int - Number of palms placed randomly by scatter_palms(), 0 - four palms placed by hand
+    """
 
-    cmds.currentTime(55)  # The removal of history had strange effect when it was applied before tree animation
-    # Next line is intended to avoid a bug. If the history has to be deleted with a cmds.delete function. If it
-    # would not be modified then the bend modificator would have to be moved wit an object or it would affect an object
-    # in different ways then desired during a changes in its position. The problem is, that during that an evaluation
-    # of commands may take some time and the removing of history resulted in not deformed mesh or a partially
-    # deformed mesh. This is why cmds.refresh() command was used.
-    cmds.refresh(f=True)
+    from scenekit import meshpack, palms, rng
+
+    leaf = meshpack.load_mesh(os.path.join(path, 'leaf.pmesh'))  # Loaded once and shared by all the palms
+    if scatter_count:
+        scatter_palms(scatter_count, leaf)
+        return
+
+    # Transforms and keys of all the palms are computed at once, the bend of the trunks is baked into the transforms.
+    palm_layout = palms.layout([palms.PalmParameters(diameter=1.3, segs_num=20, leafs_num=9, bending=34,
+                                                     anim_start=11, anim_end=26),
+                                palms.PalmParameters(diameter=1.6, segs_num=20, leafs_num=9, bending=34,
+                                                     anim_start=40, anim_end=45),
+                                palms.PalmParameters(diameter=1.1, segs_num=18, leafs_num=9, bending=24,
+                                                     anim_start=20, anim_end=35),
+                                palms.PalmParameters(diameter=1.1, segs_num=24, leafs_num=9, bending=24,
+                                                     anim_start=25, anim_end=40)],
+                               up_axis='y', leaf_height=4, seed=rng.SEED)
+    palm1, palm2, palm3, palm4 = [create_palm(palm_layout, palm, id_num=palm + 1, leaf_mesh=leaf) for palm in range(4)]
 
-    cmds.delete(palm1, ch=True)
     cmds.rotate(0.197, 105, 0.558, palm1, absolute=True)  # Rotate the palm
     cmds.move(-8.5, -4.538, 18.1, palm1, absolute=True)  # Position the palm
     cmds.parent(palm1, 'land', relative=True)  # Rename it
 
-    cmds.delete(palm2, ch=True)
     cmds.rotate(-16.935, 74.246, -23.907, palm2)
     cmds.move(29.393, -3.990, 4.526, palm2)
     cmds.parent(palm2, 'land', relative=True)
 
-    cmds.delete(palm3, ch=True)
     cmds.move(24.498, -3.322, 36.057, palm3)
     cmds.rotate(0.023, 0.248, -1.950, palm3)
     cmds.parent(palm3, 'land', relative=True)
 
-    cmds.delete(palm4, ch=True)
     cmds.move(4.353, -1.083, 22.68, palm4)
     cmds.rotate(-150, -102.569, 872.616, palm4)
     cmds.parent(palm4, 'land', relative=True)
@@ -1071,7 +1252,10 @@ def change_hierarchy_and_animate():
     Function modifies the hierarchy of scene and creates some final animations, that ware not possible to create earlier.
     It also creates cameras and lights.
     """
-    cmds.lookThru('perspView', 'RenderCamera1')  # Change the perspective viewport to the render camera.
+
+    from scenekit import keytable
+
+    cmds.lookThru('perspView', indexed_nodes('camera')[0])  # Change the perspective viewport to the render camera.
 
     top_locator = cmds.spaceLocator()  # Parent for all the elements that will rotate together
     objects_list = ['land', 'water', 'cloud', 'shark', ]
@@ -1079,8 +1263,9 @@ def change_hierarchy_and_animate():
     for obj in objects_list:
         cmds.parent(obj, top_locator)
 
-    cmds.setKeyframe(top_locator, attribute='rotateY', v=20, time=260, itt="plateau", ott="plateau")
-    cmds.setKeyframe(top_locator, attribute='rotateY', v=0, time=0, itt="linear", ott="linear")
+    with keytable.collect(flush_keys) as table:  # Keys are written to the scene at the end of the step
+        table.add(top_locator[0], 'rotation', 1, 260, 20, keytable.PLATEAU, keytable.PLATEAU)
+        table.add(top_locator[0], 'rotation', 1, 0, 0, keytable.LINEAR, keytable.LINEAR)
 
     dome_light = cmds.polySphere(r=500)  # This sphere is a substitute of a skylight in 3Ds Max
     cmds.polyNormal(dome_light, normalMode=0)  # The normals have to point to inside
@@ -1089,9 +1274,10 @@ def change_hierarchy_and_animate():
         cmds.setAttr(dome_light[0] + ".miDeriveFromMaya", 0)  # Enable changes in object render settings
         cmds.setAttr(dome_light[0] + ".miVisible", 0)  # This object will be invisible to camera
         cmds.setAttr(dome_light[0] + ".miShadow", 0)  # And will not affect shadows
-    cmds.rename(dome_light[0], "dome_light")
+    index_nodes('dome_light', [cmds.rename(dome_light[0], "dome_light")])
 
     area_light = cmds.shadingNode('areaLight', asLight=True)
+    index_nodes('light', [area_light])
     cmds.scale(25, 25, 25, area_light, absolute=True)
     cmds.move(-230.59, 178.425, 99.192, area_light)
     cmds.rotate(0, -68.929, -37.987, area_light)
@@ -1111,6 +1297,8 @@ def create_and_assign_materials():
     It was created to show how to use materials.
     """
 
+    from scenekit import materialrules, nodeindex
+
     light_dome_mat = cmds.shadingNode("surfaceShader", asShader=True)
     cmds.setAttr(light_dome_mat + ".outColorR", 0.15)
     cmds.setAttr(light_dome_mat + ".outColorG", 0.15)
@@ -1189,17 +1377,20 @@ def create_and_assign_materials():
         cmds.connectAttr('%s.outColor' % water_mat, '%s.surfaceShader' % water_sg)
     cmds.rename(water_mat, 'water_material')
 
-    for obj in cmds.ls(geometry=True, ):  # Assign materials to objects
-        if "dome_light" in obj:
-            cmds.sets(obj, e=True, forceElement=light_dome_sg)
-        if "LOCK" in obj:
-            cmds.sets(obj, e=True, forceElement=gray_sg)
-        if any(x in obj for x in ['segment', 'CHEST']):
-            cmds.sets(obj, e=True, forceElement=wood_sg)
-        if "leaf" in obj:
-            cmds.sets(obj, e=True, forceElement=leaf_sg)
-        if "water" in obj:
-            cmds.sets(obj, e=True, forceElement=water_sg)
+    # Assign materials to objects. Objects are taken from the node index (see index_nodes()) instead of a scan of all
+    # of the geometry of the scene, their roles are the tags of the rules. Every material is assigned with one command.
+    rules = [materialrules.rule(light_dome_sg, tags=['dome_light']),
+             materialrules.rule(gray_sg, tags=['lock']),
+             materialrules.rule(wood_sg, tags=['chest', 'segment']),
+             materialrules.rule(leaf_sg, tags=['leaf']),
+             materialrules.rule(water_sg, tags=['water'])]
+    shapes, tags = [], []
+    for role in nodeindex.roles():
+        role_shapes = indexed_nodes(role, shapes=True)
+        shapes.extend(role_shapes)
+        tags.extend([[role]] * len(role_shapes))
+    for shading_group, numbers in materialrules.partition(shapes, rules, tags):
+        cmds.sets([shapes[number] for number in numbers], e=True, forceElement=shading_group)
 
 
 if __name__ == "__main__":